@@ -1,26 +1,102 @@
+import io
+import json
+import re
+import zipfile
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
 from exceptions import GeminiConfigurationError
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 import pycountry
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from models.scoring_config import ScoringConfig
+from models.subject import Subject
+from services.company_registry import get_company_registry, resolve_company
+from services.job_queue import JobQueueFullError, get_job_queue
+from services.osint_pipeline import SubjectResolutionError, _resolve_country, iter_analysis_stages
+from services.peer_markets import MAX_PEERS, find_peer_markets, queue_peer_analyses
+from services.supply_chain import analyze_supply_chain
+from services.pdf_report import build_pdf_reports
+from services.report import iter_combined_html_report, iter_html_report
+from services.result_store import get_result_store
+from services.run_store import get_run_store
 from services.scoring_engine import ScoringEngine
+from services.telemetry import METRICS, RunTrace
+from services.usage_ledger import get_usage_ledger
 
 router = APIRouter()
 
 class MarketRequest(BaseModel):
     country_name: str
 
-@router.post("/analyze")
-async def analyze_market(request: MarketRequest):
+
+class SubjectAnalysisRequest(BaseModel):
+    subject: Subject
+    scoring_config: Optional[ScoringConfig] = None
+    fetch_full_text: bool = False
+
+
+class JobRequest(BaseModel):
+    kind: Literal["analyze_subject", "score_country", "build_distributions"] = "analyze_subject"
+    subject: Optional[Subject] = None
+    scoring_config: Optional[ScoringConfig] = None
+    country_name: Optional[str] = None
+    priority: int = 0
+    fetch_full_text: bool = False
+
+
+class PeerMarketsRequest(BaseModel):
+    subject: Subject
+    k: int = Field(default=5, ge=1, le=MAX_PEERS)
+    analyze: bool = False
+    scoring_config: Optional[ScoringConfig] = None
+    priority: int = 0
+    fetch_full_text: bool = False
+
+
+class CombinedReportRequest(BaseModel):
+    digests: List[str]
+
+
+class PdfBatchRequest(BaseModel):
+    digests: List[str]
+    # Capped at the server's CPU count.
+    max_workers: Optional[int] = Field(default=None, ge=1)
+
+
+def _resolve_market(country_name: str) -> Tuple[str, str]:
     try:
-        country = pycountry.countries.search_fuzzy(request.country_name)[0]
-        country_code = country.alpha_2
-        country_name = country.name
+        country = pycountry.countries.search_fuzzy(country_name)[0]
+        return country.alpha_2, country.name
     except LookupError:
-            raise HTTPException(status_code=404, detail=f"Country '{request.country_name}' not found.")
+            raise HTTPException(status_code=404, detail=f"Country '{country_name}' not found.")
     except Exception as e:
         # If pycountry fails in another way
         raise HTTPException(status_code=500, detail=f"Error validating country: {str(e)}")
 
+
+def _ndjson_stream(first: Tuple[str, Dict[str, Any]], stages: Iterator[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """Serializes pipeline stages as newline-delimited JSON events."""
+    stage, payload = first
+    yield json.dumps({"stage": stage, "data": payload}, ensure_ascii=False, default=str) + "\n"
+    try:
+        for stage, payload in stages:
+            yield json.dumps({"stage": stage, "data": payload}, ensure_ascii=False, default=str) + "\n"
+    except Exception as e:
+        # Headers are already sent, so failures are reported in-band.
+        yield json.dumps({"stage": "error", "detail": str(e)}) + "\n"
+
+
+def _start_stream(stages: Iterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    # Run the first stage eagerly so resolution/configuration errors still map to HTTP status codes.
+    first = next(stages)
+    return StreamingResponse(_ndjson_stream(first, stages), media_type="application/x-ndjson")
+
+
+@router.post("/analyze")
+async def analyze_market(request: MarketRequest):
+    country_code, country_name = _resolve_market(request.country_name)
+
     try:
         # Initialize scoring engine inside the handler to avoid module-level initialization errors
         scoring_engine = ScoringEngine()
@@ -30,3 +106,253 @@ async def analyze_market(request: MarketRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze/stream")
+def analyze_market_stream(request: MarketRequest):
+    country_code, country_name = _resolve_market(request.country_name)
+    try:
+        scoring_engine = ScoringEngine()
+        return _start_stream(scoring_engine.iter_score_country(country_code, country_name))
+    except GeminiConfigurationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/osint/stream")
+def analyze_subject_stream(
+    request: SubjectAnalysisRequest,
+    partial: bool = False,
+    x_user_id: Optional[str] = Header(default=None),
+):
+    try:
+        # Only attribute the run when the caller identifies itself; otherwise the pipeline's default trace applies.
+        options = {"trace": RunTrace(user=x_user_id)} if x_user_id else {}
+        if partial:
+            options["partial_scores"] = True
+        if request.fetch_full_text:
+            options["fetch_full_text"] = True
+        return _start_stream(iter_analysis_stages(request.subject, request.scoring_config, **options))
+    except SubjectResolutionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs", status_code=202)
+def submit_job(request: JobRequest, x_user_id: Optional[str] = Header(default=None)):
+    if request.kind == "analyze_subject":
+        if request.subject is None:
+            raise HTTPException(status_code=422, detail="'subject' is required for analyze_subject jobs.")
+        if request.subject.target_type == "country":
+            try:
+                _resolve_country(request.subject.target_name)
+            except SubjectResolutionError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+        payload = {
+            "subject": request.subject.model_dump(),
+            "scoring_config": request.scoring_config.model_dump() if request.scoring_config else None,
+            "user": x_user_id,
+            "fetch_full_text": request.fetch_full_text,
+        }
+    elif request.kind == "build_distributions":
+        payload = {}
+    else:
+        if not request.country_name:
+            raise HTTPException(status_code=422, detail="'country_name' is required for score_country jobs.")
+        country_code, country_name = _resolve_market(request.country_name)
+        payload = {"country_code": country_code, "country_name": country_name}
+
+    try:
+        job_id = get_job_queue().submit(request.kind, payload, priority=request.priority)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/peers")
+def peer_markets(request: PeerMarketsRequest, x_user_id: Optional[str] = Header(default=None)):
+    """
+    Countries most similar to the subject's country by macro, trade and policy
+    indicators. With ``analyze``, queues an analysis of each peer with the same subject settings.
+    """
+    if request.subject.target_type != "country":
+        raise HTTPException(status_code=422, detail="Peer markets need a country subject.")
+    try:
+        resolved = _resolve_country(request.subject.target_name)
+        peers = find_peer_markets(resolved["country_code"], k=request.k)
+    except SubjectResolutionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if request.analyze:
+        try:
+            peers["jobs"] = queue_peer_analyses(
+                request.subject,
+                peers["peers"],
+                scoring_config=request.scoring_config.model_dump() if request.scoring_config else None,
+                user=x_user_id,
+                priority=request.priority,
+                fetch_full_text=request.fetch_full_text,
+            )
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+    return peers
+
+
+@router.get("/supply-chain")
+def supply_chain(hs_codes: str, focus: Optional[str] = None, year: Optional[int] = None):
+    """
+    Whole-graph supply-chain analysis of the comma-separated HS codes from the local
+    trade-flow store, with the ``focus`` country's exposure when given.
+    """
+    codes = [code.strip() for code in hs_codes.split(",") if code.strip()]
+    focus_code = None
+    if focus:
+        try:
+            focus_code = _resolve_country(focus)["country_code"]
+        except SubjectResolutionError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    analysis = analyze_supply_chain(codes, focus=focus_code, year=year)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="No trade flows on file for these HS codes.")
+    return analysis
+
+
+@router.get("/companies")
+def companies(name: str, country: Optional[str] = None):
+    """
+    Resolves a company name against the local legal-entity registry: the legal entity,
+    other candidates and its parents and subsidiaries. ``country`` prefers entities registered there.
+    """
+    country_code = None
+    if country:
+        try:
+            country_code = _resolve_country(country)["country_code"]
+        except SubjectResolutionError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    company = resolve_company(get_company_registry(), name, country=country_code)
+    if not company["available"]:
+        raise HTTPException(
+            status_code=409,
+            detail="No company registry ingested yet (python -m services.company_registry gleif <file>).",
+        )
+    if company["entity"] is None:
+        raise HTTPException(status_code=404, detail=f"Company '{name}' not found in the local registry.")
+    return company
+
+
+@router.get("/jobs")
+def list_jobs(status: Optional[str] = None, limit: int = 50):
+    return get_job_queue().list_jobs(status=status, limit=limit)
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    if not get_job_queue().cancel(job_id):
+        job = get_job_queue().get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is already {job['status']}.")
+    return get_job_queue().get(job_id)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Cumulative per-stage, upstream HTTP and cache counters in Prometheus text format."""
+    return PlainTextResponse(METRICS.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/usage")
+def usage_report(
+    since: Optional[str] = None, until: Optional[str] = None, api: Optional[str] = None, user: Optional[str] = None
+):
+    """Paid API calls, cache hits, blocked calls and estimated cost per day, API, key and user."""
+    return {"rows": get_usage_ledger().report(since=since, until=until, api=api, user=user)}
+
+
+@router.get("/runs")
+def list_runs(
+    target: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+):
+    """Paginated run history, newest first. ``since``/``until`` are ISO-8601 UTC timestamps."""
+    store = get_run_store()
+    limit = max(1, min(limit, 500))
+    return {
+        "total": store.count(target=target, since=since, until=until),
+        "items": store.query(target=target, since=since, until=until, limit=limit, offset=max(0, offset)),
+    }
+
+
+@router.get("/results/{digest}")
+def get_result(digest: str):
+    """Full stored analysis result by content digest (no upstream calls)."""
+    result = get_result_store().get(digest)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Result '{digest}' not found.")
+    return result
+
+
+@router.get("/runs/{run_id}/result")
+def get_run_result(run_id: str):
+    run = get_run_store().get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found.")
+    if not run.get("result_ref"):
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' has no stored result.")
+    return get_result(run["result_ref"])
+
+
+@router.get("/results/{digest}/report.html")
+def get_result_report(digest: str):
+    """HTML report for a stored result, streamed in chunks."""
+    result = get_result(digest)
+    return StreamingResponse(iter_html_report(result), media_type="text/html; charset=utf-8")
+
+
+@router.post("/reports/combined")
+def combined_report(request: CombinedReportRequest):
+    """
+    One HTML document covering several stored results. Results are loaded one at a
+    time while the response streams, so the full document is never held in memory.
+    """
+    store = get_result_store()
+    missing = [digest for digest in request.digests if not store.exists(digest)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Results not found: {', '.join(missing)}")
+    results = (store.get(digest) or {} for digest in request.digests)
+    return StreamingResponse(iter_combined_html_report(results), media_type="text/html; charset=utf-8")
+
+
+@router.post("/reports/pdf-batch")
+def pdf_batch(request: PdfBatchRequest):
+    """PDF reports for several stored results, rendered in worker processes and returned as a zip."""
+    store = get_result_store()
+    results = [store.get(digest) for digest in request.digests]
+    missing = [digest for digest, result in zip(request.digests, results) if result is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Results not found: {', '.join(missing)}")
+    documents = build_pdf_reports(results, max_workers=request.max_workers)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index, (result, document) in enumerate(zip(results, documents), start=1):
+            target = result.get("subject", {}).get("target_name") or "subject"
+            archive.writestr(f"{index:03d}-{re.sub(r'[^A-Za-z0-9]+', '_', target).strip('_')}.pdf", document)
+    return Response(
+        buffer.getvalue(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="osint_reports.zip"'},
+    )
@@ -0,0 +1,117 @@
+import io
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _load_routes(fixtures_dir: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(fixtures_dir, "routes.json"), "r", encoding="utf-8") as handle:
+        routes = json.load(handle).get("routes", [])
+    for route in routes:
+        route["pattern"] = re.compile(route["path"])
+    return routes
+
+
+def _match(routes: List[Dict[str, Any]], url: str) -> Optional[Dict[str, Any]]:
+    parsed = urlparse(url)
+    for route in routes:
+        if route["host"] != parsed.netloc.lower():
+            continue
+        match = route["pattern"].match(parsed.path)
+        if match:
+            return {**route, "file": route["file"].format(**match.groupdict())}
+    return None
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves recorded upstream responses from ``fixtures/`` instead of the network.
+
+    Routes in ``routes.json`` map a host and path pattern to a fixture file; unmatched
+    requests get a 404 so failure paths behave like a missing upstream.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR):
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+        self.routes = _load_routes(fixtures_dir)
+        self._bodies: Dict[str, bytes] = {}
+        self.requests: List[str] = []
+
+    def _body(self, filename: str) -> Optional[bytes]:
+        if filename not in self._bodies:
+            path = os.path.join(self.fixtures_dir, filename)
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as handle:
+                self._bodies[filename] = handle.read()
+        return self._bodies[filename]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests.append(request.url)
+        route = _match(self.routes, request.url)
+        body = self._body(route["file"]) if route else None
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = "utf-8"
+        if body is None:
+            response.status_code = 404
+            response.reason = "Not Found"
+            response._content = b""
+            return response
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers["Content-Type"] = route.get("content_type", "application/octet-stream")
+        response._content = body
+        # Streamed reads (iter_content) pull from the raw body like a live response.
+        response.raw = io.BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Passes requests to the network and rewrites the fixture of every matched route."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures_dir = fixtures_dir
+        self.routes = _load_routes(fixtures_dir)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        route = _match(self.routes, request.url)
+        if route and response.ok:
+            with open(os.path.join(self.fixtures_dir, route["file"]), "wb") as handle:
+                handle.write(response.content)
+        return response
+
+
+class _ReplayGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ReplayGeminiModel:
+    """Stands in for ``genai.GenerativeModel`` and answers with the recorded Gemini outputs."""
+
+    def __init__(self, *_args, fixtures_dir: str = FIXTURES_DIR, **_kwargs):
+        self.fixtures_dir = fixtures_dir
+
+    def _load(self, filename: str) -> str:
+        with open(os.path.join(self.fixtures_dir, filename), "r", encoding="utf-8") as handle:
+            return json.load(handle)["text"]
+
+    def generate_content(self, prompt: str) -> _ReplayGeminiResponse:
+        if "Translate the following market analysis" in prompt:
+            return _ReplayGeminiResponse(self._load("gemini_translation.json"))
+        return _ReplayGeminiResponse(self._load("gemini_analysis.json"))
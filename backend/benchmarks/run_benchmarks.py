@@ -0,0 +1,347 @@
+"""
+Offline performance benchmarks for the OSINT pipeline.
+
+Upstream World Bank, Brave, tender RSS and Gemini responses are replayed from
+``benchmarks/fixtures`` so runs are deterministic and need no API keys.
+
+    cd backend
+    python -m benchmarks.run_benchmarks                        # quick scale
+    python -m benchmarks.run_benchmarks --scale full --compare <commit-or-file>
+    python -m benchmarks.run_benchmarks --record               # refresh fixtures (needs live keys)
+
+Results are written to ``benchmarks/results/<commit>-<scale>.json`` (git-ignored) for comparison between commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pycountry
+
+from benchmarks.replay import FIXTURES_DIR, RecordingAdapter, ReplayAdapter, ReplayGeminiModel
+from models.scoring_config import ScoringConfig
+from models.subject import Subject
+from services.cache import reset_default_stores
+from services.evidence import build_evidence_from_news, build_evidence_from_tenders, dedupe_evidence
+from services.evidence_ranker import rank_evidence
+from services.hs_utils import get_hs_index, rank_hs_codes_batch
+from services.http_client import HttpClient
+from services.indicator_distributions import QuantileTable
+from services.osint_pipeline import analyze_subject
+from services.pdf_report import build_pdf_report
+from services.report import build_html_report
+from services.scoring import score_subject
+from services.supply_chain import TradeGraph
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+TENDER_FEED_URL = "https://tenders.example.test/rss"
+
+SCALES = {
+    "quick": {"subjects": [1, 50], "evidence": [10, 1000], "repeat": 3},
+    "full": {"subjects": [1, 50, 500], "evidence": [10, 100, 1000, 10000], "repeat": 5},
+}
+
+
+@contextmanager
+def _isolated_cache() -> Iterator[str]:
+    previous = os.environ.get("OSINT_CACHE_DIR")
+    with tempfile.TemporaryDirectory(prefix="osint-bench-") as cache_dir:
+        os.environ["OSINT_CACHE_DIR"] = cache_dir
+        reset_default_stores()
+        try:
+            yield cache_dir
+        finally:
+            reset_default_stores()
+            if previous is None:
+                os.environ.pop("OSINT_CACHE_DIR", None)
+            else:
+                os.environ["OSINT_CACHE_DIR"] = previous
+
+
+def _measure(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "repeat": repeat,
+    }
+
+
+def _subjects(count: int) -> List[Subject]:
+    countries = [country.name for country in pycountry.countries]
+    return [
+        Subject(
+            target_name=countries[index % len(countries)],
+            products=["crumb rubber", "rubber tiles"],
+            signals_of_interest=["import growth", "construction projects"],
+            risk_focus=["sanctions"],
+            hs_codes=["4004", "4016"],
+            tender_feeds=[TENDER_FEED_URL],
+        )
+        for index in range(count)
+    ]
+
+
+def _load_fixture(filename: str) -> Any:
+    with open(os.path.join(FIXTURES_DIR, filename), "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def synthetic_evidence(count: int) -> List[Dict[str, Any]]:
+    """Scales the recorded Brave results up to ``count`` items, with ~10% duplicates for dedupe."""
+    templates = _load_fixture("brave_search.json")["web"]["results"]
+    news = []
+    tenders = []
+    for index in range(count):
+        template = templates[index % len(templates)]
+        variant = index if index % 10 else max(index - 1, 0)
+        item = {
+            "title": f"{template['title']} #{variant}",
+            "url": f"{template['url']}/{variant}",
+            "description": template["description"],
+            "age": template.get("age"),
+            "severity": "low",
+            "keyword_hits": index % 4,
+            "relevance_score": (index * 7) % 101,
+        }
+        if index % 5 == 4:
+            tenders.append({**item, "summary": item["description"], "date": "2024-09-02"})
+        else:
+            news.append(item)
+    return build_evidence_from_news(news) + build_evidence_from_tenders(tenders)
+
+
+def _report_payload(evidence: List[Dict[str, Any]]) -> Dict[str, Any]:
+    subject = _subjects(1)[0]
+    macro = {"gdp": 1_323_255_000_000, "population": 85_664_944, "lat": 39.7, "lng": 32.4}
+    trade = {"NE.IMP.GNFS.CD": {"label": "Imports", "value": 371_532_000_000}}
+    scores = score_subject(subject, macro, evidence, trade, ScoringConfig())
+    return {
+        "subject": subject.model_dump(),
+        "resolved": {"country_code": "TR", "country_name": "Turkiye"},
+        "macro": macro,
+        "trade_signals": trade,
+        "policy_signals": {},
+        "scores": scores,
+        "scoring_config": ScoringConfig().model_dump(),
+        "evidence": evidence,
+        "query_plan": [],
+        "tender_filters": [],
+        "warnings": [],
+        "data_sources": [],
+    }
+
+
+def run_benchmarks(scale: str) -> Dict[str, Dict[str, float]]:
+    settings = SCALES[scale]
+    repeat = settings["repeat"]
+    results: Dict[str, Dict[str, float]] = {}
+
+    def record(name: str, stats: Dict[str, float]) -> None:
+        results[name] = stats
+        print(f"{name}: median {stats['median_ms']:.2f} ms", file=sys.stderr, flush=True)
+
+    for count in settings["subjects"]:
+        subjects = _subjects(count)
+        subject_repeat = 1 if count > 50 else repeat
+        # Cold runs start from an empty cache so upstream replay, parsing and cache writes are included.
+        with _isolated_cache():
+            stats = _measure(
+                lambda: [analyze_subject(subject) for subject in subjects],
+                repeat=subject_repeat,
+                setup=_clear_cache_dir,
+            )
+            record(f"analyze_subject[subjects={count},cache=cold]", stats)
+            stats = _measure(lambda: [analyze_subject(subject) for subject in subjects], repeat=subject_repeat)
+            record(f"analyze_subject[subjects={count},cache=warm]", stats)
+
+    for count in settings["evidence"]:
+        evidence = synthetic_evidence(count)
+        payload = _report_payload(evidence)
+        subject = Subject(**payload["subject"])
+        record(f"dedupe_evidence[evidence={count}]", _measure(lambda: dedupe_evidence(evidence), repeat))
+        stats = _measure(
+            lambda: score_subject(subject, payload["macro"], evidence, payload["trade_signals"], ScoringConfig()),
+            repeat,
+        )
+        record(f"score_subject[evidence={count}]", stats)
+        stats = _measure(lambda: rank_evidence(evidence, subject, top_k=10), repeat)
+        record(f"rank_evidence[evidence={count},top_k=10]", stats)
+        record(f"build_html_report[evidence={count}]", _measure(lambda: build_html_report(payload), repeat))
+        # The PDF paginates every evidence item; keep the largest sizes to a single pass.
+        pdf_repeat = 1 if count > 1000 else repeat
+        record(f"build_pdf_report[evidence={count}]", _measure(lambda: build_pdf_report(payload), pdf_repeat))
+
+    get_hs_index()
+    product_lines = [f"{product} {index}" for index in range(100) for product in ("crumb rubber", "rubber floor tiles")]
+    record("rank_hs_codes_batch[lines=200]", _measure(lambda: rank_hs_codes_batch(product_lines), repeat))
+
+    # ~200 countries' GDP; batch scoring ranks many values against one table.
+    gdp_table = QuantileTable(10 ** (8 + 5 * index / 217) for index in range(217))
+    gdp_values = [10 ** (8 + 5 * ((index * 7919) % 10000) / 10000) for index in range(10000)]
+    record("quantile_percentiles[values=10000]", _measure(lambda: gdp_table.percentiles(gdp_values), repeat))
+
+    # A product's whole trade graph: 250 countries, each importing from 40 suppliers.
+    countries = [f"C{index:03d}" for index in range(250)]
+    importers = [country for country in countries for _supplier in range(40)]
+    suppliers = [countries[(index * 37 + offset * 7 + 1) % 250] for index in range(250) for offset in range(40)]
+    flow_values = [1e6 * (1 + (index * 7919) % 97) for index in range(len(importers))]
+    record(
+        "supply_chain_graph[countries=250,flows=10000]",
+        _measure(lambda: TradeGraph.from_arrays(importers, suppliers, flow_values).analyze().summary(), repeat),
+    )
+
+    record("score_country[replayed gemini]", _measure(_score_country_once, repeat))
+    return results
+
+
+def _clear_cache_dir() -> None:
+    cache_dir = os.environ["OSINT_CACHE_DIR"]
+    reset_default_stores()
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def _score_country_once() -> None:
+    import services.gemini_service as gemini_service
+    from services.scoring_engine import ScoringEngine
+
+    original_model = gemini_service.genai.GenerativeModel
+    original_configure = gemini_service.genai.configure
+    gemini_service.genai.GenerativeModel = ReplayGeminiModel
+    gemini_service.genai.configure = lambda **_kwargs: None
+    try:
+        with _isolated_cache():
+            ScoringEngine().score_country("TR", "Turkiye")
+    finally:
+        gemini_service.genai.GenerativeModel = original_model
+        gemini_service.genai.configure = original_configure
+
+
+def _git_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], text=True).strip())
+        return {"commit": commit, "dirty": dirty}
+    except Exception:
+        return {"commit": "unknown", "dirty": True}
+
+
+def save_results(results: Dict[str, Dict[str, float]], scale: str) -> str:
+    revision = _git_commit()
+    payload = {
+        **revision,
+        "scale": scale,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    name = revision["commit"] + ("-dirty" if revision["dirty"] else "")
+    path = os.path.join(RESULTS_DIR, f"{name}-{scale}.json")
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+    return path
+
+
+def _resolve_baseline(reference: str, scale: str) -> str:
+    if os.path.exists(reference):
+        return reference
+    for candidate in (f"{reference}-{scale}.json", f"{reference}-dirty-{scale}.json"):
+        path = os.path.join(RESULTS_DIR, candidate)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No stored benchmark results for '{reference}' at scale '{scale}'.")
+
+
+def compare_results(
+    baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]], threshold_pct: float
+) -> List[Dict[str, Any]]:
+    rows = []
+    for name, stats in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        delta_pct = (stats["median_ms"] - previous["median_ms"]) / max(previous["median_ms"], 1e-9) * 100
+        rows.append(
+            {
+                "name": name,
+                "baseline_ms": previous["median_ms"],
+                "current_ms": stats["median_ms"],
+                "delta_pct": round(delta_pct, 1),
+                "regression": delta_pct > threshold_pct,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="quick")
+    parser.add_argument("--compare", help="Baseline commit (from benchmarks/results) or results file.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--record", action="store_true", help="Run one live analysis and refresh the fixtures.")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        HttpClient.transport_adapter = RecordingAdapter()
+        analyze_subject(_subjects(1)[0])
+        print(f"Fixtures refreshed in {FIXTURES_DIR}")
+        return 0
+
+    baseline = None
+    if args.compare:
+        # Load before running: the new results may overwrite the same file when comparing a commit to itself.
+        with open(_resolve_baseline(args.compare, args.scale), "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)["benchmarks"]
+
+    os.environ.setdefault("BRAVE_API_KEY", "replay")
+    os.environ.setdefault("GEMINI_API_KEY", "replay")
+    HttpClient.transport_adapter = ReplayAdapter()
+    results = run_benchmarks(args.scale)
+    path = save_results(results, args.scale)
+    width = max(len(name) for name in results)
+    for name, stats in results.items():
+        print(f"{name:<{width}}  median {stats['median_ms']:>10.2f} ms  min {stats['min_ms']:>10.2f} ms")
+    print(f"\nSaved results to {path}")
+
+    if baseline is None:
+        return 0
+    rows = compare_results(baseline, results, args.threshold)
+    print(f"\nComparison against {args.compare} (threshold {args.threshold}%)")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<{width}}  {row['baseline_ms']:>10.2f} -> {row['current_ms']:>10.2f} ms"
+            f"  {row['delta_pct']:>+7.1f}%  {flag}"
+        )
+    if args.fail_on_regression and any(row["regression"] for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import sys
+from dataclasses import dataclass, fields
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+
+class EvidenceSource(str, Enum):
+    BRAVE_SEARCH = "Brave Search"
+    WORLD_BANK = "World Bank"
+    TENDER_FEED = "Tender Feed"
+
+
+class EvidenceQuality(str, Enum):
+    OFFICIAL = "official"
+    MEDIA = "media"
+    UNKNOWN = "unknown"
+
+
+def _intern(value: Any) -> Any:
+    # signal_type, domain and severity repeat across thousands of items; share one string each.
+    return sys.intern(value) if type(value) is str else value
+
+
+def _enum(enum_type: type, value: Any) -> Any:
+    if value is None or isinstance(value, enum_type):
+        return value
+    try:
+        return enum_type(value)
+    except ValueError:
+        return _intern(value)
+
+
+@dataclass(slots=True)
+class Evidence:
+    """
+    One evidence item. Slotted, with enum/interned labels, so large batches do not
+    carry a dict and a set of repeated keys per item.
+
+    Supports the dict access the pipeline, scoring and reports already use
+    (``item["title"]``, ``item.get("quality")``, ``item["relevance_score"] = ...``);
+    keys outside the fixed fields are kept in ``extra``.
+    """
+
+    title: Optional[str] = None
+    url: Optional[str] = None
+    summary: Any = None
+    age: Optional[str] = None
+    source: Optional[EvidenceSource] = None
+    signal_type: Optional[str] = None
+    domain: Optional[str] = None
+    quality: Optional[EvidenceQuality] = None
+    severity: Optional[str] = None
+    keyword_hits: Optional[int] = None
+    relevance_score: Optional[float] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self) -> None:
+        self.source = _enum(EvidenceSource, self.source)
+        self.quality = _enum(EvidenceQuality, self.quality)
+        self.signal_type = _intern(self.signal_type)
+        self.domain = _intern(self.domain)
+        self.severity = _intern(self.severity)
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> "Evidence":
+        known = {key: value for key, value in item.items() if key in EVIDENCE_FIELDS}
+        extra = {key: value for key, value in item.items() if key not in EVIDENCE_FIELDS}
+        return cls(**known, extra=extra or None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with enum labels as strings; only fields that are set, plus ``extra``."""
+        item = {}
+        for name in EVIDENCE_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                item[name] = value.value if isinstance(value, Enum) else value
+        if self.extra:
+            item.update(self.extra)
+        return item
+
+    def __getitem__(self, key: str) -> Any:
+        if key in EVIDENCE_FIELDS:
+            value = getattr(self, key)
+            return value.value if isinstance(value, Enum) else value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in EVIDENCE_FIELDS:
+            setattr(self, key, value)
+            self.__post_init__()
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: object) -> bool:
+        return key in EVIDENCE_FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None and key in EVIDENCE_FIELDS else value
+
+    def keys(self) -> List[str]:
+        return list(self.to_dict())
+
+    def items(self) -> Iterable:
+        return self.to_dict().items()
+
+
+EVIDENCE_FIELDS = tuple(field.name for field in fields(Evidence) if field.name != "extra")
+# Columns stored as Arrow dictionaries in EvidenceBatch: few distinct values, many rows.
+CATEGORICAL_FIELDS = ("source", "signal_type", "domain", "quality", "severity")
+
+
+# Evidence or its plain-dict form (stored results, API payloads).
+EvidenceLike = Union[Evidence, Dict[str, Any]]
+
+
+class EvidenceBatch:
+    """
+    Columnar evidence: one list per field instead of one object per item, for batch
+    runs with tens of thousands of items. Converts to Arrow/pandas column by column,
+    with labels dictionary-encoded.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, List[Any]]] = None, extra: Optional[List[Optional[Dict]]] = None):
+        self.columns: Dict[str, List[Any]] = columns or {name: [] for name in EVIDENCE_FIELDS}
+        length = len(next(iter(self.columns.values()), []))
+        self.extra: List[Optional[Dict[str, Any]]] = extra if extra is not None else [None] * length
+
+    @classmethod
+    def from_items(cls, items: Iterable[Any]) -> "EvidenceBatch":
+        batch = cls()
+        for item in items:
+            batch.append(item)
+        return batch
+
+    def append(self, item: Any) -> None:
+        evidence = item if isinstance(item, Evidence) else Evidence.from_dict(item)
+        for name, column in self.columns.items():
+            value = getattr(evidence, name)
+            column.append(value.value if isinstance(value, Enum) else value)
+        self.extra.append(evidence.extra)
+
+    def __len__(self) -> int:
+        return len(self.extra)
+
+    def __getitem__(self, index: int) -> Evidence:
+        return Evidence(**{name: column[index] for name, column in self.columns.items()}, extra=self.extra[index])
+
+    def __iter__(self) -> Iterator[Evidence]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [item.to_dict() for item in self]
+
+    def to_arrow(self) -> Any:
+        import pyarrow as pa
+
+        arrays = {}
+        for name, values in self.columns.items():
+            if name in CATEGORICAL_FIELDS:
+                arrays[name] = pa.array(values, type=pa.string()).dictionary_encode()
+            elif name == "keyword_hits":
+                arrays[name] = pa.array(values, type=pa.int64())
+            elif name == "relevance_score":
+                arrays[name] = pa.array([None if value is None else float(value) for value in values], type=pa.float64())
+            else:
+                arrays[name] = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+        return pa.table(arrays)
+
+    def to_dataframe(self) -> Any:
+        """
+        pandas view of ``to_arrow``: strings stay Arrow-backed, labels become categoricals
+        and numbers nullable ``Int64``/``Float64``, without a per-row dict pass.
+        """
+        import pandas as pd
+        import pyarrow as pa
+
+        mapping = {pa.string(): pd.StringDtype("pyarrow"), pa.int64(): pd.Int64Dtype(), pa.float64(): pd.Float64Dtype()}
+        return self.to_arrow().to_pandas(types_mapper=mapping.get)
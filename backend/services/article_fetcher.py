@@ -0,0 +1,301 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.cache import default_cache_path, register_default_store
+from services.http_client import HttpClient
+from services.telemetry import current_trace, record_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # pragma: no cover - optional dependency
+    BeautifulSoup = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MAX_ARTICLE_BYTES = 2 * 1024 * 1024
+MAX_TEXT_CHARS = 20_000
+ARTICLE_TIMEOUT_SECONDS = 8
+ARTICLE_TTL_SECONDS = 30 * 86400
+# Pages that failed or had no extractable text are retried after a day, not every run.
+FAILED_TTL_SECONDS = 86400
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml")
+# Paragraphs shorter than this are usually navigation, captions or cookie banners.
+MIN_PARAGRAPH_CHARS = 40
+BOILERPLATE_TAGS = ("script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg")
+USER_AGENT = "Mozilla/5.0 (compatible; market-opportunity-finder/1.0)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    body BLOB,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def fetch_workers() -> int:
+    try:
+        return max(1, int(os.getenv("OSINT_ARTICLE_WORKERS", "4")))
+    except ValueError:
+        return 4
+
+
+def _compress(text: str) -> Tuple[str, bytes]:
+    payload = text.encode("utf-8")
+    if zstandard is not None:
+        return "zst", zstandard.ZstdCompressor(level=10).compress(payload)
+    return "zlib", zlib.compress(payload, 9)
+
+
+def _decompress(codec: str, payload: bytes) -> str:
+    if codec == "zst":
+        if zstandard is None:
+            raise ValueError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    return zlib.decompress(payload).decode("utf-8")
+
+
+class ArticleCache:
+    """
+    Extracted article text in SQLite, keyed by URL hash and compressed (zstd when
+    installed, zlib otherwise). Pages with no usable text are stored empty so they
+    are not downloaded again until ``FAILED_TTL_SECONDS`` have passed.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.name = os.path.basename(db_path)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, url: str) -> Tuple[bool, Optional[str]]:
+        """``(found, text)``; ``text`` is None for a cached failure."""
+        started = time.perf_counter()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT codec, body, fetched_at FROM articles WHERE url_hash = ?", (url_hash(url),)
+            ).fetchone()
+        io_seconds = time.perf_counter() - started
+        if row is None:
+            record_cache(self.name, "misses", io_seconds)
+            return False, None
+        ttl = ARTICLE_TTL_SECONDS if row["body"] is not None else FAILED_TTL_SECONDS
+        if time.time() - row["fetched_at"] > ttl:
+            record_cache(self.name, "misses", io_seconds)
+            return False, None
+        record_cache(self.name, "hits", io_seconds)
+        if row["body"] is None:
+            return True, None
+        try:
+            return True, _decompress(row["codec"], row["body"])
+        except Exception as exc:
+            logger.error("Unreadable cached article for %s: %s", url, exc)
+            return False, None
+
+    def set(self, url: str, text: Optional[str]) -> None:
+        started = time.perf_counter()
+        codec, body = _compress(text) if text else ("none", None)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO articles (url_hash, url, codec, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url_hash(url), url, codec, body, time.time()),
+            )
+        record_cache(self.name, "writes", time.perf_counter() - started)
+
+
+class _TextCollector(HTMLParser):
+    """Fallback extraction without BeautifulSoup: paragraph text outside boilerplate tags."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.paragraphs: List[str] = []
+        self.text: List[str] = []
+        self._skip_depth = 0
+        self._paragraph: Optional[List[str]] = None
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in BOILERPLATE_TAGS:
+            self._skip_depth += 1
+        elif tag == "p" and not self._skip_depth:
+            self._paragraph = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in BOILERPLATE_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "p" and self._paragraph is not None:
+            self.paragraphs.append("".join(self._paragraph))
+            self._paragraph = None
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        self.text.append(data)
+        if self._paragraph is not None:
+            self._paragraph.append(data)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _main_text(paragraphs: Iterable[str], fallback: str) -> str:
+    kept = [_normalize(paragraph) for paragraph in paragraphs]
+    kept = [paragraph for paragraph in kept if len(paragraph) >= MIN_PARAGRAPH_CHARS]
+    text = "\n".join(kept) if kept else _normalize(fallback)
+    return text[:MAX_TEXT_CHARS]
+
+
+def extract_main_text(html: bytes | str) -> str:
+    """
+    Main article text: paragraphs inside ``<article>``/``<main>`` (else the whole
+    page) with scripts, navigation, headers and footers removed; short fragments are
+    dropped. Uses BeautifulSoup when installed, the stdlib HTML parser otherwise.
+    """
+    if BeautifulSoup is not None:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(list(BOILERPLATE_TAGS)):
+            tag.decompose()
+        container = soup.find("article") or soup.find("main") or soup.body or soup
+        paragraphs = [paragraph.get_text(" ") for paragraph in container.find_all("p")]
+        return _main_text(paragraphs, container.get_text(" "))
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    collector = _TextCollector()
+    collector.feed(html)
+    collector.close()
+    return _main_text(collector.paragraphs, " ".join(collector.text))
+
+
+class ArticleFetcher:
+    """
+    Downloads and extracts the pages behind evidence links, at most ``max_workers``
+    at a time. Downloads are streamed and cut off at ``max_bytes``; only HTML is read.
+    Extracted text is cached, so later runs do not download the page again.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ArticleCache] = None,
+        client: Optional[HttpClient] = None,
+        max_workers: Optional[int] = None,
+        max_bytes: int = MAX_ARTICLE_BYTES,
+    ):
+        self.cache = cache
+        self.client = client or HttpClient(timeout_seconds=ARTICLE_TIMEOUT_SECONDS)
+        self.max_workers = max_workers or fetch_workers()
+        self.max_bytes = max_bytes
+
+    def fetch_text(self, url: str) -> Optional[str]:
+        if not url or not url.startswith(("http://", "https://")):
+            return None
+        if self.cache is not None:
+            try:
+                found, text = self.cache.get(url)
+            except Exception as exc:
+                logger.error("Article cache unavailable for %s: %s", url, exc)
+                found, text = False, None
+            if found:
+                return text
+        try:
+            body, _content_type = self.client.get_bytes(
+                url,
+                self.max_bytes,
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+                content_types=HTML_CONTENT_TYPES,
+            )
+            text = extract_main_text(body) if body else ""
+        except Exception as exc:
+            logger.warning("Failed to fetch article %s: %s", url, exc)
+            text = ""
+        if self.cache is not None:
+            try:
+                self.cache.set(url, text or None)
+            except Exception as exc:
+                logger.error("Failed to cache article %s: %s", url, exc)
+        return text or None
+
+    def iter_enriched(self, items: Iterable[Dict[str, Any]], url_field: str = "url") -> Iterator[Dict[str, Any]]:
+        """
+        Yields a copy of each item with ``full_text`` set when its page had usable text,
+        in input order. Items are pulled from ``items`` only as workers free up, so a
+        stream is never read far ahead of what has been fetched.
+        """
+        trace = current_trace()
+        pending: Deque[Tuple[Dict[str, Any], Future]] = deque()
+
+        def fetch(url: str) -> Optional[str]:
+            # Worker threads do not inherit the caller's context; re-activate the run's trace.
+            if trace is None:
+                return self.fetch_text(url)
+            with trace.activate():
+                return self.fetch_text(url)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="article") as executor:
+            for item in items:
+                pending.append((item, executor.submit(fetch, item.get(url_field) or "")))
+                if len(pending) >= self.max_workers * 2:
+                    yield _with_text(*pending.popleft())
+            while pending:
+                yield _with_text(*pending.popleft())
+
+
+def _with_text(item: Dict[str, Any], future: Future) -> Dict[str, Any]:
+    text = future.result()
+    if not text:
+        return item
+    return {**item, "full_text": text}
+
+
+_default_cache: Optional[ArticleCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_article_fetcher() -> ArticleFetcher:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ArticleCache(default_cache_path("articles.sqlite3"))
+    return ArticleFetcher(cache=_default_cache)
+
+
+def _reset_default_cache() -> None:
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = None
+
+
+register_default_store(_reset_default_cache)
@@ -1,12 +1,39 @@
 import json
 import os
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+from services.telemetry import record_cache
+
+
+def default_cache_path(filename: str) -> str:
+    """Resolves a file under the cache directory (``OSINT_CACHE_DIR`` or ``backend/.cache``)."""
+    cache_dir = os.getenv("OSINT_CACHE_DIR") or os.path.join(os.path.dirname(__file__), "..", ".cache")
+    return os.path.normpath(os.path.join(cache_dir, filename))
+
+
+_store_resetters: List[Callable[[], None]] = []
+
+
+def register_default_store(reset: Callable[[], None]) -> None:
+    """Registers how a module drops the process-wide store its ``get_*()`` accessor opened."""
+    _store_resetters.append(reset)
+
+
+def reset_default_stores() -> None:
+    """
+    Closes and drops every process-wide store opened under the cache directory, so the
+    next ``get_*()`` call reopens it under the current ``OSINT_CACHE_DIR``. Used by the
+    tests and benchmarks when they switch cache directories.
+    """
+    for reset in list(_store_resetters):
+        reset()
 
 
 class SimpleFileCache:
     def __init__(self, cache_path: str, default_ttl_seconds: int = 86400):
         self.cache_path = cache_path
+        self.name = os.path.basename(cache_path)
         self.default_ttl_seconds = default_ttl_seconds
         os.makedirs(os.path.dirname(cache_path), exist_ok=True)
 
@@ -24,15 +51,21 @@ class SimpleFileCache:
             json.dump(data, handle, ensure_ascii=False, indent=2)
 
     def get(self, key: str) -> Optional[Any]:
+        started = time.perf_counter()
         data = self._load()
+        io_seconds = time.perf_counter() - started
         entry = data.get(key)
         if not entry:
+            record_cache(self.name, "misses", io_seconds)
             return None
         if time.time() - entry.get("timestamp", 0) > entry.get("ttl", self.default_ttl_seconds):
+            record_cache(self.name, "misses", io_seconds)
             return None
+        record_cache(self.name, "hits", io_seconds)
         return entry.get("value")
 
     def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        started = time.perf_counter()
         data = self._load()
         data[key] = {
             "timestamp": time.time(),
@@ -40,3 +73,4 @@ class SimpleFileCache:
             "value": value,
         }
         self._save(data)
+        record_cache(self.name, "writes", time.perf_counter() - started)
@@ -0,0 +1,512 @@
+"""
+Local legal-entity registry for company subjects, from bulk dumps (GLEIF LEI golden
+copy, OpenCorporates).
+
+Entities are compiled into SQLite with a compact blocking index: each normalized
+name contributes its tokens and 4-character token prefixes as block keys, with
+block sizes kept alongside. A lookup reads only the smallest blocks of the query's
+keys, then ranks those candidates by trigram similarity of their names, so it
+stays in the millisecond range on millions of entities.
+
+    cd backend
+    python -m services.company_registry gleif 20250101-gleif-concatenated-file-lei2.csv
+    python -m services.company_registry gleif-relations 20250101-gleif-concatenated-file-rr.csv
+    python -m services.company_registry opencorporates companies.csv
+"""
+
+import argparse
+import csv
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import pycountry
+
+from services.cache import default_cache_path, register_default_store
+from services.sanctions_index import country_code, name_trigrams, normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Dice similarity over name trigrams needed for a match.
+DEFAULT_THRESHOLD = 0.7
+# Candidates read per lookup, from the smallest blocks first.
+MAX_CANDIDATES = 2000
+# Blocks this large (e.g. "international") are only read when the query has nothing rarer.
+MAX_BLOCK_SIZE = 50000
+PREFIX_LENGTH = 4
+# Matches in the expected country, or still active, win ties.
+COUNTRY_BONUS = 0.05
+ACTIVE_BONUS = 0.01
+MAX_RELATED = 20
+INSERT_BATCH = 5000
+# Legal forms beyond the sanctions list's, which would otherwise dominate company names.
+COMPANY_LEGAL_FORMS = {
+    "aktiengesellschaft", "gesellschaft", "mbh", "kg", "kgaa", "se", "as", "asa", "ab", "oy", "oyj", "spa",
+    "sarl", "sas", "sl", "lp", "llp", "pte", "pty", "bhd", "sdn", "kk", "anonim", "sirketi", "ltda", "de", "cv",
+    "incorporated", "holdings", "group",
+}
+GLEIF_RELATION_KINDS = {
+    "IS_DIRECTLY_CONSOLIDATED_BY": "direct_parent",
+    "IS_ULTIMATELY_CONSOLIDATED_BY": "ultimate_parent",
+    "IS_INTERNATIONAL_BRANCH_OF": "branch_of",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS company_sources (
+    source TEXT PRIMARY KEY,
+    entities INTEGER NOT NULL,
+    relations INTEGER NOT NULL,
+    loaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS companies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    country TEXT,
+    jurisdiction TEXT,
+    city TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_companies_entity ON companies (entity_id);
+CREATE INDEX IF NOT EXISTS idx_companies_source ON companies (source);
+CREATE TABLE IF NOT EXISTS company_names (
+    company_id INTEGER NOT NULL,
+    normalized TEXT NOT NULL,
+    PRIMARY KEY (company_id, normalized)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS company_blocks (
+    key TEXT NOT NULL,
+    company_id INTEGER NOT NULL,
+    PRIMARY KEY (key, company_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS company_block_sizes (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS company_relations (
+    child TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_company_relations_child ON company_relations (child);
+CREATE INDEX IF NOT EXISTS idx_company_relations_parent ON company_relations (parent);
+CREATE INDEX IF NOT EXISTS idx_company_relations_source ON company_relations (source);
+"""
+
+
+@dataclass
+class CompanyRecord:
+    entity_id: str
+    name: str
+    country: str = ""
+    jurisdiction: str = ""
+    city: str = ""
+    status: str = ""
+    aliases: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CompanyRelation:
+    child: str
+    parent: str
+    kind: str
+
+
+@dataclass
+class CompanyMatch:
+    entity_id: str
+    name: str
+    matched_name: str
+    country: str
+    jurisdiction: str
+    city: str
+    status: str
+    source: str
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        country = pycountry.countries.get(alpha_2=self.country) if len(self.country) == 2 else None
+        return {
+            "entity_id": self.entity_id,
+            "name": self.name,
+            "matched_name": self.matched_name,
+            "country_code": self.country,
+            "country_name": country.name if country else self.country,
+            "jurisdiction": self.jurisdiction,
+            "city": self.city,
+            "status": self.status,
+            "source": self.source,
+            "score": self.score,
+        }
+
+
+def normalize_company_name(name: str) -> str:
+    """``normalize_name`` without company legal forms and single letters (``A.S.``, ``S.p.A.``)."""
+    return " ".join(
+        token for token in normalize_name(name).split() if len(token) > 1 and token not in COMPANY_LEGAL_FORMS
+    )
+
+
+def block_keys(normalized: str) -> List[str]:
+    """Tokens and token prefixes (``~abcd``), so a typo late in a word still shares a block."""
+    keys = []
+    for token in normalized.split():
+        keys.append(token)
+        if len(token) > PREFIX_LENGTH:
+            keys.append("~" + token[:PREFIX_LENGTH])
+    return list(dict.fromkeys(keys))
+
+
+def _dice(left: set, right: set) -> float:
+    if not left or not right:
+        return 0.0
+    return 2 * len(left & right) / (len(left) + len(right))
+
+
+def _full_name(name: str) -> str:
+    return " ".join(re.findall(r"\w+", name.lower()))
+
+
+def _column(row: Dict[str, str], *names: str) -> str:
+    for name in names:
+        value = (row.get(name) or "").strip()
+        if value:
+            return value
+    return ""
+
+
+def read_gleif(path: str) -> Iterator[CompanyRecord]:
+    """GLEIF LEI-CDF golden copy CSV (level 1: who is who)."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        reader = csv.DictReader(handle)
+        alias_columns = [
+            name
+            for name in reader.fieldnames or []
+            if re.fullmatch(r"Entity\.(Transliterated)?OtherEntityNames\.(Transliterated)?OtherEntityName\.\d+", name)
+        ]
+        for row in reader:
+            lei = _column(row, "LEI")
+            name = _column(row, "Entity.LegalName")
+            if not lei or not name:
+                continue
+            yield CompanyRecord(
+                entity_id=lei,
+                name=name,
+                country=_column(row, "Entity.LegalAddress.Country", "Entity.HeadquartersAddress.Country").upper(),
+                jurisdiction=_column(row, "Entity.LegalJurisdiction"),
+                city=_column(row, "Entity.LegalAddress.City", "Entity.HeadquartersAddress.City"),
+                status=_column(row, "Entity.EntityStatus", "Registration.RegistrationStatus").upper(),
+                aliases=[row[column].strip() for column in alias_columns if (row.get(column) or "").strip()],
+            )
+
+
+def read_gleif_relations(path: str) -> Iterator[CompanyRelation]:
+    """GLEIF relationship record CSV (level 2: who owns whom); active relationships only."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        for row in csv.DictReader(handle):
+            status = _column(row, "Relationship.RelationshipStatus").upper()
+            if status and status != "ACTIVE":
+                continue
+            child = _column(row, "Relationship.StartNode.NodeID")
+            parent = _column(row, "Relationship.EndNode.NodeID")
+            kind = _column(row, "Relationship.RelationshipType").upper()
+            if child and parent and kind:
+                yield CompanyRelation(child=child, parent=parent, kind=GLEIF_RELATION_KINDS.get(kind, kind.lower()))
+
+
+def read_opencorporates(path: str) -> Iterator[CompanyRecord]:
+    """OpenCorporates bulk ``companies.csv``; entity ids are ``<jurisdiction>/<company number>``."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        for row in csv.DictReader(handle):
+            number = _column(row, "company_number")
+            jurisdiction = _column(row, "jurisdiction_code").lower()
+            name = _column(row, "name")
+            if not number or not jurisdiction or not name:
+                continue
+            prefix = jurisdiction.split("_", 1)[0].upper()
+            country = prefix if pycountry.countries.get(alpha_2=prefix) else ""
+            if not country:
+                address_country = _column(row, "registered_address.country")
+                resolved = country_code(address_country) if address_country else ""
+                country = resolved if len(resolved) == 2 and resolved.isupper() else ""
+            yield CompanyRecord(
+                entity_id=f"{jurisdiction}/{number}",
+                name=name,
+                country=country,
+                jurisdiction=jurisdiction,
+                city=_column(row, "registered_address.locality"),
+                status=_column(row, "current_status").upper(),
+                aliases=[value for value in [_column(row, "previous_names")] if value],
+            )
+
+
+def _batches(items: Iterable[Any], size: int = INSERT_BATCH) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class CompanyRegistry:
+    """
+    Legal entities and their ownership links, ingested per source.
+
+    ``ingest`` replaces everything an earlier ingest of the same source loaded.
+    ``resolve`` finds entities by name through the blocking index; ``related``
+    returns parents and subsidiaries.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ingest(
+        self,
+        source: str,
+        records: Iterable[CompanyRecord] = (),
+        relations: Iterable[CompanyRelation] = (),
+    ) -> Dict[str, int]:
+        counts = {"entities": 0, "relations": 0}
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete_source(conn, source)
+            for batch in _batches(records):
+                self._insert_entities(conn, source, batch)
+                counts["entities"] += len(batch)
+            for batch in _batches(relations):
+                conn.executemany(
+                    "INSERT INTO company_relations (child, parent, kind, source) VALUES (?, ?, ?, ?)",
+                    [(relation.child, relation.parent, relation.kind, source) for relation in batch],
+                )
+                counts["relations"] += len(batch)
+            conn.execute("DELETE FROM company_block_sizes")
+            conn.execute(
+                "INSERT INTO company_block_sizes (key, size) SELECT key, COUNT(*) FROM company_blocks GROUP BY key"
+            )
+            conn.execute(
+                "INSERT INTO company_sources (source, entities, relations, loaded_at) VALUES (?, ?, ?, ?)",
+                (source, counts["entities"], counts["relations"], time.time()),
+            )
+        logger.info("Loaded %s entities and %s relations from %s", counts["entities"], counts["relations"], source)
+        return counts
+
+    def _insert_entities(self, conn: sqlite3.Connection, source: str, records: List[CompanyRecord]) -> None:
+        names = []
+        blocks = []
+        for record in records:
+            company_id = conn.execute(
+                "INSERT INTO companies (entity_id, source, name, country, jurisdiction, city, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record.entity_id, source, record.name, record.country, record.jurisdiction, record.city, record.status),
+            ).lastrowid
+            normalized_names = {normalize_company_name(name) for name in [record.name] + record.aliases} - {""}
+            names.extend((company_id, normalized) for normalized in normalized_names)
+            keys = {key for normalized in normalized_names for key in block_keys(normalized)}
+            blocks.extend((key, company_id) for key in keys)
+        conn.executemany("INSERT OR IGNORE INTO company_names (company_id, normalized) VALUES (?, ?)", names)
+        conn.executemany("INSERT OR IGNORE INTO company_blocks (key, company_id) VALUES (?, ?)", blocks)
+
+    def _delete_source(self, conn: sqlite3.Connection, source: str) -> None:
+        ids = "SELECT id FROM companies WHERE source = ?"
+        conn.execute(f"DELETE FROM company_blocks WHERE company_id IN ({ids})", (source,))
+        conn.execute(f"DELETE FROM company_names WHERE company_id IN ({ids})", (source,))
+        for table in ("companies", "company_relations", "company_sources"):
+            conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+
+    def sources(self) -> Dict[str, Dict[str, Any]]:
+        with self._connect() as conn:
+            return {
+                row["source"]: {"entities": row["entities"], "relations": row["relations"], "loaded_at": row["loaded_at"]}
+                for row in conn.execute("SELECT * FROM company_sources")
+            }
+
+    def available(self) -> bool:
+        return bool(self.sources())
+
+    def resolve(
+        self, name: str, country: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD, limit: int = 5
+    ) -> List[CompanyMatch]:
+        """Entities whose name or alias matches ``name``, best first; ``country`` breaks ties."""
+        normalized = normalize_company_name(name)
+        keys = block_keys(normalized)
+        if not keys:
+            return []
+        query_grams = name_trigrams(normalized)
+        full_grams = name_trigrams(_full_name(name))
+        country = (country or "").upper()
+        with self._connect() as conn:
+            candidates = self._candidates(conn, keys)
+            if not candidates:
+                return []
+            scored: Dict[int, Tuple[float, str]] = {}
+            for chunk in _batches(candidates, 900):
+                placeholders = ", ".join("?" for _ in chunk)
+                for row in conn.execute(
+                    f"SELECT company_id, normalized FROM company_names WHERE company_id IN ({placeholders})", chunk
+                ):
+                    score = _dice(query_grams, name_trigrams(row["normalized"]))
+                    if score >= threshold and score > scored.get(row["company_id"], (0.0, ""))[0]:
+                        scored[row["company_id"]] = (score, row["normalized"])
+            if not scored:
+                return []
+            placeholders = ", ".join("?" for _ in scored)
+            rows = conn.execute(f"SELECT * FROM companies WHERE id IN ({placeholders})", list(scored)).fetchall()
+        ranked = []
+        for row in rows:
+            score, matched = scored[row["id"]]
+            if country and row["country"] == country:
+                score += COUNTRY_BONUS
+            if row["status"] in ("ACTIVE", ""):
+                score += ACTIVE_BONUS
+            match = CompanyMatch(
+                entity_id=row["entity_id"],
+                name=row["name"],
+                matched_name=matched,
+                country=row["country"] or "",
+                jurisdiction=row["jurisdiction"] or "",
+                city=row["city"] or "",
+                status=row["status"] or "",
+                source=row["source"],
+                score=round(min(score, 1.0), 3),
+            )
+            # Legal forms are left out of matching; between equal matches the full name decides.
+            ranked.append((score, _dice(full_grams, name_trigrams(_full_name(row["name"]))), match))
+        # Rank on the uncapped score, so the bonuses still separate exact matches.
+        ranked.sort(key=lambda item: (-item[0], -item[1], item[2].name))
+        return [match for _, _, match in ranked[:limit]]
+
+    @staticmethod
+    def _candidates(conn: sqlite3.Connection, keys: Sequence[str]) -> List[int]:
+        placeholders = ", ".join("?" for _ in keys)
+        sizes = sorted(
+            (row["size"], row["key"])
+            for row in conn.execute(f"SELECT key, size FROM company_block_sizes WHERE key IN ({placeholders})", keys)
+        )
+        chosen = []
+        total = 0
+        for size, key in sizes:
+            if chosen and (total + size > MAX_CANDIDATES or size > MAX_BLOCK_SIZE):
+                break
+            chosen.append(key)
+            total += size
+        if not chosen:
+            return []
+        placeholders = ", ".join("?" for _ in chosen)
+        return [
+            row["company_id"]
+            for row in conn.execute(
+                f"SELECT DISTINCT company_id FROM company_blocks WHERE key IN ({placeholders}) LIMIT ?",
+                [*chosen, MAX_CANDIDATES],
+            )
+        ]
+
+    def related(self, entity_id: str, limit: int = MAX_RELATED) -> Dict[str, List[Dict[str, Any]]]:
+        """Parents (direct, ultimate, head office of a branch) and subsidiaries, with names where known."""
+        with self._connect() as conn:
+            parents = conn.execute(
+                "SELECT r.parent AS entity_id, r.kind, c.name, c.country FROM company_relations r "
+                "LEFT JOIN companies c ON c.entity_id = r.parent WHERE r.child = ? GROUP BY r.parent, r.kind",
+                (entity_id,),
+            ).fetchall()
+            children = conn.execute(
+                "SELECT r.child AS entity_id, r.kind, c.name, c.country FROM company_relations r "
+                "LEFT JOIN companies c ON c.entity_id = r.child WHERE r.parent = ? GROUP BY r.child, r.kind LIMIT ?",
+                (entity_id, limit),
+            ).fetchall()
+        return {
+            "parents": [dict(row) for row in parents],
+            "subsidiaries": [dict(row) for row in children],
+        }
+
+
+def resolve_company(registry: Optional[CompanyRegistry], name: str, country: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Company summary for a run: the best match, other candidates and related entities.
+    ``{"available": False}`` without a registry; ``entity`` is None when nothing matches.
+    """
+    if registry is None or not registry.available():
+        return {"available": False}
+    matches = registry.resolve(name, country=country)
+    if not matches:
+        return {"available": True, "entity": None, "candidates": [], "related": {"parents": [], "subsidiaries": []}}
+    best = matches[0]
+    return {
+        "available": True,
+        "entity": best.to_dict(),
+        "candidates": [match.to_dict() for match in matches[1:]],
+        "related": registry.related(best.entity_id),
+    }
+
+
+def related_names(company: Dict[str, Any]) -> List[str]:
+    """The legal name plus parents' names, for screening and news queries."""
+    entity = company.get("entity") or {}
+    names = [entity.get("name")] + [row.get("name") for row in (company.get("related") or {}).get("parents", [])]
+    return [name for name in dict.fromkeys(names) if name]
+
+
+_default_registry: Optional[CompanyRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_company_registry() -> CompanyRegistry:
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = CompanyRegistry(default_cache_path("company_registry.sqlite3"))
+        return _default_registry
+
+
+def _reset_default_registry() -> None:
+    global _default_registry
+    with _default_registry_lock:
+        _default_registry = None
+
+
+register_default_store(_reset_default_registry)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest legal-entity dumps into the local company registry.")
+    parser.add_argument("format", choices=("gleif", "gleif-relations", "opencorporates"))
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    registry = get_company_registry()
+    for path in args.paths:
+        source = f"{args.format}:{os.path.splitext(os.path.basename(path))[0]}"
+        if args.format == "gleif-relations":
+            counts = registry.ingest(source, relations=read_gleif_relations(path))
+        else:
+            reader = read_gleif if args.format == "gleif" else read_opencorporates
+            counts = registry.ingest(source, records=reader(path))
+        print(f"{path}: {counts['entities']} entities, {counts['relations']} relations")
+
+
+if __name__ == "__main__":
+    main()
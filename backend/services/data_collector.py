@@ -1,19 +1,28 @@
 import logging
 import os
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
-from services.cache import SimpleFileCache
+from services.cache import SimpleFileCache, default_cache_path
 from services.http_client import HttpClient
+from services.query_planner import canonical_query_key
+from services.telemetry import span
+from services.usage_ledger import get_usage_ledger
+
+# News results kept per analysis.
+MAX_NEWS_RESULTS = 15
 
 
 class DataCollector:
     def __init__(self):
         self.wb_base_url = "https://api.worldbank.org/v2"
         self.http = HttpClient(timeout_seconds=10)
-        cache_path = os.path.join(os.path.dirname(__file__), "..", ".cache", "osint_cache.json")
-        self.cache = SimpleFileCache(os.path.normpath(cache_path), default_ttl_seconds=86400)
+        self.cache = SimpleFileCache(default_cache_path("osint_cache.json"), default_ttl_seconds=86400)
+        # Per-query {"results", "novel", "cached"} from the last get_regional_news call.
+        self.last_query_yields = {}
+        # Queries skipped by the last get_regional_news call because the Brave quota was used up.
+        self.blocked_queries = []
 
     def get_country_data(self, country_code: str):
         """
@@ -28,12 +37,13 @@ class DataCollector:
         # Fetch basic country info for lat/lng
         try:
             info_url = f"{self.wb_base_url}/country/{country_code}?format=json"
-            cached = self.cache.get(f"wb:country:{country_code}")
-            if cached:
-                info_res = cached
-            else:
-                info_res = self.http.get_json(info_url)
-                self.cache.set(f"wb:country:{country_code}", info_res, ttl_seconds=86400)
+            with span("worldbank.country", country=country_code):
+                cached = self.cache.get(f"wb:country:{country_code}")
+                if cached:
+                    info_res = cached
+                else:
+                    info_res = self.http.get_json(info_url)
+                    self.cache.set(f"wb:country:{country_code}", info_res, ttl_seconds=86400)
             if len(info_res) > 1 and info_res[1]:
                 country_info = info_res[1][0]
                 data["lat"] = float(country_info.get("latitude", 0))
@@ -82,22 +92,44 @@ class DataCollector:
     def get_indicator_series(self, country_code: str, indicator: str):
         url = f"{self.wb_base_url}/country/{country_code}/indicator/{indicator}?format=json&per_page=1"
         cache_key = f"wb:indicator:{country_code}:{indicator}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return cached
-        result = self.http.get_json(url)
-        self.cache.set(cache_key, result, ttl_seconds=86400)
-        return result
+        with span("worldbank.indicator", country=country_code, indicator=indicator) as record:
+            cached = self.cache.get(cache_key)
+            if cached:
+                if record is not None:
+                    record["attributes"]["cache"] = "hit"
+                return cached
+            result = self.http.get_json(url)
+            self.cache.set(cache_key, result, ttl_seconds=86400)
+            return result
+
+    def get_indicator_all_countries(self, indicator: str):
+        """
+        Most recent non-empty value of an indicator for every country and aggregate.
+        Not cached here: the bulk payload would bloat the shared response cache, and
+        ``IndicatorDistributions`` already persists the values it keeps.
+        """
+        url = f"{self.wb_base_url}/country/all/indicator/{indicator}?format=json&per_page=20000&mrnev=1"
+        with span("worldbank.indicator", country="all", indicator=indicator):
+            return self.http.get_json(url)
 
     def get_regional_news(self, country_name: str, queries: Optional[List[str]] = None):
         """
         Fetches comprehensive news about tire recycling products demand, trade, and Iran relations
         in the specified country using Brave Search API.
         """
+        return list(self.iter_regional_news(country_name, queries))
+
+    def iter_regional_news(
+        self, country_name: str, queries: Optional[List[str]] = None, limit: int = MAX_NEWS_RESULTS
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields news results query by query as each Brave response arrives, de-duplicated by
+        URL. Stops after ``limit`` results, so the remaining queries are not spent.
+        """
         api_key = os.getenv("BRAVE_API_KEY")
         if not api_key:
             logger.warning("BRAVE_API_KEY not found. Skipping news search.")
-            return []
+            return
 
         # Multiple search queries for comprehensive coverage of EXPORT potential
         if not queries:
@@ -115,32 +147,50 @@ class DataCollector:
             "Accept": "application/json"
         }
         
-        all_results = []
+        emitted = 0
         seen_urls = set()  # Avoid duplicates
+        self.last_query_yields = {}
+        self.blocked_queries = []
+        ledger = get_usage_ledger()
         
         for query in queries:
+            if emitted >= limit:
+                break
             params = {
                 "q": query,
                 "count": 5,
                 "freshness": "py"  # Past year
             }
 
+            fresh = []
             try:
-                cache_key = f"brave:{query}"
-                cached = self.cache.get(cache_key)
-                if cached:
-                    data = cached
-                else:
-                    data = self.http.get_json(url, headers=headers, params=params)
-                    self.cache.set(cache_key, data, ttl_seconds=3600)
+                cache_key = self._brave_cache_key(query)
+                with span("brave.query", query=query) as record:
+                    cached = self.cache.get(cache_key)
+                    if cached:
+                        data = cached
+                        ledger.record_cache_hit("brave", api_key)
+                        if record is not None:
+                            record["attributes"]["cache"] = "hit"
+                    else:
+                        if not ledger.acquire("brave", api_key).allowed:
+                            self.blocked_queries.append(query)
+                            if record is not None:
+                                record["attributes"]["quota"] = "blocked"
+                            continue
+                        data = self.http.get_json(url, headers=headers, params=params)
+                        self.cache.set(cache_key, data, ttl_seconds=3600)
                 
+                yields = self.last_query_yields[query] = {"results": 0, "novel": 0, "cached": bool(cached)}
                 if "web" in data and "results" in data["web"]:
                     for item in data["web"]["results"]:
                         url_link = item.get("url")
+                        yields["results"] += 1
                         # Avoid duplicates
                         if url_link not in seen_urls:
                             seen_urls.add(url_link)
-                            all_results.append({
+                            yields["novel"] += 1
+                            fresh.append({
                                 "title": item.get("title"),
                                 "url": url_link,
                                 "description": item.get("description"),
@@ -149,6 +199,16 @@ class DataCollector:
             except Exception as e:
                 logger.error(f"Error fetching news for query '{query}': {e}")
                 continue
-        
-        # Return top 15 most relevant results
-        return all_results[:15]
+
+            for result in fresh[: limit - emitted]:
+                emitted += 1
+                yield result
+
+    @staticmethod
+    def _brave_cache_key(query: str) -> str:
+        # Keyed on the canonical form, so equivalent queries from any subject (reordered,
+        # re-cased, pluralised) reuse one cached response.
+        return f"brave:{canonical_query_key(query)}"
+
+    def is_query_cached(self, query: str) -> bool:
+        return self.cache.get(self._brave_cache_key(query)) is not None
@@ -1,108 +1,123 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlparse
 
+from models.evidence import Evidence, EvidenceLike, EvidenceQuality, EvidenceSource
 
-def build_evidence_from_news(news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+
+def build_evidence_from_news(news_items: List[Dict[str, Any]]) -> List[Evidence]:
     evidence = []
     for item in news_items:
         url = item.get("url")
         domain = _extract_domain(url)
         quality = _classify_quality(domain, "news")
         evidence.append(
-            {
-                "title": item.get("title"),
-                "url": url,
-                "summary": item.get("description"),
-                "age": item.get("age"),
-                "source": "Brave Search",
-                "signal_type": "news",
-                "domain": domain,
-                "quality": quality,
-                "severity": item.get("severity"),
-                "keyword_hits": item.get("keyword_hits"),
-                "relevance_score": item.get("relevance_score"),
-            }
+            Evidence(
+                title=item.get("title"),
+                url=url,
+                summary=item.get("description"),
+                age=item.get("age"),
+                source=EvidenceSource.BRAVE_SEARCH,
+                signal_type="news",
+                domain=domain,
+                quality=quality,
+                severity=item.get("severity"),
+                keyword_hits=item.get("keyword_hits"),
+                relevance_score=item.get("relevance_score"),
+                extra={"full_text": item["full_text"]} if item.get("full_text") else None,
+            )
         )
     return evidence
 
 
-def build_evidence_from_trade_signals(trade_signals: Dict[str, Any]) -> List[Dict[str, Any]]:
+def build_evidence_from_trade_signals(trade_signals: Dict[str, Any]) -> List[Evidence]:
     evidence = []
     for code, payload in trade_signals.items():
         evidence.append(
-            {
-                "title": payload.get("label"),
-                "url": "",
-                "summary": payload.get("value"),
-                "age": "latest",
-                "source": "World Bank",
-                "signal_type": f"trade:{code}",
-                "domain": "api.worldbank.org",
-                "quality": "official",
-            }
+            Evidence(
+                title=payload.get("label"),
+                url="",
+                summary=payload.get("value"),
+                age="latest",
+                source=EvidenceSource.WORLD_BANK,
+                signal_type=f"trade:{code}",
+                domain="api.worldbank.org",
+                quality=EvidenceQuality.OFFICIAL,
+            )
         )
     return evidence
 
 
-def build_evidence_from_policy_signals(policy_signals: Dict[str, Any]) -> List[Dict[str, Any]]:
+def build_evidence_from_policy_signals(policy_signals: Dict[str, Any]) -> List[Evidence]:
     evidence = []
     for code, payload in policy_signals.items():
         evidence.append(
-            {
-                "title": payload.get("label"),
-                "url": "",
-                "summary": payload.get("value"),
-                "age": "latest",
-                "source": "World Bank",
-                "signal_type": f"policy:{code}",
-                "domain": "api.worldbank.org",
-                "quality": "official",
-            }
+            Evidence(
+                title=payload.get("label"),
+                url="",
+                summary=payload.get("value"),
+                age="latest",
+                source=EvidenceSource.WORLD_BANK,
+                signal_type=f"policy:{code}",
+                domain="api.worldbank.org",
+                quality=EvidenceQuality.OFFICIAL,
+            )
         )
     return evidence
 
 
-def build_evidence_from_tenders(tenders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def build_evidence_from_tenders(tenders: List[Dict[str, Any]]) -> List[Evidence]:
     evidence = []
     for item in tenders:
         url = item.get("url")
         domain = _extract_domain(url)
         evidence.append(
-            {
-                "title": item.get("title"),
-                "url": url,
-                "summary": item.get("summary"),
-                "age": item.get("date"),
-                "source": "Tender Feed",
-                "signal_type": "tender",
-                "domain": domain,
-                "quality": _classify_quality(domain, "tender"),
-                "severity": item.get("severity"),
-                "keyword_hits": item.get("keyword_hits"),
-                "relevance_score": item.get("relevance_score"),
-            }
+            Evidence(
+                title=item.get("title"),
+                url=url,
+                summary=item.get("summary"),
+                age=item.get("date"),
+                source=EvidenceSource.TENDER_FEED,
+                signal_type="tender",
+                domain=domain,
+                quality=_classify_quality(domain, "tender"),
+                severity=item.get("severity"),
+                keyword_hits=item.get("keyword_hits"),
+                relevance_score=item.get("relevance_score"),
+            )
         )
     return evidence
 
 
-def dedupe_evidence(evidence: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    seen = set()
-    deduped = []
+def dedupe_evidence(evidence: List[EvidenceLike]) -> List[EvidenceLike]:
+    return list(iter_dedupe_evidence(evidence))
+
+
+def iter_dedupe_evidence(
+    evidence: Iterable[EvidenceLike], seen: Optional[Set[Tuple[str, str, str]]] = None
+) -> Iterator[EvidenceLike]:
+    """
+    Yields each item the first time its (domain, title, summary) key is seen. Pass the
+    same ``seen`` set across calls to dedupe several streams against each other.
+    """
+    seen = set() if seen is None else seen
     for item in evidence:
-        url = item.get("url") or ""
-        title = (item.get("title") or "").strip().lower()
-        summary_value = item.get("summary") or ""
-        summary = str(summary_value).strip().lower()
-        domain = ""
-        if url:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-        key = (domain, title, summary[:120])
+        key = _dedupe_key(item)
         if key in seen:
             continue
         seen.add(key)
-        deduped.append(item)
-    return deduped
+        yield item
+
+
+def _dedupe_key(item: EvidenceLike) -> Tuple[str, str, str]:
+    url = item.get("url") or ""
+    title = (item.get("title") or "").strip().lower()
+    summary_value = item.get("summary") or ""
+    summary = str(summary_value).strip().lower()
+    domain = ""
+    if url:
+        parsed = urlparse(url)
+        domain = parsed.netloc.lower()
+    return (domain, title, summary[:120])
 
 
 def _extract_domain(url: str | None) -> str:
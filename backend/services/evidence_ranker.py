@@ -0,0 +1,253 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.evidence import Evidence, EvidenceLike
+from models.subject import Subject
+from services.cache import default_cache_path, register_default_store
+from services.hs_utils import tokenize
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Maps raw BM25 onto 0-100 as 100 * (1 - exp(-score / scale)): a single strong term
+# match lands around 50, several land in the 80s and 90s. Independent of the batch.
+RELEVANCE_SCALE = 4.0
+# Query term weights by subject field.
+FIELD_WEIGHTS = {"products": 1.0, "signals_of_interest": 1.0, "hs_codes": 1.0, "risk_focus": 0.8}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corpus_docs (
+    doc_key TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS corpus_terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS corpus_meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class CorpusSnapshot:
+    """Collection statistics for the terms of one query."""
+
+    doc_count: int
+    avg_length: float
+    document_frequency: Dict[str, int]
+
+
+def evidence_text(item: EvidenceLike) -> str:
+    return f"{item.get('title') or ''} {item.get('summary') or ''} {item.get('full_text') or ''}"
+
+
+def evidence_key(item: EvidenceLike) -> str:
+    """Identity of an evidence item in the corpus, so re-collected items are only counted once."""
+    payload = "\x1f".join(
+        (str(item.get("url") or ""), str(item.get("title") or "").strip().lower(), str(item.get("summary") or "")[:200])
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CorpusStats:
+    """
+    Document frequencies over every evidence item seen so far, in SQLite.
+
+    ``add`` updates the counts incrementally for items not seen before; ``snapshot``
+    reads only the query's terms, so scoring cost does not grow with the corpus.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, documents: Sequence[Tuple[str, Sequence[str]]]) -> int:
+        """Adds ``(doc_key, tokens)`` pairs; returns how many were new."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            new_docs = []
+            for doc_key, tokens in documents:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO corpus_docs (doc_key, length) VALUES (?, ?)", (doc_key, len(tokens))
+                ).rowcount
+                if inserted:
+                    new_docs.append(tokens)
+            if not new_docs:
+                return 0
+            frequencies: Dict[str, int] = {}
+            for tokens in new_docs:
+                for term in set(tokens):
+                    frequencies[term] = frequencies.get(term, 0) + 1
+            conn.executemany(
+                "INSERT INTO corpus_terms (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                list(frequencies.items()),
+            )
+            conn.executemany(
+                "INSERT INTO corpus_meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                [("doc_count", len(new_docs)), ("total_length", sum(len(tokens) for tokens in new_docs))],
+            )
+        return len(new_docs)
+
+    def snapshot(self, terms: Sequence[str]) -> CorpusSnapshot:
+        with self._connect() as conn:
+            meta = {row["key"]: row["value"] for row in conn.execute("SELECT key, value FROM corpus_meta")}
+            frequencies: Dict[str, int] = {}
+            terms = list(terms)
+            for start in range(0, len(terms), 500):
+                chunk = terms[start : start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for row in conn.execute(f"SELECT term, df FROM corpus_terms WHERE term IN ({placeholders})", chunk):
+                    frequencies[row["term"]] = row["df"]
+        doc_count = int(meta.get("doc_count", 0))
+        avg_length = meta.get("total_length", 0.0) / doc_count if doc_count else 0.0
+        return CorpusSnapshot(doc_count=doc_count, avg_length=avg_length, document_frequency=frequencies)
+
+
+def subject_query_terms(subject: Subject) -> Dict[str, float]:
+    """Weighted query terms from the subject's products, signals, HS codes and risks."""
+    weights: Dict[str, float] = {}
+    for field_name, weight in FIELD_WEIGHTS.items():
+        for value in getattr(subject, field_name) or []:
+            for term in tokenize(value):
+                weights[term] = max(weights.get(term, 0.0), weight)
+    # The target itself appears in most results and would only add noise.
+    for term in tokenize(subject.target_name):
+        weights.pop(term, None)
+    return weights
+
+
+def _local_snapshot(documents: Sequence[Sequence[str]], terms: Sequence[str]) -> CorpusSnapshot:
+    frequencies = {term: 0 for term in terms}
+    for tokens in documents:
+        for term in set(tokens) & frequencies.keys():
+            frequencies[term] += 1
+    doc_count = len(documents)
+    avg_length = sum(len(tokens) for tokens in documents) / doc_count if doc_count else 0.0
+    return CorpusSnapshot(doc_count=doc_count, avg_length=avg_length, document_frequency=frequencies)
+
+
+def bm25_scores(
+    documents: Sequence[Sequence[str]], query: Dict[str, float], snapshot: CorpusSnapshot
+) -> np.ndarray:
+    """BM25 score of each tokenized document for the weighted query, computed as one matrix pass."""
+    if not documents or not query:
+        return np.zeros(len(documents))
+    terms = list(query)
+    term_index = {term: column for column, term in enumerate(terms)}
+    rows, columns = [], []
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            column = term_index.get(token)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    counts = np.zeros((len(documents), len(terms)))
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), 1.0)
+
+    doc_count = max(snapshot.doc_count, len(documents))
+    df = np.array([snapshot.document_frequency.get(term, 0) for term in terms], dtype=float)
+    idf = np.log1p((doc_count - df + 0.5) / (df + 0.5))
+    weights = np.array([query[term] for term in terms])
+    lengths = np.array([len(tokens) for tokens in documents], dtype=float)
+    avg_length = snapshot.avg_length or (lengths.mean() if lengths.any() else 1.0)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    saturated = counts * (BM25_K1 + 1) / (counts + norm[:, None])
+    return saturated @ (idf * weights)
+
+
+def rank_evidence(
+    evidence: List[EvidenceLike],
+    subject: Subject,
+    stats: Optional[CorpusStats] = None,
+    top_k: Optional[int] = None,
+    documents: Optional[Sequence[Sequence[str]]] = None,
+) -> List[EvidenceLike]:
+    """
+    Sets ``relevance_score`` (0-100) on every evidence item from BM25 against the
+    subject. With ``stats``, the items are first added to the persistent corpus and
+    IDF comes from all evidence seen so far; otherwise from this batch alone.
+    ``documents`` are the items' tokens when already computed (e.g. before their
+    full text was dropped).
+
+    ``Evidence`` items are updated in place; dicts are copied. Returns the items in
+    their original order, or the ``top_k`` best, best first.
+    """
+    if documents is None:
+        documents = [tokenize(evidence_text(item)) for item in evidence]
+    query = subject_query_terms(subject)
+    snapshot = None
+    if stats is not None:
+        try:
+            stats.add([(evidence_key(item), tokens) for item, tokens in zip(evidence, documents)])
+            snapshot = stats.snapshot(list(query))
+        except Exception as exc:
+            logger.error("Evidence corpus statistics unavailable, using this batch only: %s", exc)
+    snapshot = snapshot or _local_snapshot(documents, list(query))
+    scores = bm25_scores(documents, query, snapshot)
+    relevance = np.round(100 * (1 - np.exp(-scores / RELEVANCE_SCALE)), 1)
+    ranked = []
+    for item, value in zip(evidence, relevance):
+        if isinstance(item, Evidence):
+            item.relevance_score = float(value)
+        else:
+            item = {**item, "relevance_score": float(value)}
+        ranked.append(item)
+    if top_k is None:
+        return ranked
+    return [ranked[index] for index in top_k_indices(scores, top_k)]
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> List[int]:
+    """Indices of the ``k`` highest scores, best first, in O(n + k log k)."""
+    if k <= 0 or not len(scores):
+        return []
+    if k >= len(scores):
+        return [int(index) for index in np.argsort(-scores, kind="stable")]
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return [int(index) for index in candidates[np.argsort(-scores[candidates], kind="stable")]]
+
+
+_default_stats: Optional[CorpusStats] = None
+_default_stats_lock = threading.Lock()
+
+
+def get_corpus_stats() -> CorpusStats:
+    global _default_stats
+    with _default_stats_lock:
+        if _default_stats is None:
+            _default_stats = CorpusStats(default_cache_path("evidence_corpus.sqlite3"))
+        return _default_stats
+
+
+def _reset_default_stats() -> None:
+    global _default_stats
+    with _default_stats_lock:
+        _default_stats = None
+
+
+register_default_store(_reset_default_stats)
@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from models.evidence import EvidenceBatch, EvidenceLike
+
+STRING_DTYPE = pd.StringDtype("pyarrow")
+
+SORTABLE_COLUMNS = ("relevance_score", "keyword_hits", "quality", "signal_type", "source", "title")
+
+
+def _scalar(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def build_table_frame(rows: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Typed frame for display. Scalars keep their types (Arrow-backed nullable dtypes);
+    only nested values (lists, dicts) are stringified, instead of casting every column.
+    """
+    frame = pd.DataFrame([{key: _scalar(value) for key, value in row.items()} for row in rows])
+    if frame.empty:
+        return frame
+    return frame.convert_dtypes(dtype_backend="pyarrow")
+
+
+def build_evidence_frame(evidence: Sequence[EvidenceLike]) -> pd.DataFrame:
+    """
+    Evidence pack as a frame with categorical labels and numeric scores, plus a
+    ``signal_group`` column ("trade:NE.IMP.GNFS.CD" -> "trade") for faceting.
+
+    Built column by column through ``EvidenceBatch`` and Arrow; keys outside the
+    ``Evidence`` fields are appended as string columns.
+    """
+    batch = EvidenceBatch.from_items(evidence)
+    frame = batch.to_dataframe()
+    frame["signal_group"] = frame["signal_type"].map(
+        lambda value: str(value).split(":", 1)[0] if isinstance(value, str) else None
+    ).astype("category")
+    extra_keys = sorted({key for extra in batch.extra if extra for key in extra})
+    for key in extra_keys:
+        values = [None if not extra or extra.get(key) is None else str(extra[key]) for extra in batch.extra]
+        frame[key] = pd.array(values, dtype=STRING_DTYPE)
+    return frame
+
+
+def evidence_facets(frame: pd.DataFrame) -> Dict[str, List[str]]:
+    """Distinct values offered as filters."""
+    facets = {}
+    for column in ("signal_group", "quality", "source"):
+        if column in frame and len(frame):
+            facets[column] = sorted(str(value) for value in frame[column].dropna().unique())
+        else:
+            facets[column] = []
+    return facets
+
+
+def query_evidence(
+    frame: pd.DataFrame,
+    signal_groups: Optional[Sequence[str]] = None,
+    qualities: Optional[Sequence[str]] = None,
+    min_relevance: Optional[float] = None,
+    search: Optional[str] = None,
+    sort_by: str = "relevance_score",
+    descending: bool = True,
+    page: int = 1,
+    page_size: int = 50,
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Filters, sorts and slices the evidence frame. Returns the requested page and the
+    total number of matching rows, so only one page is sent to the client.
+    """
+    mask = pd.Series(True, index=frame.index)
+    if signal_groups:
+        mask &= frame["signal_group"].isin(signal_groups)
+    if qualities:
+        mask &= frame["quality"].isin(qualities)
+    if min_relevance is not None:
+        mask &= frame["relevance_score"].fillna(0) >= min_relevance
+    if search:
+        needle = search.strip()
+        text_match = frame["title"].str.contains(needle, case=False, regex=False, na=False)
+        if "summary" in frame:
+            text_match |= frame["summary"].str.contains(needle, case=False, regex=False, na=False)
+        mask &= text_match
+    filtered = frame[mask]
+    if sort_by in filtered:
+        filtered = filtered.sort_values(sort_by, ascending=not descending, na_position="last", kind="stable")
+    return paginate_frame(filtered, page, page_size), len(filtered)
+
+
+def paginate_frame(frame: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+    """Rows of ``page`` (1-based), clamped to the last page."""
+    page = min(max(1, page), page_count(len(frame), page_size))
+    start = (page - 1) * page_size
+    return frame.iloc[start : start + page_size]
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
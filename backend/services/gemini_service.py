@@ -4,6 +4,7 @@ import json
 import logging
 
 from models.analysis import AnalysisModel
+from services.usage_ledger import QuotaExceededError, get_usage_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +18,16 @@ class GeminiService:
             logger.error("GEMINI_API_KEY not found in environment variables.")
             raise GeminiConfigurationError("GEMINI_API_KEY not configured.")
         genai.configure(api_key=api_key)
+        self.api_key = api_key
         self.model = genai.GenerativeModel('gemini-flash-latest')
 
+    def _generate(self, prompt: str):
+        """Books the call in the usage ledger first; over quota, raises instead of calling."""
+        decision = get_usage_ledger().acquire("gemini", self.api_key)
+        if not decision.allowed:
+            raise QuotaExceededError(decision.reason)
+        return self.model.generate_content(prompt)
+
     def generate_search_query(self, country_name: str) -> str:
         prompt = f"""
         Generate a search query to find news about "tire recycling projects" and "trade with Iran" in {country_name}.
@@ -26,7 +35,7 @@ class GeminiService:
         Return ONLY the query string, nothing else. Do not use quotes around the output.
         """
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt)
             return response.text.strip()
         except Exception as e:
             logger.error(f"Error generating search query: {e}")
@@ -181,7 +190,7 @@ class GeminiService:
             if not self.model:
                 raise Exception("Gemini API key not configured")
                 
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt)
             # Extract JSON from response (handle potential markdown formatting)
             text = response.text
             if "```json" in text:
@@ -270,7 +279,7 @@ class GeminiService:
 
         
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt)
             text = response.text
             if "```json" in text:
                 text = text.split("```json")[1].split("```")[0]
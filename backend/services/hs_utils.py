@@ -1,22 +1,228 @@
+import csv
+import functools
+import heapq
 import json
+import logging
+import math
 import os
-from typing import List
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+logger = logging.getLogger(__name__)
 
-def suggest_hs_codes(product_text: str) -> List[str]:
-    config_path = os.path.join(os.path.dirname(__file__), "..", "config", "hs_codes.json")
-    config_path = os.path.normpath(config_path)
-    if not os.path.exists(config_path):
-        return []
-    try:
-        with open(config_path, "r", encoding="utf-8") as handle:
+try:
+    import pyhscodes
+except ImportError:  # pragma: no cover - optional dependency
+    pyhscodes = None
+
+CONFIG_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "config", "hs_codes.json"))
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into its not of on or other others than the their this to with "
+    "whether nes n e c excluding including incl containing heading head no thereof".split()
+)
+# Weight of a heading's description when indexing the subheadings under it.
+PARENT_TEXT_WEIGHT = 0.5
+# Boost for codes listed under a curated category in config/hs_codes.json.
+CATEGORY_BOOST = 2.0
+PREFIX_MATCH_WEIGHT = 0.5
+
+
+def _stem(token: str) -> str:
+    """Light suffix stripping; enough to conflate plurals and verb forms in HS descriptions."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for suffix, replacement in (("ies", "y"), ("sses", "ss"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            if suffix == "es" and not token.endswith(("ches", "shes", "xes", "zes", "sses")):
+                return token[:-1]
+            return token[: len(token) - len(suffix)] + replacement
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    normalized = unicodedata.normalize("NFKD", str(text or "").lower())
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    return [_stem(token) for token in _TOKEN_PATTERN.findall(normalized) if token not in _STOPWORDS]
+
+
+def _load_nomenclature() -> List[Dict[str, str]]:
+    """
+    HS entries as ``{"code", "description", "parent"}``. A CSV with ``code``/``hscode``
+    and ``description`` columns named by ``OSINT_HS_NOMENCLATURE`` takes precedence over
+    the HS 2022 data shipped with ``pyhscodes``.
+    """
+    override = os.getenv("OSINT_HS_NOMENCLATURE")
+    if override:
+        try:
+            with open(override, "r", encoding="utf-8") as handle:
+                rows = list(csv.DictReader(handle))
+            entries = []
+            for row in rows:
+                code = (row.get("hscode") or row.get("code") or "").strip()
+                if code.isdigit():
+                    entries.append(
+                        {"code": code, "description": row.get("description", ""), "parent": row.get("parent") or code[:-2]}
+                    )
+            return entries
+        except Exception as exc:
+            logger.error("Failed to load HS nomenclature %s: %s", override, exc)
+    if pyhscodes is not None:
+        with open(os.path.join(pyhscodes.DATABASE_DIR, "hscodes.json"), "r", encoding="utf-8") as handle:
             payload = json.load(handle)
-        categories = payload.get("categories", {})
-        product_text = product_text.lower()
-        suggestions = []
-        for key, codes in categories.items():
-            if key.replace("_", " ") in product_text or key in product_text:
-                suggestions.extend(codes)
-        return suggestions
-    except Exception:
+        return [
+            {"code": item["hscode"], "description": item.get("description", ""), "parent": item.get("parent", "")}
+            for item in payload.get("hscodes", [])
+            if item.get("hscode", "").isdigit()
+        ]
+    logger.warning("No HS nomenclature available (install pyhscodes); only curated categories will match.")
+    return []
+
+
+def _load_categories() -> Dict[str, List[str]]:
+    if not os.path.exists(CONFIG_PATH):
+        return {}
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as handle:
+            return json.load(handle).get("categories", {})
+    except Exception as exc:
+        logger.error("Failed to read %s: %s", CONFIG_PATH, exc)
+        return {}
+
+
+class HSIndex:
+    """
+    TF-IDF inverted index over HS descriptions. Postings carry precomputed,
+    length-normalised weights, so a query is a handful of dict lookups and a top-k.
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, str]], categories: Optional[Dict[str, List[str]]] = None):
+        self.entries: Dict[str, Dict[str, str]] = {entry["code"]: entry for entry in entries}
+        self.categories = [(tuple(tokenize(name.replace("_", " "))), codes) for name, codes in (categories or {}).items()]
+        term_weights: Dict[str, Dict[str, float]] = {}
+        for code, entry in self.entries.items():
+            weights: Dict[str, float] = {}
+            for token in tokenize(entry["description"]):
+                weights[token] = weights.get(token, 0.0) + 1.0
+            parent = self.entries.get(entry.get("parent", ""))
+            if parent:
+                for token in tokenize(parent["description"]):
+                    weights[token] = weights.get(token, 0.0) + PARENT_TEXT_WEIGHT
+            for token, weight in weights.items():
+                term_weights.setdefault(token, {})[code] = weight
+
+        document_count = max(len(self.entries), 1)
+        self.postings: Dict[str, Dict[str, float]] = {}
+        norms: Dict[str, float] = {}
+        for token, documents in term_weights.items():
+            idf = math.log(1 + document_count / len(documents))
+            weighted = {code: (1 + math.log(weight)) * idf if weight >= 1 else weight * idf for code, weight in documents.items()}
+            self.postings[token] = weighted
+            for code, weight in weighted.items():
+                norms[code] = norms.get(code, 0.0) + weight * weight
+        for documents in self.postings.values():
+            for code in documents:
+                documents[code] /= math.sqrt(norms[code])
+        self.vocabulary = sorted(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _prefix_terms(self, token: str) -> List[str]:
+        if len(token) < 4:
+            return []
+        matches = []
+        index = bisect_left(self.vocabulary, token)
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(token):
+            if self.vocabulary[index] != token:
+                matches.append(self.vocabulary[index])
+            index += 1
+        return matches
+
+    def _scores(self, tokens: Tuple[str, ...]) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        get = scores.get
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings:
+                for code, weight in postings.items():
+                    scores[code] = get(code, 0.0) + weight
+                continue
+            for term in self._prefix_terms(token):
+                for code, weight in self.postings[term].items():
+                    scores[code] = get(code, 0.0) + weight * PREFIX_MATCH_WEIGHT
+        token_set = set(tokens)
+        for phrase, codes in self.categories:
+            if phrase and set(phrase) <= token_set:
+                for code in codes:
+                    scores[code] = scores.get(code, 0.0) + CATEGORY_BOOST
+        return scores
+
+    def search(self, text: str, limit: int = 10, digits: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ranked ``{"code", "description", "score"}`` matches; ``digits`` restricts to 2/4/6-digit codes."""
+        scores = self._scores(tuple(tokenize(text)))
+        if digits:
+            scores = {code: score for code, score in scores.items() if len(code) == digits}
+        top = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        return [
+            {"code": code, "description": self.entries.get(code, {}).get("description", ""), "score": round(scores[code], 4)}
+            for code in top
+        ]
+
+    def describe(self, code: str) -> Optional[str]:
+        entry = self.entries.get(code)
+        return entry["description"] if entry else None
+
+
+_index_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _build_index() -> HSIndex:
+    return HSIndex(_load_nomenclature(), _load_categories())
+
+
+def get_hs_index() -> HSIndex:
+    """The process-wide index, built on first use."""
+    with _index_lock:
+        return _build_index()
+
+
+def rank_hs_codes(product_text: str, limit: int = 10, digits: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_hs_index().search(product_text, limit=limit, digits=digits)
+
+
+def rank_hs_codes_batch(
+    product_lines: Iterable[str], limit: int = 10, digits: Optional[int] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Ranked matches for many product lines; repeated lines are only searched once."""
+    index = get_hs_index()
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for line in product_lines:
+        if line not in results:
+            results[line] = index.search(line, limit=limit, digits=digits)
+    return results
+
+
+def suggest_hs_codes(product_text: str, limit: int = 5) -> List[str]:
+    """
+    Four-digit HS headings for comma-separated product text, best first. Each product
+    is ranked on its own so one strong match does not crowd out the others.
+    """
+    products = [item.strip() for item in str(product_text or "").split(",") if item.strip()]
+    if not products:
         return []
+    ranked = rank_hs_codes_batch(products, limit=limit * 3)
+    headings: Dict[str, float] = {}
+    for matches in ranked.values():
+        for match in matches:
+            heading = match["code"][:4]
+            if len(heading) == 4:
+                headings[heading] = max(headings.get(heading, 0.0), match["score"])
+    return [code for code, _ in heapq.nlargest(limit * len(products), headings.items(), key=lambda item: item[1])][
+        : max(limit, len(products))
+    ]
@@ -1,27 +1,151 @@
 import json
 import logging
-from typing import Any, Dict, Optional
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional, Sequence, Tuple
+from urllib.parse import urlparse
 
 import requests
-from requests.adapters import HTTPAdapter
+from requests.adapters import BaseAdapter, HTTPAdapter
 from urllib3.util.retry import Retry
 
+from services.telemetry import record_http
+
 logger = logging.getLogger(__name__)
 
+CONNECT_TIMEOUT_SECONDS = 3.05
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class HostHealth:
+    """
+    Circuit breaker and latency window for one upstream host.
+
+    After ``failure_threshold`` consecutive failed calls the circuit opens and calls
+    fail fast. Once ``recovery_seconds`` have passed a single probe is let through
+    (half-open); its outcome closes or re-opens the circuit. Timeouts adapt to the
+    observed p95 latency of successful calls.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        recovery_seconds: float = 30.0,
+        window: int = 50,
+        min_samples: int = 5,
+        latency_multiplier: float = 4.0,
+        min_timeout_seconds: float = 2.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.min_samples = min_samples
+        self.latency_multiplier = latency_multiplier
+        self.min_timeout_seconds = min_timeout_seconds
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str) -> bool:
+        """Returns True when the call is a recovery probe; raises if the circuit is open."""
+        with self._lock:
+            if self.state == "closed":
+                return False
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.recovery_seconds:
+                self.state = "half_open"
+                return True
+            raise CircuitOpenError(f"Circuit open for {host} after {self.consecutive_failures} consecutive failures.")
+
+    def record_success(self, latency_seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(latency_seconds)
+            self.consecutive_failures = 0
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def is_degraded(self) -> bool:
+        """
+        True once the breaker has tripped (open or probing). A single transient
+        failure below the threshold keeps the retrying session.
+        """
+        with self._lock:
+            return self.state != "closed" or self.consecutive_failures >= self.failure_threshold
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(fraction * len(samples)) - 1))
+        return samples[index]
+
+    def timeout(self, default_seconds: float) -> Tuple[float, float]:
+        """(connect, read) timeout: p95-based when enough samples exist, capped at the default."""
+        read_timeout = default_seconds
+        p95 = self.percentile(0.95)
+        if p95 is not None:
+            read_timeout = max(self.min_timeout_seconds, min(default_seconds, p95 * self.latency_multiplier))
+        return min(CONNECT_TIMEOUT_SECONDS, read_timeout), read_timeout
+
+
+_hosts: Dict[str, HostHealth] = {}
+_hosts_lock = threading.Lock()
+
+
+def host_health(host: str) -> HostHealth:
+    """Breaker state is shared by every client in the process, so one dead feed trips once."""
+    with _hosts_lock:
+        health = _hosts.get(host)
+        if health is None:
+            health = _hosts[host] = HostHealth()
+        return health
+
+
+def reset_host_health() -> None:
+    with _hosts_lock:
+        _hosts.clear()
+
 
 class HttpClient:
+    # When set, every new client routes requests through this adapter instead of the
+    # network (used by the offline benchmarks to replay recorded upstream responses).
+    transport_adapter: Optional[BaseAdapter] = None
+
     def __init__(self, timeout_seconds: int = 10):
         self.timeout_seconds = timeout_seconds
         self.session = requests.Session()
+        # Probes and calls to hosts whose breaker has tripped skip the retry/backoff cycle.
+        self.fast_session = requests.Session()
+        if HttpClient.transport_adapter is not None:
+            for session in (self.session, self.fast_session):
+                session.mount("http://", HttpClient.transport_adapter)
+                session.mount("https://", HttpClient.transport_adapter)
+            return
         retries = Retry(
             total=3,
             backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=RETRYABLE_STATUS_CODES,
             allowed_methods=["GET"],
         )
         adapter = HTTPAdapter(max_retries=retries)
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
+        fast_adapter = HTTPAdapter(max_retries=0)
+        self.fast_session.mount("http://", fast_adapter)
+        self.fast_session.mount("https://", fast_adapter)
 
     def get_json(
         self,
@@ -30,9 +154,7 @@ class HttpClient:
         headers: Optional[Dict[str, str]] = None,
         timeout_seconds: Optional[int] = None,
     ) -> Any:
-        timeout = timeout_seconds or self.timeout_seconds
-        response = self.session.get(url, params=params, headers=headers, timeout=timeout)
-        response.raise_for_status()
+        response = self._get(url, params=params, headers=headers, timeout_seconds=timeout_seconds)
         try:
             return response.json()
         except json.JSONDecodeError as exc:
@@ -46,7 +168,116 @@ class HttpClient:
         headers: Optional[Dict[str, str]] = None,
         timeout_seconds: Optional[int] = None,
     ) -> str:
-        timeout = timeout_seconds or self.timeout_seconds
-        response = self.session.get(url, params=params, headers=headers, timeout=timeout)
-        response.raise_for_status()
+        response = self._get(url, params=params, headers=headers, timeout_seconds=timeout_seconds)
         return response.text
+
+    def iter_chunks(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_seconds: Optional[int] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> Iterator[bytes]:
+        """
+        The body as a stream of chunks, for parsers that consume it incrementally. The
+        request is made (and fails) here; the connection is released once the chunks are read.
+        """
+        response = self._get(url, headers=headers, timeout_seconds=timeout_seconds, stream=True)
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_content(chunk_size=chunk_size)
+            finally:
+                response.close()
+
+        return chunks()
+
+    def get_bytes(
+        self,
+        url: str,
+        max_bytes: int,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_seconds: Optional[int] = None,
+        content_types: Optional[Sequence[str]] = None,
+    ) -> Tuple[bytes, str]:
+        """
+        Streams the body and stops reading after ``max_bytes``; returns ``(body, content type)``.
+        With ``content_types``, other responses are closed before any of the body is read
+        and come back empty.
+        """
+        response = self._get(url, headers=headers, timeout_seconds=timeout_seconds, stream=True)
+        content_type = response.headers.get("Content-Type", "")
+        chunks = []
+        size = 0
+        try:
+            if content_types and not any(allowed in content_type.lower() for allowed in content_types):
+                return b"", content_type
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    break
+        finally:
+            response.close()
+        return b"".join(chunks)[:max_bytes], content_type
+
+    def _get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_seconds: Optional[int] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        host = urlparse(url).netloc.lower()
+        health = host_health(host)
+        try:
+            is_probe = health.before_request(host)
+        except CircuitOpenError:
+            record_http(host, 0.0, error=True)
+            raise
+        timeout = health.timeout(timeout_seconds or self.timeout_seconds)
+        session = self.fast_session if is_probe or health.is_degraded() else self.session
+        started = time.perf_counter()
+        response = None
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+            response.raise_for_status()
+        except Exception:
+            if _is_host_failure(response):
+                health.record_failure()
+            else:
+                # The host answered (e.g. 404); the request was wrong, not the host.
+                health.record_success(time.perf_counter() - started)
+            record_http(
+                host, time.perf_counter() - started, _response_size(response, stream), _retry_count(response), error=True
+            )
+            raise
+        elapsed = time.perf_counter() - started
+        health.record_success(elapsed)
+        record_http(host, elapsed, _response_size(response, stream), _retry_count(response))
+        return response
+
+
+def _is_host_failure(response: Optional[requests.Response]) -> bool:
+    if response is None:
+        return True
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+
+def _response_size(response: Optional[requests.Response], streamed: bool = False) -> int:
+    if response is None:
+        return 0
+    if streamed:
+        # Reading .content would pull the whole body in; trust the declared length instead.
+        try:
+            return int(response.headers.get("Content-Length") or 0)
+        except ValueError:
+            return 0
+    return len(response.content or b"")
+
+
+def _retry_count(response: Optional[requests.Response]) -> int:
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    history = getattr(retries, "history", None)
+    return len(history) if history else 0
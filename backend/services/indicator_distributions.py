@@ -0,0 +1,310 @@
+"""
+Cross-country distributions of the World Bank indicators used in scoring.
+
+Scores built from these are percentile ranks among all countries instead of
+positions between hard-coded log bounds, so they do not saturate and are
+comparable across indicators.
+
+    cd backend
+    python -m services.indicator_distributions      # (re)build from the World Bank
+"""
+
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pycountry
+
+from services.cache import default_cache_path, register_default_store
+from services.policy_signals import POLICY_INDICATORS
+from services.trade_signals import TRADE_INDICATORS
+
+logger = logging.getLogger(__name__)
+
+# Indicators that scoring ranks by percentile.
+SCORED_INDICATORS = {
+    "NY.GDP.MKTP.CD": "GDP (current US$)",
+    "SP.POP.TOTL": "Population, total",
+    "NE.IMP.GNFS.CD": "Imports of goods and services (current US$)",
+}
+# Everything the pipeline fetches per country; the rebuild covers all of them (peer search uses the rest).
+ALL_INDICATORS = {**SCORED_INDICATORS, **TRADE_INDICATORS, **POLICY_INDICATORS}
+# Below this many countries a percentile is not meaningful; scoring keeps the log bounds.
+MIN_COUNTRIES = 20
+# How often a process checks whether another process changed the stored values.
+RELOAD_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_values (
+    indicator TEXT NOT NULL,
+    country TEXT NOT NULL,
+    year INTEGER,
+    value REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (indicator, country)
+);
+CREATE TABLE IF NOT EXISTS indicator_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class QuantileTable:
+    """Sorted values of one indicator; percentile lookups are binary searches."""
+
+    def __init__(self, values: Iterable[float]):
+        self.values: List[float] = sorted(values)
+        self._array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def replace(self, old: Optional[float], new: float) -> None:
+        if old is not None:
+            index = bisect.bisect_left(self.values, old)
+            if index < len(self.values) and self.values[index] == old:
+                del self.values[index]
+        bisect.insort(self.values, new)
+        self._array = None
+
+    def percentile(self, value: float) -> float:
+        """Mid-rank percentile (0-100): ties count half, so the median country is 50."""
+        if not self.values:
+            return 50.0
+        below = bisect.bisect_left(self.values, value)
+        at_or_below = bisect.bisect_right(self.values, value)
+        return 100.0 * (below + at_or_below) / (2 * len(self.values))
+
+    def percentiles(self, values: Sequence[float]) -> np.ndarray:
+        """``percentile`` for many values at once."""
+        if self._array is None:
+            self._array = np.asarray(self.values, dtype=float)
+        queries = np.asarray(values, dtype=float)
+        if not len(self._array):
+            return np.full(queries.shape, 50.0)
+        below = np.searchsorted(self._array, queries, side="left")
+        at_or_below = np.searchsorted(self._array, queries, side="right")
+        return 100.0 * (below + at_or_below) / (2 * len(self._array))
+
+
+class IndicatorDistributions:
+    """
+    Latest value per country and indicator in SQLite, with sorted in-memory tables.
+
+    ``observe`` updates one country's value and its table in place, so values seen
+    by the pipeline keep the tables current between full rebuilds. Other processes'
+    updates are picked up through a version counter.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._tables: Dict[str, QuantileTable] = {}
+        self._values: Dict[str, Dict[str, float]] = {}
+        self._version = -1
+        self._checked_at = 0.0
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Cheap, and keeps the shared instance usable if the cache directory is wiped.
+            conn.executescript(_SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _read_version(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM indicator_meta WHERE key = 'version'").fetchone()
+        return int(row["value"]) if row else 0
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> int:
+        conn.execute(
+            "INSERT INTO indicator_meta (key, value) VALUES ('version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+        return IndicatorDistributions._read_version(conn)
+
+    def _reload_if_stale(self) -> None:
+        if time.monotonic() - self._checked_at < RELOAD_SECONDS:
+            return
+        with self._connect() as conn:
+            version = self._read_version(conn)
+            if version != self._version:
+                values: Dict[str, Dict[str, float]] = {}
+                for row in conn.execute("SELECT indicator, country, value FROM indicator_values"):
+                    values.setdefault(row["indicator"], {})[row["country"]] = row["value"]
+                self._values = values
+                self._tables = {indicator: QuantileTable(by_country.values()) for indicator, by_country in values.items()}
+                self._version = version
+        self._checked_at = time.monotonic()
+
+    @property
+    def version(self) -> int:
+        """Changes whenever any stored value does; lets derived indexes know when to rebuild."""
+        with self._lock:
+            self._reload_if_stale()
+            return self._version
+
+    def values_by_country(self, indicator: str) -> Dict[str, float]:
+        with self._lock:
+            self._reload_if_stale()
+            return dict(self._values.get(indicator, {}))
+
+    def table(self, indicator: str) -> Optional[QuantileTable]:
+        """The indicator's table, or None while it covers fewer than ``MIN_COUNTRIES`` countries."""
+        with self._lock:
+            self._reload_if_stale()
+            table = self._tables.get(indicator)
+        if table is None or len(table) < MIN_COUNTRIES:
+            return None
+        return table
+
+    def percentile(self, indicator: str, value: float) -> Optional[float]:
+        table = self.table(indicator)
+        return None if table is None else table.percentile(value)
+
+    def percentiles(self, indicator: str, values: Sequence[float]) -> Optional[np.ndarray]:
+        table = self.table(indicator)
+        return None if table is None else table.percentiles(values)
+
+    def observe(self, indicator: str, country: str, value: Optional[float], year: Optional[int] = None) -> bool:
+        """Records a country's latest value; returns True when it changed the distribution."""
+        if value is None or not country:
+            return False
+        value = float(value)
+        with self._lock:
+            self._reload_if_stale()
+            previous = self._values.get(indicator, {}).get(country)
+            if previous == value:
+                return False
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO indicator_values (indicator, country, year, value, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (indicator, country, year, value, time.time()),
+                )
+                version = self._bump_version(conn)
+            self._values.setdefault(indicator, {})[country] = value
+            self._tables.setdefault(indicator, QuantileTable([])).replace(previous, value)
+            # Another process may have written in between; the next stale check reloads then.
+            if version == self._version + 1:
+                self._version = version
+        return True
+
+    def replace_all(self, indicator: str, values: Dict[str, Dict[str, Any]]) -> int:
+        """Replaces an indicator's values (``country -> {"value", "year"}``) from a full download."""
+        rows = [
+            (indicator, country, payload.get("year"), float(payload["value"]), time.time())
+            for country, payload in values.items()
+            if payload.get("value") is not None
+        ]
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM indicator_values WHERE indicator = ?", (indicator,))
+                conn.executemany(
+                    "INSERT INTO indicator_values (indicator, country, year, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._bump_version(conn)
+            self._checked_at = 0.0
+        return len(rows)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._connect() as conn:
+            return {
+                row["indicator"]: {"countries": row["countries"], "updated_at": row["updated_at"]}
+                for row in conn.execute(
+                    "SELECT indicator, COUNT(*) AS countries, MAX(updated_at) AS updated_at "
+                    "FROM indicator_values GROUP BY indicator"
+                )
+            }
+
+
+def latest_values_by_country(series: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    ``country -> {"value", "year"}`` from an all-countries World Bank response, most
+    recent non-empty year per country. Regional and income-group aggregates are dropped.
+    """
+    latest: Dict[str, Dict[str, Any]] = {}
+    if not isinstance(series, list) or len(series) < 2:
+        return latest
+    for row in series[1] or []:
+        value = row.get("value")
+        iso3 = row.get("countryiso3code") or ""
+        country = pycountry.countries.get(alpha_3=iso3) if len(iso3) == 3 else None
+        if value is None or country is None:
+            continue
+        try:
+            year = int(row.get("date"))
+        except (TypeError, ValueError):
+            year = None
+        current = latest.get(country.alpha_2)
+        if current is None or (year or 0) > (current["year"] or 0):
+            latest[country.alpha_2] = {"value": value, "year": year}
+    return latest
+
+
+def build_distributions(collector: Any, indicators: Iterable[str] = ALL_INDICATORS) -> Dict[str, int]:
+    """Full rebuild from one all-countries World Bank request per indicator."""
+    distributions = get_indicator_distributions()
+    counts = {}
+    for indicator in indicators:
+        series = collector.get_indicator_all_countries(indicator)
+        counts[indicator] = distributions.replace_all(indicator, latest_values_by_country(series))
+        logger.info("Indicator distribution %s: %s countries", indicator, counts[indicator])
+    return counts
+
+
+def observe_values(country_code: str, values: Dict[str, Optional[float]]) -> None:
+    """Feeds values the pipeline fetched anyway into the distributions; never fails the run."""
+    try:
+        distributions = get_indicator_distributions()
+        for indicator, value in values.items():
+            if indicator in ALL_INDICATORS:
+                distributions.observe(indicator, country_code, value)
+    except Exception as exc:
+        logger.error("Failed to update indicator distributions: %s", exc)
+
+
+_default_distributions: Optional[IndicatorDistributions] = None
+_default_distributions_lock = threading.Lock()
+
+
+def get_indicator_distributions() -> IndicatorDistributions:
+    global _default_distributions
+    with _default_distributions_lock:
+        if _default_distributions is None:
+            _default_distributions = IndicatorDistributions(default_cache_path("indicator_distributions.sqlite3"))
+        return _default_distributions
+
+
+def _reset_default_distributions() -> None:
+    global _default_distributions
+    with _default_distributions_lock:
+        _default_distributions = None
+
+
+register_default_store(_reset_default_distributions)
+
+
+if __name__ == "__main__":
+    from services.data_collector import DataCollector
+
+    logging.basicConfig(level=logging.INFO)
+    for name, count in build_distributions(DataCollector()).items():
+        print(f"{name}: {count} countries")
@@ -0,0 +1,403 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from services.cache import default_cache_path, register_default_store
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+# A running job whose worker has not renewed its lease for this long is presumed dead and requeued.
+LEASE_SECONDS = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    stage TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_id TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority DESC, created_at);
+"""
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to job handlers so they can report progress and honour cancellation."""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.success_callbacks: List[Callable[[], Any]] = []
+
+    def set_stage(self, stage: str) -> None:
+        if not self.queue._update_owned(self.job_id, stage=stage, heartbeat_at=time.time()):
+            raise JobCancelledError(f"Job {self.job_id} lost its lease to another worker.")
+
+    def on_success(self, callback: Callable[[], Any]) -> None:
+        """Runs ``callback`` once the job is recorded as succeeded by this worker, and never otherwise."""
+        self.success_callbacks.append(callback)
+
+    def check_cancelled(self) -> None:
+        job = self.queue.get(self.job_id)
+        if job and job["cancel_requested"]:
+            raise JobCancelledError(f"Job {self.job_id} was cancelled.")
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Any]
+
+
+def _run_analyze_subject(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from models.subject import Subject
+    from services.osint_pipeline import iter_analysis_stages
+    from services.result_store import get_result_store
+    from services.run_store import build_run_row, get_run_store
+    from services.telemetry import RunTrace
+
+    subject = Subject(**payload["subject"])
+    result: Dict[str, Any] = {}
+    trace = RunTrace(user=payload.get("user"))
+    stages = iter_analysis_stages(
+        subject, payload.get("scoring_config"), trace=trace, fetch_full_text=bool(payload.get("fetch_full_text"))
+    )
+    for stage, stage_payload in stages:
+        context.check_cancelled()
+        context.set_stage(stage)
+        if stage == "result":
+            result = stage_payload
+    # Recorded only if this worker still owns the job, so a requeued job is not recorded twice.
+    context.on_success(lambda: get_run_store().record(build_run_row(result, result_ref=get_result_store().put(result))))
+    return result
+
+
+def _run_score_country(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from services.scoring_engine import ScoringEngine
+
+    result: Dict[str, Any] = {}
+    engine = ScoringEngine()
+    for stage, stage_payload in engine.iter_score_country(payload["country_code"], payload["country_name"]):
+        context.check_cancelled()
+        context.set_stage(stage)
+        if stage == "result":
+            result = stage_payload
+    return result
+
+
+def _run_build_distributions(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from services.data_collector import DataCollector
+    from services.indicator_distributions import ALL_INDICATORS, build_distributions
+
+    context.set_stage("download")
+    indicators = payload.get("indicators") or list(ALL_INDICATORS)
+    return {"countries": build_distributions(DataCollector(), indicators)}
+
+
+DEFAULT_HANDLERS: Dict[str, JobHandler] = {
+    "analyze_subject": _run_analyze_subject,
+    "score_country": _run_score_country,
+    "build_distributions": _run_build_distributions,
+}
+
+
+class JobQueue:
+    """
+    SQLite-backed priority queue with a local worker pool.
+
+    Several processes can share one database. A claimed job records the claiming
+    worker and a lease that the worker renews while it runs; jobs whose lease has
+    expired (their process died) are requeued. Higher ``priority`` runs first; ties
+    run in submission order.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_workers: int = 2,
+        max_pending: int = 100,
+        handlers: Optional[Dict[str, JobHandler]] = None,
+        poll_interval_seconds: float = 1.0,
+        lease_seconds: float = LEASE_SECONDS,
+    ):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.handlers = dict(handlers or DEFAULT_HANDLERS)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers: List[threading.Thread] = []
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+            if columns and "worker_id" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN worker_id TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        with self._connect() as conn:
+            self._requeue_expired(conn)
+        self._stopping.clear()
+        for index in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"osint-job-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="osint-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._workers.append(heartbeat)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._workers = []
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'.")
+        with self._connect() as conn:
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"Job queue is full ({pending} pending jobs).")
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, payload, priority, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), priority, time.time()),
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM jobs"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [_row_to_job(row, include_result=False) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued job immediately; running jobs stop at their next stage boundary."""
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            ).rowcount
+            if updated:
+                return True
+            updated = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'",
+                (job_id,),
+            ).rowcount
+        return bool(updated)
+
+    def run_pending(self) -> int:
+        """Runs queued jobs on the calling thread until none are left. Returns the number run."""
+        count = 0
+        while True:
+            job = self._claim_next()
+            if not job:
+                return count
+            self._execute(job)
+            count += 1
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            job = self._claim_next()
+            if not job:
+                self._wakeup.wait(self.poll_interval_seconds)
+                self._wakeup.clear()
+                continue
+            self._execute(job)
+
+    def _heartbeat_loop(self) -> None:
+        """Renews the lease of every job this worker is running."""
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND worker_id = ?",
+                        (time.time(), self.worker_id),
+                    )
+            except sqlite3.Error as exc:
+                logger.error("Failed to renew job leases: %s", exc)
+
+    def _requeue_expired(self, conn: sqlite3.Connection) -> int:
+        """Requeues running jobs whose worker stopped renewing their lease (rows from before leases too)."""
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, worker_id = NULL, heartbeat_at = NULL "
+            "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+            (time.time() - self.lease_seconds,),
+        ).rowcount
+        if requeued:
+            logger.warning("Requeued %s jobs whose worker lease expired", requeued)
+        return requeued
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        with self._claim_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_expired(conn)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker_id = ?, heartbeat_at = ? WHERE job_id = ?",
+                (now, self.worker_id, now, row["job_id"]),
+            )
+        return _row_to_job(row)
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        handler = self.handlers.get(job["kind"])
+        context = JobContext(self, job_id)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job['kind']}'.")
+            result = handler(job["payload"], context)
+            succeeded = self._finish(
+                job_id,
+                status="succeeded",
+                result=json.dumps(result, ensure_ascii=False, default=str),
+                finished_at=time.time(),
+            )
+        except JobCancelledError:
+            self._finish(job_id, status="cancelled", finished_at=time.time())
+            return
+        except Exception as exc:
+            logger.error("Job %s (%s) failed: %s", job_id, job["kind"], exc)
+            self._finish(job_id, status="failed", error=str(exc), finished_at=time.time())
+            return
+        if not succeeded:
+            return
+        for callback in context.success_callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.error("Job %s (%s) succeeded but its follow-up failed: %s", job_id, job["kind"], exc)
+
+    def _finish(self, job_id: str, **fields: Any) -> bool:
+        """
+        Writes the final status of a job this worker is running. If the lease expired and
+        the job was requeued (and possibly claimed elsewhere), the outcome is discarded.
+        """
+        if self._update_owned(job_id, **fields):
+            return True
+        logger.warning(
+            "Discarding the %s outcome of job %s: its lease expired and it was requeued", fields["status"], job_id
+        )
+        return False
+
+    def _update_owned(self, job_id: str, **fields: Any) -> bool:
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            updated = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (*fields.values(), job_id, self.worker_id),
+            ).rowcount
+        return bool(updated)
+
+
+def _row_to_job(row: sqlite3.Row, include_result: bool = True) -> Dict[str, Any]:
+    job = {
+        "job_id": row["job_id"],
+        "kind": row["kind"],
+        "payload": json.loads(row["payload"]),
+        "priority": row["priority"],
+        "status": row["status"],
+        "stage": row["stage"],
+        "cancel_requested": bool(row["cancel_requested"]),
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "worker_id": row["worker_id"],
+    }
+    if include_result:
+        job["result"] = json.loads(row["result"]) if row["result"] else None
+    return job
+
+
+_default_queue: Optional[JobQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide queue, starting its workers on first use."""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(
+                default_cache_path("jobs.sqlite3"),
+                max_workers=int(os.getenv("OSINT_JOB_WORKERS", "2")),
+                max_pending=int(os.getenv("OSINT_JOB_MAX_PENDING", "100")),
+            )
+            _default_queue.start()
+        return _default_queue
+
+
+def _reset_default_queue() -> None:
+    """Stops the process-wide queue's worker and heartbeat threads before dropping it."""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is not None:
+            _default_queue.shutdown()
+        _default_queue = None
+
+
+register_default_store(_reset_default_queue)
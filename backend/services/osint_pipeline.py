@@ -1,22 +1,36 @@
-from typing import Any, Dict
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 import pycountry
 
 from models.subject import Subject
 from models.scoring_config import ScoringConfig
+from services.article_fetcher import get_article_fetcher
+from services.company_registry import get_company_registry, related_names, resolve_company
 from services.data_collector import DataCollector
 from services.evidence import (
     build_evidence_from_news,
     build_evidence_from_trade_signals,
     build_evidence_from_policy_signals,
     build_evidence_from_tenders,
-    dedupe_evidence,
+    iter_dedupe_evidence,
 )
-from services.query_builder import build_queries
-from services.scoring import score_subject
+from services.evidence_ranker import evidence_text, get_corpus_stats, rank_evidence
+from services.hs_utils import tokenize
+from services.indicator_distributions import get_indicator_distributions, observe_values
+from services.query_planner import get_query_stats, plan_queries, query_budget
+from services.sanctions_index import get_sanctions_index, screen_evidence, screen_subject
+from services.scoring import EvidenceTally, score_subject, score_tally
+from services.supply_chain import SUPPLY_CHAIN_TARGETS, analyze_supply_chain, supply_chain_signals
 from services.trade_signals import get_trade_signals
+from services.trade_store import get_product_trade_signals, get_trade_store
 from services.policy_signals import get_policy_signals
 from services.tender_sources import collect_tenders
+from services.telemetry import METRICS, RunTrace
+from services.usage_ledger import get_usage_ledger
+
+logger = logging.getLogger(__name__)
 
 
 class SubjectResolutionError(Exception):
@@ -31,7 +45,35 @@ def _resolve_country(target_name: str) -> Dict[str, str]:
         raise SubjectResolutionError(f"Country '{target_name}' not found.") from exc
 
 
-def analyze_subject(subject: Subject, scoring_config: ScoringConfig | dict | None = None) -> Dict[str, Any]:
+PIPELINE_STAGES = ("resolution", "macro", "trade", "policy", "news", "tenders", "evidence", "scores")
+# News and tender items sent in their stage events; all of them still count towards evidence and scores.
+MAX_STAGE_ITEMS = 200
+
+
+def iter_analysis_stages(
+    subject: Subject,
+    scoring_config: ScoringConfig | dict | None = None,
+    trace: RunTrace | None = None,
+    partial_scores: bool = False,
+    fetch_full_text: bool = False,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Runs the OSINT pipeline and yields ``(stage, payload)`` as each stage completes.
+
+    Stages follow ``PIPELINE_STAGES``; a final ``("result", result)`` carries the
+    same payload ``analyze_subject`` returns, including the run's telemetry.
+
+    Collectors are consumed as streams: each item is classified, deduplicated,
+    tokenized for ranking and counted towards the scores as it arrives. Only the
+    evidence item is kept, without its article text; news and tender stage events
+    carry at most ``MAX_STAGE_ITEMS`` items, and tender feeds that do not match the
+    subject are dropped without being held. With ``partial_scores``, a
+    ``("partial_scores", ...)`` event follows each collection stage with the scores
+    from the evidence counted so far. With ``fetch_full_text``, the pages behind news
+    links are downloaded (or read from the article cache) and keyword classification
+    and ranking use their full text instead of the search snippet.
+    """
+    trace = trace or RunTrace()
     collector = DataCollector()
     resolved = {}
     macro = {}
@@ -41,57 +83,321 @@ def analyze_subject(subject: Subject, scoring_config: ScoringConfig | dict | Non
     if isinstance(scoring_config, dict):
         scoring_config = ScoringConfig(**scoring_config)
     scoring_config = scoring_config or ScoringConfig()
+    sanctions: Dict[str, Any] = {"available": False}
+    distributions = _indicator_distributions()
+    tally = EvidenceTally()
+    seen: set = set()
+    # Evidence per stage with its tokens, in the order ranking sees it: news, trade, policy, tenders.
+    collected: Dict[str, List[Tuple[Any, List[str]]]] = {"news": [], "trade": [], "policy": [], "tenders": []}
 
-    if subject.target_type == "country":
-        resolved = _resolve_country(subject.target_name)
-        macro = collector.get_country_data(resolved["country_code"])
-        trade_signals = get_trade_signals(resolved["country_code"], collector)
-        policy_signals = get_policy_signals(resolved["country_code"], collector)
-    else:
-        warnings.append(
-            "Only country targets are fully supported in this version. Other target types "
-            "return limited evidence and neutral scores."
-        )
+    def accumulate(items: Iterable[Any], stage: str) -> None:
+        for item in iter_dedupe_evidence(items, seen):
+            tally.add(item)
+            # Tokens are all ranking needs; the article text is dropped as soon as they exist.
+            collected[stage].append((item, tokenize(evidence_text(item))))
+            _drop_evidence_text(item)
+
+    def partial(after: str) -> Dict[str, Any]:
+        return {
+            "after": after,
+            "scores": score_tally(subject, macro, tally, trade_signals, scoring_config, sanctions, distributions),
+            "evidence_count": tally.count,
+        }
 
-    queries = build_queries(subject)
-    news = collector.get_regional_news(resolved.get("country_name", subject.target_name), queries=queries)
-    tenders = collect_tenders(subject.tender_feeds)
-    tender_keywords = _build_tender_keywords(subject)
-    news = _classify_news(news, tender_keywords)
-    filtered_tenders = _filter_tenders(tenders, tender_keywords)
-    classified_tenders = _classify_tenders(filtered_tenders, tender_keywords)
-    evidence = (
-        build_evidence_from_news(news)
-        + build_evidence_from_trade_signals(trade_signals)
-        + build_evidence_from_policy_signals(policy_signals)
-        + build_evidence_from_tenders(classified_tenders)
+    supported = subject.target_type == "country"
+    supply_chain_mode = (
+        subject.target_type in SUPPLY_CHAIN_TARGETS and bool(subject.hs_codes) and get_trade_store().available()
     )
-    evidence = dedupe_evidence(evidence)
+    supply_chain: Dict[str, Any] = {}
+    company: Dict[str, Any] = {}
+    with trace.stage("resolution"):
+        if supported:
+            resolved = _resolve_country(subject.target_name)
+        elif subject.target_type == "company":
+            # The company's registered country drives country-level collection.
+            company = _resolve_company(subject)
+            entity = company.get("entity") or {}
+            if len(entity.get("country_code") or "") == 2:
+                resolved = {"country_code": entity["country_code"], "country_name": entity["country_name"]}
+                supported = True
+            else:
+                warnings.append(
+                    f"Company '{subject.target_name}' was not found in the local company registry"
+                    + ("" if company.get("available") else " (none installed)")
+                    + "; the run returns limited evidence and neutral scores."
+                )
+        elif supply_chain_mode:
+            resolved = _resolve_region(subject.region)
+        else:
+            warnings.append(
+                "Only country targets (and companies found in the local company registry) are fully supported "
+                "in this version. Supply-chain, sector and product targets need HS codes and local trade "
+                "flows; without them they return limited evidence and neutral scores."
+            )
+        budget = _brave_budget(warnings)
+        is_cached = getattr(collector, "is_query_cached", None)
+        plan = plan_queries(subject, budget=budget, stats=get_query_stats(), is_cached=is_cached, company=company)
+        queries = plan.queries
+    yield "resolution", {
+        "resolved": resolved,
+        "company": company,
+        "query_plan": queries,
+        "query_planner": plan.summary(),
+        "warnings": list(warnings),
+    }
+
+    with trace.stage("macro"):
+        if supported:
+            macro = collector.get_country_data(resolved["country_code"])
+            observe_values(
+                resolved["country_code"],
+                {"NY.GDP.MKTP.CD": macro.get("gdp"), "SP.POP.TOTL": macro.get("population")},
+            )
+    yield "macro", {"macro": macro}
+    if partial_scores:
+        yield "partial_scores", partial("macro")
+
+    with trace.stage("trade"):
+        if supported:
+            trade_signals = {
+                **get_trade_signals(resolved["country_code"], collector),
+                **get_product_trade_signals(resolved["country_code"], subject.hs_codes),
+            }
+            observe_values(resolved["country_code"], _signal_values(trade_signals))
+        elif supply_chain_mode:
+            supply_chain = _analyze_supply_chain(subject, resolved)
+            trade_signals = supply_chain_signals(supply_chain)
+            if resolved:
+                trade_signals.update(get_product_trade_signals(resolved["country_code"], subject.hs_codes))
+        accumulate(build_evidence_from_trade_signals(trade_signals), "trade")
+    yield "trade", {"trade_signals": trade_signals, "supply_chain": supply_chain}
+    if partial_scores:
+        yield "partial_scores", partial("trade")
+
+    with trace.stage("policy"):
+        if supported:
+            policy_signals = get_policy_signals(resolved["country_code"], collector)
+            observe_values(resolved["country_code"], _signal_values(policy_signals))
+        accumulate(build_evidence_from_policy_signals(policy_signals), "policy")
+        sanctions = _screen_sanctions(subject, resolved, company)
+    yield "policy", {"policy_signals": policy_signals, "sanctions": sanctions}
+    if partial_scores:
+        yield "partial_scores", partial("policy")
 
-    scores = score_subject(subject, macro, evidence, trade_signals, scoring_config)
+    with trace.stage("news"):
+        tender_keywords = _build_tender_keywords(subject)
+        country_name = resolved.get("country_name", subject.target_name)
+        iter_news = getattr(collector, "iter_regional_news", None)
+        if iter_news is not None:
+            raw_news = iter_news(country_name, queries=queries)
+        else:
+            raw_news = collector.get_regional_news(country_name, queries=queries)
+        if fetch_full_text:
+            raw_news = get_article_fetcher().iter_enriched(raw_news)
+        news: List[Dict[str, Any]] = []
+        news_total = 0
+        for item in _iter_classified(raw_news, tender_keywords, "description"):
+            news_total += 1
+            accumulate(build_evidence_from_news([item]), "news")
+            if len(news) < MAX_STAGE_ITEMS:
+                news.append(_drop_full_text(item))
+        _record_query_yields(subject, getattr(collector, "last_query_yields", None))
+        blocked = getattr(collector, "blocked_queries", None)
+        if blocked:
+            warnings.append(
+                f"Brave quota ran out during this run; {len(blocked)} news searches were skipped, "
+                "so confidence may be understated."
+            )
+    yield "news", {"news": news, "news_total": news_total}
+    if partial_scores:
+        yield "partial_scores", partial("news")
+
+    with trace.stage("tenders"):
+        classified_tenders: List[Dict[str, Any]] = []
+        tenders_total = 0
+        tenders = _iter_filtered_tenders(collect_tenders(subject.tender_feeds), tender_keywords)
+        for item in _iter_classified(tenders, tender_keywords, "summary"):
+            tenders_total += 1
+            accumulate(build_evidence_from_tenders([item]), "tenders")
+            if len(classified_tenders) < MAX_STAGE_ITEMS:
+                classified_tenders.append(item)
+    yield "tenders", {"tenders": classified_tenders, "tenders_total": tenders_total, "tender_filters": tender_keywords}
+    if partial_scores:
+        yield "partial_scores", partial("tenders")
+
+    with trace.stage("evidence"):
+        evidence = _rank_collected(subject, collected)
+        sanctions = _screen_evidence_sanctions(sanctions, evidence)
+        # Evidence objects stay internal; stage payloads and results are plain JSON-able dicts.
+        evidence = [_drop_full_text(item.to_dict()) for item in evidence]
+    yield "evidence", {"evidence": evidence}
 
-    return {
+    with trace.stage("scores"):
+        scores = score_tally(subject, macro, tally, trade_signals, scoring_config, sanctions, distributions)
+    yield "scores", {"scores": scores, "scoring_config": scoring_config.model_dump()}
+
+    METRICS.observe_run(trace)
+    yield "result", {
+        "run_id": trace.run_id,
         "subject": subject.model_dump(),
         "resolved": resolved,
         "macro": macro,
         "trade_signals": trade_signals,
         "policy_signals": policy_signals,
+        "sanctions": sanctions,
+        "supply_chain": supply_chain,
+        "company": company,
         "scores": scores,
         "scoring_config": scoring_config.model_dump(),
         "evidence": evidence,
         "query_plan": queries,
+        "query_planner": plan.summary(),
         "tender_filters": tender_keywords,
         "warnings": warnings,
+        "usage": trace.usage_summary(),
+        "telemetry": trace.to_dict(),
         "data_sources": [
             "World Bank API (macro data)",
             "World Bank API (trade indicators)",
             "World Bank API (policy indicators)",
             "Brave Search API (news discovery)",
             "Configured tender RSS/JSON feeds",
-        ],
+        ]
+        + (
+            ["Local bilateral trade flows (BACI / Comtrade, HS6)"]
+            if "HS.IMPORTS" in trade_signals or supply_chain
+            else []
+        )
+        + (["Local company registry (GLEIF / OpenCorporates)"] if company.get("entity") else [])
+        + (["Local sanctions lists (OFAC SDN / UN / EU consolidated)"] if sanctions.get("available") else []),
     }
 
 
+def analyze_subject(subject: Subject, scoring_config: ScoringConfig | dict | None = None) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for stage, payload in iter_analysis_stages(subject, scoring_config):
+        if stage == "result":
+            result = payload
+    return result
+
+
+def rescore_result(result: Dict[str, Any], scoring_config: ScoringConfig | dict | None = None) -> Dict[str, Any]:
+    """
+    Re-applies scoring to an existing result with new weights, without collecting
+    anything again. Everything except ``scores`` and ``scoring_config`` is reused.
+    """
+    if isinstance(scoring_config, dict):
+        scoring_config = ScoringConfig(**scoring_config)
+    scoring_config = scoring_config or ScoringConfig()
+    subject = Subject(**result.get("subject", {}))
+    scores = score_subject(
+        subject,
+        result.get("macro", {}),
+        result.get("evidence", []),
+        result.get("trade_signals", {}),
+        scoring_config,
+        result.get("sanctions"),
+        _indicator_distributions(),
+    )
+    return {**result, "scores": scores, "scoring_config": scoring_config.model_dump()}
+
+
+def _brave_budget(warnings: list[str]) -> int:
+    """
+    The run's Brave call budget after the pre-flight quota check. Near the daily
+    limit it shrinks, down to zero (cached results only), with a warning.
+    """
+    budget = query_budget()
+    api_key = os.getenv("BRAVE_API_KEY")
+    if not api_key:
+        return budget
+    try:
+        decision = get_usage_ledger().check("brave", api_key, calls=budget)
+    except Exception as exc:
+        logger.error("Failed to check Brave quota: %s", exc)
+        return budget
+    if decision.allowed:
+        return budget
+    warnings.append(
+        f"Brave quota nearly used up ({decision.reason}); news is limited to {decision.remaining} new "
+        "searches plus cached results."
+    )
+    return decision.remaining
+
+
+def _resolve_region(region: str | None) -> Dict[str, str]:
+    """The supply-chain focus country, when the subject's region names one."""
+    if not region:
+        return {}
+    try:
+        return _resolve_country(region)
+    except SubjectResolutionError:
+        return {}
+
+
+def _analyze_supply_chain(subject: Subject, resolved: Dict[str, str]) -> Dict[str, Any]:
+    try:
+        return analyze_supply_chain(subject.hs_codes, focus=resolved.get("country_code"))
+    except Exception as exc:
+        logger.error("Supply-chain analysis failed: %s", exc)
+        return {}
+
+
+def _signal_values(signals: Dict[str, Any]) -> Dict[str, Any]:
+    return {code: signal.get("value") for code, signal in signals.items() if isinstance(signal, dict)}
+
+
+def _indicator_distributions() -> Any:
+    try:
+        return get_indicator_distributions()
+    except Exception as exc:
+        logger.error("Indicator distributions unavailable: %s", exc)
+        return None
+
+
+def _resolve_company(subject: Subject) -> Dict[str, Any]:
+    country = _resolve_region(subject.region).get("country_code")
+    try:
+        return resolve_company(get_company_registry(), subject.target_name, country=country)
+    except Exception as exc:
+        logger.error("Company resolution failed: %s", exc)
+        return {"available": False}
+
+
+def _screen_sanctions(subject: Subject, resolved: Dict[str, str], company: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Country exposure, plus the target itself when it is a party rather than a country,
+    and for companies the registered legal name and parents.
+    """
+    names = [] if subject.target_type == "country" else [subject.target_name]
+    names = list(dict.fromkeys(names + related_names(company)))
+    try:
+        return screen_subject(get_sanctions_index(), resolved.get("country_code", ""), names)
+    except Exception as exc:
+        logger.error("Sanctions screening failed: %s", exc)
+        return {"available": False}
+
+
+def _screen_evidence_sanctions(sanctions: Dict[str, Any], evidence: List[Any]) -> Dict[str, Any]:
+    if not sanctions.get("available"):
+        return sanctions
+    try:
+        return screen_evidence(get_sanctions_index(), sanctions, evidence)
+    except Exception as exc:
+        logger.error("Sanctions screening of evidence failed: %s", exc)
+        return sanctions
+
+
+def _record_query_yields(subject: Subject, yields: Dict[str, Dict[str, int]] | None) -> None:
+    """Feeds each query's novel-URL count back to the planner's history."""
+    if not yields:
+        return
+    try:
+        get_query_stats().record(subject.target_name, yields)
+    except Exception as exc:
+        logger.error("Failed to record query yields: %s", exc)
+
+
 def _build_tender_keywords(subject: Subject) -> list[str]:
     keywords = []
     keywords.extend(subject.products or [])
@@ -100,21 +406,20 @@ def _build_tender_keywords(subject: Subject) -> list[str]:
     return [value.strip().lower() for value in keywords if value and value.strip()]
 
 
-def _filter_tenders(tenders: list[dict], keywords: list[str]) -> list[dict]:
-    if not keywords:
-        return tenders
-    filtered = []
+def _iter_filtered_tenders(tenders: Iterable[dict], keywords: list[str]) -> Iterator[dict]:
     for item in tenders:
+        if not keywords:
+            yield item
+            continue
         haystack = f"{item.get('title', '')} {item.get('summary', '')}".lower()
         if any(keyword in haystack for keyword in keywords):
-            filtered.append(item)
-    return filtered
+            yield item
 
 
-def _classify_tenders(tenders: list[dict], keywords: list[str]) -> list[dict]:
-    classified = []
-    for item in tenders:
-        text = f"{item.get('title', '')} {item.get('summary', '')}".lower()
+def _iter_classified(items: Iterable[dict], keywords: list[str], summary_field: str) -> Iterator[dict]:
+    """Tags each item with keyword hits, severity and a provisional relevance score."""
+    for item in items:
+        text = f"{item.get('title', '')} {item.get(summary_field, '')} {item.get('full_text', '')}".lower()
         hits = 0
         for keyword in keywords:
             if keyword in text:
@@ -131,29 +436,28 @@ def _classify_tenders(tenders: list[dict], keywords: list[str]) -> list[dict]:
         new_item["severity"] = severity
         new_item["keyword_hits"] = hits
         new_item["relevance_score"] = min(100, hits * 20)
-        classified.append(new_item)
-    return classified
+        yield new_item
 
 
-def _classify_news(news: list[dict], keywords: list[str]) -> list[dict]:
-    classified = []
-    for item in news:
-        text = f"{item.get('title', '')} {item.get('description', '')}".lower()
-        hits = 0
-        for keyword in keywords:
-            if keyword in text:
-                hits += 1
-        if hits >= 3:
-            severity = "high"
-        elif hits == 2:
-            severity = "medium"
-        elif hits == 1:
-            severity = "low"
-        else:
-            severity = "none"
-        new_item = dict(item)
-        new_item["severity"] = severity
-        new_item["keyword_hits"] = hits
-        new_item["relevance_score"] = min(100, hits * 20)
-        classified.append(new_item)
-    return classified
+def _rank_collected(subject: Subject, collected: Dict[str, List[Tuple[Any, List[str]]]]) -> List[Any]:
+    """Ranks the run's evidence in stage order; the tokens are released with ``collected``'s lists."""
+    pairs = [pair for stage in list(collected) for pair in collected.pop(stage)]
+    items = [item for item, _ in pairs]
+    documents = [tokens for _, tokens in pairs]
+    return rank_evidence(items, subject, stats=get_corpus_stats(), documents=documents)
+
+
+def _drop_evidence_text(item: Any) -> None:
+    """``_drop_full_text`` in place, for evidence the run keeps until ranking."""
+    extra = getattr(item, "extra", None)
+    if extra and "full_text" in extra:
+        extra["full_text_chars"] = len(extra.pop("full_text") or "")
+
+
+def _drop_full_text(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Article text is only used for classification and ranking; payloads keep its length."""
+    if "full_text" not in item:
+        return item
+    item = dict(item)
+    item["full_text_chars"] = len(item.pop("full_text") or "")
+    return item
@@ -1,74 +1,253 @@
-﻿from typing import Any, Dict, List
+﻿from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import copy
+import functools
+import glob
+import hashlib
+import io
+import logging
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
+from fontTools import ttLib
 from fpdf import FPDF
-from fpdf.errors import FPDFUnicodeEncodingException
+from fpdf.fonts import SubsetMap, TTFFont
 
+from services.cache import default_cache_path
 
-def build_pdf_report(result: Dict[str, Any]) -> bytes:
+logger = logging.getLogger(__name__)
+
+FONT_FAMILY = "ReportSans"
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "fonts")
+SYSTEM_FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+)
+# Latin, Greek, Cyrillic, Arabic/Persian and common punctuation/currency; everything else is dropped from the subset.
+SUBSET_UNICODE_RANGES = (
+    (0x0020, 0x024F),
+    (0x0370, 0x04FF),
+    (0x0600, 0x06FF),
+    (0x2000, 0x206F),
+    (0x20A0, 0x20CF),
+    (0x2100, 0x214F),
+    (0xFB50, 0xFDFF),
+    (0xFE70, 0xFEFF),
+)
+
+
+def _find_font_file() -> Optional[str]:
+    configured = os.getenv("OSINT_PDF_FONT")
+    if configured:
+        if os.path.exists(configured):
+            return configured
+        logger.warning("OSINT_PDF_FONT=%s does not exist; searching default locations.", configured)
+    bundled = sorted(
+        path for path in glob.glob(os.path.join(FONTS_DIR, "*.ttf")) if "bold" not in os.path.basename(path).lower()
+    )
+    for path in bundled + list(SYSTEM_FONT_CANDIDATES):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _bold_variant(path: str) -> Optional[str]:
+    stem, ext = os.path.splitext(path)
+    for candidate in (f"{stem}-Bold{ext}", f"{stem.replace('-Regular', '')}-Bold{ext}", f"{stem}bd{ext}"):
+        if candidate != path and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _subset_font(path: str) -> str:
+    """
+    Writes a subset of ``path`` limited to ``SUBSET_UNICODE_RANGES`` under the cache
+    directory and returns its path. Parsing the subset is several times cheaper than
+    the full face, which every new document pays for in ``add_font``.
+    """
+    with open(path, "rb") as handle:
+        fingerprint = hashlib.sha256(handle.read()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = default_cache_path(os.path.join("fonts", f"{stem}-{fingerprint}.ttf"))
+    if os.path.exists(target):
+        return target
     try:
-        return _build_pdf_report(result)
-    except FPDFUnicodeEncodingException:
-        return _build_pdf_report(result, force_ascii=True)
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+
+        options = subset.Options()
+        options.layout_features = ["*"]
+        options.name_IDs = ["*"]
+        options.notdef_outline = True
+        options.drop_tables += ["FFTM"]
+        font = TTFont(path)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=[code for start, end in SUBSET_UNICODE_RANGES for code in range(start, end + 1)])
+        subsetter.subset(font)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        font.save(temp_path)
+        os.replace(temp_path, target)
+        return target
+    except Exception as exc:
+        logger.warning("Could not subset font %s, embedding the full face: %s", path, exc)
+        return path
+
+
+@functools.lru_cache(maxsize=1)
+def report_fonts() -> Optional[Dict[str, str]]:
+    """
+    Font files for the report, keyed by style ("" and "B"), resolved and subset once
+    per process. Returns None when no Unicode TTF is available; reports then fall
+    back to the latin-1 core fonts.
+    """
+    regular = _find_font_file()
+    if not regular:
+        logger.warning("No Unicode TTF font found; PDF reports will drop non latin-1 characters.")
+        return None
+    bold = _bold_variant(regular) or regular
+    return {"": _subset_font(regular), "B": _subset_font(bold)}
+
+
+@functools.lru_cache(maxsize=1)
+def _parsed_fonts() -> Dict[str, Tuple[TTFFont, bytes]]:
+    """
+    Report fonts parsed once per process, keyed by fpdf font key, with the raw font
+    bytes. Empty when no Unicode TTF is available.
+    """
+    fonts = report_fonts()
+    if not fonts:
+        return {}
+    prototype = FPDF()
+    for style, path in fonts.items():
+        prototype.add_font(FONT_FAMILY, style, path)
+    parsed = {}
+    for fontkey, font in prototype.fonts.items():
+        with open(font.ttffile, "rb") as handle:
+            parsed[fontkey] = (font, handle.read())
+    return parsed
+
 
+def _document_font(font: TTFFont, data: bytes) -> TTFFont:
+    """
+    Per-document copy of a parsed font. Metrics and the cmap are shared; ``output()``
+    subsets the TTFont in place, so it and the used-glyph state are fresh per document.
+    """
+    document_font = copy.copy(font)
+    document_font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+    document_font.subset = SubsetMap(document_font)
+    document_font.missing_glyphs = []
+    document_font.biggest_size_pt = 0
+    document_font._hbfont = None
+    return document_font
 
-def _build_pdf_report(result: Dict[str, Any], force_ascii: bool = False) -> bytes:
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=12)
+
+class _ReportPDF(FPDF):
+    def footer(self) -> None:
+        self.set_y(-10)
+        self.set_font(self.report_font, "", 8)
+        self.cell(0, 6, f"Page {self.page_no()}/{{nb}}", align="C")
+
+
+def _new_pdf() -> "_ReportPDF":
+    pdf = _ReportPDF()
+    pdf.report_font = "Helvetica"
+    pdf.unicode = False
+    fonts = _parsed_fonts()
+    if fonts:
+        for fontkey, (font, data) in fonts.items():
+            pdf.fonts[fontkey] = _document_font(font, data)
+        pdf.report_font = FONT_FAMILY
+        pdf.unicode = True
+        # Shaping (uharfbuzz) joins Persian/Arabic letters and lays them out right to left.
+        pdf.set_text_shaping(True)
+    pdf.set_auto_page_break(auto=True, margin=14)
+    return pdf
+
+
+def build_pdf_report(result: Dict[str, Any], max_evidence: Optional[int] = None) -> bytes:
+    """
+    Renders the report in a single pass with a Unicode font when one is available.
+    All evidence is included (paginated) unless ``max_evidence`` is set.
+    """
+    pdf = _new_pdf()
+    font = pdf.report_font
     pdf.add_page()
-    pdf.set_font("Helvetica", "B", 16)
-    pdf.cell(0, 10, _safe_text("Market Opportunity OSINT Report", force_ascii=True), ln=True)
-    pdf.set_font("Helvetica", "", 11)
-    pdf.cell(0, 6, _safe_text("Generated from open-source intelligence.", force_ascii=True), ln=True)
+    pdf.set_font(font, "B", 16)
+    pdf.cell(0, 10, "Market Opportunity OSINT Report", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font(font, "", 11)
+    pdf.cell(0, 6, "Generated from open-source intelligence.", new_x="LMARGIN", new_y="NEXT")
     width = _epw(pdf)
 
     _section(pdf, "Executive Summary")
-    summary = _build_summary(result)
-    _safe_multi_cell(pdf, width, 6, summary, force_ascii=True)
+    _safe_multi_cell(pdf, width, 6, _build_summary(result))
 
     _section(pdf, "Scores")
     scores = result.get("scores", {})
-    pdf.cell(0, 6, f"Overall score: {scores.get('overall_score')}", ln=True)
-    pdf.cell(0, 6, f"Confidence: {scores.get('confidence')}", ln=True)
-    _safe_multi_cell(pdf, width, 6, scores.get("rationale", ""), force_ascii=True)
+    _safe_multi_cell(pdf, width, 6, f"Overall score: {scores.get('overall_score')}")
+    _safe_multi_cell(pdf, width, 6, f"Confidence: {scores.get('confidence')}")
+    _safe_multi_cell(pdf, width, 6, scores.get("rationale", ""))
 
     _section(pdf, "Key Takeaways")
     for item in _takeaways(result):
         text = f"- {item}".strip()
         if text:
-            _safe_multi_cell(pdf, width, 6, text, force_ascii=True)
+            _safe_multi_cell(pdf, width, 6, text)
 
     delta = result.get("report_delta")
     if delta:
         _section(pdf, "Change vs Previous Run")
         for key, value in delta.items():
-            _safe_multi_cell(pdf, width, 6, f"{key.replace('_', ' ').title()}: {value}", force_ascii=True)
+            _safe_multi_cell(pdf, width, 6, f"{key.replace('_', ' ').title()}: {value}")
 
-    _section(pdf, "Evidence Pack (Top 10)")
-    evidence = result.get("evidence", [])[:10]
+    evidence = result.get("evidence", [])
+    if max_evidence is not None and len(evidence) > max_evidence:
+        evidence = evidence[:max_evidence]
+        _section(pdf, f"Evidence Pack (Top {max_evidence} of {len(result.get('evidence', []))})")
+    else:
+        _section(pdf, f"Evidence Pack ({len(evidence)} items)")
     if not evidence:
-        _safe_multi_cell(pdf, width, 6, "No evidence collected.", force_ascii=True)
-    for item in evidence:
+        _safe_multi_cell(pdf, width, 6, "No evidence collected.")
+    for index, item in enumerate(evidence, start=1):
         title = item.get("title", "")
         url = item.get("url", "")
         quality = item.get("quality", "")
         relevance = item.get("relevance_score", "")
-        pdf.set_font("Helvetica", "B", 11)
-        _safe_multi_cell(pdf, width, 6, title, force_ascii=True)
-        pdf.set_font("Helvetica", "", 10)
+        pdf.set_font(font, "B", 11)
+        _safe_multi_cell(pdf, width, 6, f"{index}. {title}")
+        pdf.set_font(font, "", 10)
         if url:
-            _safe_multi_cell(pdf, width, 6, url, force_ascii=True)
-        _safe_multi_cell(pdf, width, 6, f"Quality: {quality} | Relevance: {relevance}", force_ascii=True)
+            _safe_multi_cell(pdf, width, 6, url)
+        _safe_multi_cell(pdf, width, 6, f"Quality: {quality} | Relevance: {relevance}")
 
-    return pdf.output(dest="S").encode("latin-1")
+    return bytes(pdf.output())
+
+
+def build_pdf_reports(results: Iterable[Dict[str, Any]], max_workers: Optional[int] = None) -> List[bytes]:
+    """
+    Renders one PDF per result, in order, across worker processes. Each worker
+    resolves and loads the report font once and reuses it for every document.
+    ``max_workers`` can lower the pool size, never raise it past the CPU count.
+    """
+    results = list(results)
+    cpus = os.cpu_count() or 1
+    workers = min(max_workers or cpus, cpus, len(results))
+    if workers <= 1 or len(results) <= 1:
+        return [build_pdf_report(result) for result in results]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_parsed_fonts) as executor:
+        return list(executor.map(build_pdf_report, results))
 
 
 def _section(pdf: FPDF, title: str) -> None:
     pdf.ln(2)
-    pdf.set_font("Helvetica", "B", 13)
-    pdf.cell(0, 8, title, ln=True)
-    pdf.set_font("Helvetica", "", 11)
+    pdf.set_font(pdf.report_font, "B", 13)
+    pdf.cell(0, 8, title, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font(pdf.report_font, "", 11)
 
 
 def _build_summary(result: Dict[str, Any]) -> str:
@@ -113,41 +292,29 @@ def _epw(pdf: FPDF) -> float:
         return pdf.w - pdf.l_margin - pdf.r_margin
 
 
-def _safe_text(text: str, force_ascii: bool = False) -> str:
+def _safe_text(text: str, unicode: bool = True) -> str:
     if text is None:
         return ""
-    # Allow line breaks but insert breakpoints into long tokens (URLs/IDs).
     safe = str(text)
-    # Normalize common punctuation
-    safe = (
-        safe.replace("â€™", "'")
-        .replace("â€œ", "\"")
-        .replace("â€‌", "\"")
-        .replace("\u2019", "'")
-        .replace("\u201c", "\"")
-        .replace("\u201d", "\"")
-        .replace("\u2013", "-")
-        .replace("\u2014", "-")
-    )
-    # Strip non-latin-1 characters to avoid FPDFUnicodeEncodingException.
-    if force_ascii:
-        safe = safe.encode("ascii", "ignore").decode("ascii")
-    else:
+    # Repair common mojibake left by upstream feeds.
+    safe = safe.replace("â€™", "'").replace("â€œ", "\"").replace("â€‌", "\"")
+    if not unicode:
+        # Core fonts only cover latin-1: normalise typographic punctuation, drop the rest.
+        safe = (
+            safe.replace("\u2019", "'")
+            .replace("\u201c", "\"")
+            .replace("\u201d", "\"")
+            .replace("\u2013", "-")
+            .replace("\u2014", "-")
+        )
         safe = safe.encode("latin-1", "ignore").decode("latin-1")
-    # Insert breakpoints in long tokens with no separators.
-    safe = re.sub(r"(\\S{40})", r"\\1 ", safe)
-    safe = safe.replace("/", "/ ")
-    safe = safe.replace("_", "_ ")
-    safe = safe.replace("-", "- ")
+        # Insert breakpoints in long tokens (URLs/IDs) so they can wrap with the core fonts.
+        # With a Unicode font, multi_cell breaks long words itself and the text stays intact.
+        safe = re.sub(r"(\S{40})", r"\1 ", safe)
+        safe = safe.replace("/", "/ ")
+        safe = safe.replace("_", "_ ")
     return safe
 
 
-def _safe_multi_cell(pdf: FPDF, width: float, height: float, text: str, force_ascii: bool = False) -> None:
-    try:
-        pdf.multi_cell(width, height, _safe_text(text, force_ascii=force_ascii))
-    except FPDFUnicodeEncodingException:
-        fallback = str(text).encode("ascii", "ignore").decode("ascii")
-        pdf.multi_cell(width, height, fallback)
-    except Exception:
-        fallback = _safe_text(text, force_ascii=True)
-        pdf.multi_cell(width, height, fallback)
+def _safe_multi_cell(pdf: FPDF, width: float, height: float, text: str) -> None:
+    pdf.multi_cell(width, height, _safe_text(text, unicode=pdf.unicode), new_x="LMARGIN", new_y="NEXT")
@@ -0,0 +1,273 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional
+
+from models.subject import Subject
+from services.cache import default_cache_path, register_default_store
+from services.hs_utils import tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = 10
+# Queries whose token sets overlap at least this much are treated as the same search.
+NEAR_DUPLICATE_JACCARD = 0.8
+# Prior expected novel URLs per query, by group, before any history exists. Brave returns 5 results per query.
+GROUP_PRIORS = {"company": 3.0, "product": 3.0, "signal": 2.5, "hs": 2.0, "risk": 2.0}
+PRIOR_WEIGHT = 2.0
+# Bonus for the first query of a group not yet covered, so signals and risks are not always crowded out.
+GROUP_COVERAGE_BONUS = 1.0
+
+DEFAULT_PRODUCTS = ["recycled rubber", "crumb rubber"]
+DEFAULT_SIGNALS = ["import demand", "construction projects", "automotive production", "infrastructure tenders"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_yield (
+    key TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL DEFAULT 0,
+    results INTEGER NOT NULL DEFAULT 0,
+    novel INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def canonical_query_key(query: str) -> str:
+    """Order-, case-, accent- and inflection-insensitive key: equivalent searches share it."""
+    return " ".join(sorted(set(tokenize(query))))
+
+
+def template_key(query: str, target_name: str) -> str:
+    """Canonical key with the target replaced, so yields generalise across subjects."""
+    target_tokens = set(tokenize(target_name))
+    return " ".join(sorted({token for token in tokenize(query) if token not in target_tokens} | {"{target}"}))
+
+
+@dataclass
+class QueryCandidate:
+    text: str
+    group: str
+    key: str
+    tokens: FrozenSet[str]
+    expected_novel: float = 0.0
+    cached: bool = False
+
+
+@dataclass
+class QueryPlan:
+    budget: int
+    selected: List[QueryCandidate] = field(default_factory=list)
+    skipped: List[QueryCandidate] = field(default_factory=list)
+    duplicates: List[str] = field(default_factory=list)
+
+    @property
+    def queries(self) -> List[str]:
+        return [candidate.text for candidate in self.selected]
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "budget": self.budget,
+            "calls": sum(1 for candidate in self.selected if not candidate.cached),
+            "expected_novel_urls": round(sum(candidate.expected_novel for candidate in self.selected), 2),
+            "selected": [
+                {"query": c.text, "group": c.group, "expected_novel": round(c.expected_novel, 2), "cached": c.cached}
+                for c in self.selected
+            ],
+            "skipped": [candidate.text for candidate in self.skipped],
+            "duplicates": self.duplicates,
+        }
+
+
+class QueryStats:
+    """
+    Historical novel-URL yield per query, keyed both by canonical query and by
+    subject-independent template, in SQLite next to the other caches.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, target_name: str, yields: Dict[str, Dict[str, int]]) -> None:
+        """``yields`` maps each executed query to ``{"results": n, "novel": m}``."""
+        now = time.time()
+        rows: Dict[str, List[int]] = {}
+        for query, stats in yields.items():
+            for key in (canonical_query_key(query), template_key(query, target_name)):
+                totals = rows.setdefault(key, [0, 0, 0])
+                totals[0] += 1
+                totals[1] += int(stats.get("results", 0))
+                totals[2] += int(stats.get("novel", 0))
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO query_yield (key, runs, results, novel, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET runs = runs + excluded.runs, results = results + excluded.results, "
+                "novel = novel + excluded.novel, updated_at = excluded.updated_at",
+                [(key, runs, results, novel, now) for key, (runs, results, novel) in rows.items()],
+            )
+
+    def lookup(self, keys: List[str]) -> Dict[str, Dict[str, int]]:
+        if not keys:
+            return {}
+        placeholders = ", ".join("?" for _ in keys)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM query_yield WHERE key IN ({placeholders})", keys).fetchall()
+        return {row["key"]: {"runs": row["runs"], "results": row["results"], "novel": row["novel"]} for row in rows}
+
+
+def _normalize_list(values: List[str]) -> List[str]:
+    return [value.strip() for value in values if value and value.strip()]
+
+
+def candidate_queries(subject: Subject, company: Optional[Dict[str, Any]] = None) -> List[QueryCandidate]:
+    """
+    Every templated query for the subject, in priority order, before any pruning.
+    ``company`` (from ``services.company_registry.resolve_company``) adds searches
+    for the resolved legal entity and its parent.
+    """
+    target = subject.target_name
+    products = _normalize_list(subject.products) or DEFAULT_PRODUCTS
+    signals = _normalize_list(subject.signals_of_interest) or DEFAULT_SIGNALS
+    texts = []
+    entity = (company or {}).get("entity")
+    if entity:
+        texts.append((f"{target} news", "company"))
+        texts.append((f"{target} contract {entity['country_name']}", "company"))
+        texts.append((f"{target} expansion investment", "company"))
+        parents = [row for row in company["related"]["parents"] if row.get("name") and row["name"] != entity["name"]]
+        if parents:
+            texts.append((f"{parents[0]['name']} {target}", "company"))
+    for product in products:
+        texts.append((f"{product} market {target}", "product"))
+        texts.append((f"{product} import {target}", "product"))
+    for signal in signals:
+        texts.append((f"{signal} {target}", "signal"))
+    for code in _normalize_list(subject.hs_codes):
+        texts.append((f"HS {code} {target} import", "hs"))
+        texts.append((f"HS code {code} {target} tariff", "hs"))
+    for risk in _normalize_list(subject.risk_focus):
+        texts.append((f"{risk} {target}", "risk"))
+    return [
+        QueryCandidate(text=text, group=group, key=canonical_query_key(text), tokens=frozenset(tokenize(text)))
+        for text, group in texts
+    ]
+
+
+def _jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def _expected_novel(stats: Optional[Dict[str, int]], prior: float) -> float:
+    runs = stats["runs"] if stats else 0
+    novel = stats["novel"] if stats else 0
+    return (novel + prior * PRIOR_WEIGHT) / (runs + PRIOR_WEIGHT)
+
+
+def plan_queries(
+    subject: Subject,
+    budget: Optional[int] = None,
+    stats: Optional[QueryStats] = None,
+    is_cached: Optional[Callable[[str], bool]] = None,
+    company: Optional[Dict[str, Any]] = None,
+) -> QueryPlan:
+    """
+    Picks the queries to run within ``budget`` uncached Brave calls.
+
+    Candidates are de-duplicated by canonical key and token overlap, scored by
+    historical novel-URL yield (per query, else per template, else a group prior),
+    then chosen greedily: each pick maximises expected novel URLs, discounted by
+    overlap with queries already chosen, with a bonus for covering a new group.
+    Cached queries cost nothing against the budget.
+    """
+    budget = DEFAULT_QUERY_BUDGET if budget is None else budget
+    plan = QueryPlan(budget=budget)
+
+    unique: List[QueryCandidate] = []
+    for candidate in candidate_queries(subject, company):
+        if any(candidate.key == kept.key or _jaccard(candidate.tokens, kept.tokens) >= NEAR_DUPLICATE_JACCARD for kept in unique):
+            plan.duplicates.append(candidate.text)
+            continue
+        unique.append(candidate)
+
+    history: Dict[str, Dict[str, int]] = {}
+    if stats is not None:
+        try:
+            keys = [c.key for c in unique] + [template_key(c.text, subject.target_name) for c in unique]
+            history = stats.lookup(keys)
+        except Exception as exc:
+            logger.error("Failed to read query yield history: %s", exc)
+    for candidate in unique:
+        prior = GROUP_PRIORS.get(candidate.group, 2.0)
+        own = history.get(candidate.key)
+        template = history.get(template_key(candidate.text, subject.target_name))
+        candidate.expected_novel = _expected_novel(own or template, prior)
+        candidate.cached = bool(is_cached and is_cached(candidate.text))
+
+    remaining = list(unique)
+    covered_groups = set()
+    calls = 0
+    while remaining:
+        best, best_gain = None, 0.0
+        for candidate in remaining:
+            if not candidate.cached and calls >= budget:
+                continue
+            overlap = max((_jaccard(candidate.tokens, chosen.tokens) for chosen in plan.selected), default=0.0)
+            gain = candidate.expected_novel * (1 - overlap)
+            if candidate.group not in covered_groups:
+                gain += GROUP_COVERAGE_BONUS
+            if best is None or gain > best_gain:
+                best, best_gain = candidate, gain
+        if best is None:
+            break
+        remaining.remove(best)
+        plan.selected.append(best)
+        covered_groups.add(best.group)
+        calls += 0 if best.cached else 1
+    plan.skipped = remaining
+    return plan
+
+
+_default_stats: Optional[QueryStats] = None
+_default_stats_lock = threading.Lock()
+
+
+def get_query_stats() -> QueryStats:
+    global _default_stats
+    with _default_stats_lock:
+        if _default_stats is None:
+            _default_stats = QueryStats(default_cache_path("query_stats.sqlite3"))
+        return _default_stats
+
+
+def _reset_default_stats() -> None:
+    global _default_stats
+    with _default_stats_lock:
+        _default_stats = None
+
+
+register_default_store(_reset_default_stats)
+
+
+def query_budget() -> int:
+    return int(os.getenv("OSINT_BRAVE_QUERY_BUDGET", str(DEFAULT_QUERY_BUDGET)))
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 
 def _escape(value: Any) -> str:
@@ -61,30 +61,9 @@ def _render_scores(scores: Dict[str, Any]) -> str:
     """
 
 
-def _render_evidence(evidence: List[Dict[str, Any]]) -> str:
-    if not evidence:
-        return "<section><h2>Evidence Pack</h2><p>No evidence collected.</p></section>"
+EVIDENCE_ROWS_PER_CHUNK = 200
 
-    rows = []
-    for item in evidence:
-        title = _escape(item.get("title"))
-        url = _escape(item.get("url"))
-        summary = _escape(item.get("summary"))
-        age = _escape(item.get("age"))
-        source = _escape(item.get("source"))
-        signal_type = _escape(item.get("signal_type"))
-        domain = _escape(item.get("domain"))
-        quality = _escape(item.get("quality"))
-        severity = _escape(item.get("severity"))
-        keyword_hits = _escape(item.get("keyword_hits"))
-        relevance_score = _escape(item.get("relevance_score"))
-        link = f'<a href="{url}" target="_blank" rel="noopener noreferrer">{title}</a>' if url else title
-        rows.append(
-            f"<tr><td>{link}</td><td>{summary}</td><td>{age}</td><td>{source}</td><td>{signal_type}</td><td>{domain}</td><td>{quality}</td><td>{severity}</td><td>{keyword_hits}</td><td>{relevance_score}</td></tr>"
-        )
-
-    body = "".join(rows)
-    return f"""
+_EVIDENCE_HEADER = """
     <section>
       <h2>Evidence Pack</h2>
       <table class="evidence">
@@ -103,13 +82,51 @@ def _render_evidence(evidence: List[Dict[str, Any]]) -> str:
           </tr>
         </thead>
         <tbody>
-          {body}
+    """
+
+_EVIDENCE_FOOTER = """
         </tbody>
       </table>
     </section>
     """
 
 
+def _render_evidence_row(item: Dict[str, Any]) -> str:
+    title = _escape(item.get("title"))
+    url = _escape(item.get("url"))
+    summary = _escape(item.get("summary"))
+    age = _escape(item.get("age"))
+    source = _escape(item.get("source"))
+    signal_type = _escape(item.get("signal_type"))
+    domain = _escape(item.get("domain"))
+    quality = _escape(item.get("quality"))
+    severity = _escape(item.get("severity"))
+    keyword_hits = _escape(item.get("keyword_hits"))
+    relevance_score = _escape(item.get("relevance_score"))
+    link = f'<a href="{url}" target="_blank" rel="noopener noreferrer">{title}</a>' if url else title
+    return f"<tr><td>{link}</td><td>{summary}</td><td>{age}</td><td>{source}</td><td>{signal_type}</td><td>{domain}</td><td>{quality}</td><td>{severity}</td><td>{keyword_hits}</td><td>{relevance_score}</td></tr>"
+
+
+def _iter_evidence(evidence: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Evidence table in chunks of ``EVIDENCE_ROWS_PER_CHUNK`` rows."""
+    rows: List[str] = []
+    started = False
+    for item in evidence:
+        if not started:
+            yield _EVIDENCE_HEADER
+            started = True
+        rows.append(_render_evidence_row(item))
+        if len(rows) >= EVIDENCE_ROWS_PER_CHUNK:
+            yield "".join(rows)
+            rows = []
+    if not started:
+        yield "<section><h2>Evidence Pack</h2><p>No evidence collected.</p></section>"
+        return
+    if rows:
+        yield "".join(rows)
+    yield _EVIDENCE_FOOTER
+
+
 def build_score_narrative(result: Dict[str, Any]) -> Dict[str, Any]:
     scores = result.get("scores", {})
     evidence = result.get("evidence", [])
@@ -306,40 +323,12 @@ def _render_run_delta(result: Dict[str, Any]) -> str:
     """
 
 
-def build_html_report(result: Dict[str, Any]) -> str:
-    subject = result.get("subject", {})
-    resolved = result.get("resolved", {})
-    macro = result.get("macro", {})
-    trade_signals = result.get("trade_signals", {})
-    policy_signals = result.get("policy_signals", {})
-    scores = result.get("scores", {})
-    scoring_config = result.get("scoring_config", {})
-    evidence = result.get("evidence", [])
-    query_plan = result.get("query_plan", [])
-    tender_filters = result.get("tender_filters", [])
-    warnings = result.get("warnings", [])
-    sources = result.get("data_sources", [])
-
-    warnings_html = ""
-    if warnings:
-        warnings_html = "<ul>" + "".join(f"<li>{_escape(item)}</li>" for item in warnings) + "</ul>"
-
-    queries_html = "<ul>" + "".join(f"<li>{_escape(item)}</li>" for item in query_plan) + "</ul>"
-    sources_html = "<ul>" + "".join(f"<li>{_escape(item)}</li>" for item in sources) + "</ul>"
-    tender_filters_html = "<ul>" + "".join(f"<li>{_escape(item)}</li>" for item in tender_filters) + "</ul>"
-
-    executive_summary = _render_executive_summary(result)
-    narrative = build_score_narrative(result)
-    quality_legend = _render_quality_legend()
-    key_takeaways = _render_key_takeaways(result)
-    run_delta = _render_run_delta(result)
-
-    html = f"""
+_DOCUMENT_HEAD = """
     <!doctype html>
     <html lang="en">
     <head>
       <meta charset="utf-8" />
-      <title>Market Opportunity OSINT Report</title>
+      <title>{title}</title>
       <style>
         body {{
           font-family: Arial, sans-serif;
@@ -363,15 +352,25 @@ def build_html_report(result: Dict[str, Any]) -> str:
         th {{ background: #f9fafb; }}
         .kv th {{ width: 240px; }}
         .evidence td {{ font-size: 13px; }}
+        article + article {{ border-top: 2px solid #111827; margin-top: 48px; padding-top: 16px; }}
       </style>
     </head>
     <body>
-      <h1>Market Opportunity OSINT Report</h1>
-      <p class="meta">Generated with open-source intelligence only.</p>
+    """
+
+_DOCUMENT_TAIL = """
+    </body>
+    </html>
+    """
+
+
+def _render_list(items: List[Any]) -> str:
+    return "<ul>" + "".join(f"<li>{_escape(item)}</li>" for item in items) + "</ul>"
+
 
-      {_render_kv_table("Subject", subject)}
-      {_render_kv_table("Resolved Target", resolved)}
-      {_render_kv_table("Macro Data", macro)}
+def _render_narrative(result: Dict[str, Any]) -> str:
+    narrative = build_score_narrative(result)
+    return f"""
       <section>
         <h2>Analyst Narrative</h2>
         <p>{_escape(narrative["summary"])}</p>
@@ -379,40 +378,101 @@ def build_html_report(result: Dict[str, Any]) -> str:
         <ul>
           { "".join(f"<li>{_escape(item)}</li>" for item in narrative["justification"]) }
         </ul>
-        { "<h3>Key evidence highlights</h3><ul>" + "".join(f"<li>{_escape(item)}</li>" for item in narrative["key_evidence"]) + "</ul>" if narrative["key_evidence"] else "" }
-        { "<h3>Gaps to validate</h3><ul>" + "".join(f"<li>{_escape(item)}</li>" for item in narrative["gaps"]) + "</ul>" if narrative["gaps"] else "" }
+        { "<h3>Key evidence highlights</h3>" + _render_list(narrative["key_evidence"]) if narrative["key_evidence"] else "" }
+        { "<h3>Gaps to validate</h3>" + _render_list(narrative["gaps"]) if narrative["gaps"] else "" }
       </section>
-      {quality_legend}
-      {key_takeaways}
-      {run_delta}
-      {executive_summary}
-      {_render_scores(scores)}
-      {_render_kv_table("Scoring Weights", scoring_config.get("weights", {}))}
-      {_render_kv_table("Trade Signals", {payload.get("label"): payload.get("value") for payload in trade_signals.values()})}
-      {_render_kv_table("Policy Signals", {payload.get("label"): payload.get("value") for payload in policy_signals.values()})}
+    """
+
 
+def _iter_report_body(result: Dict[str, Any]) -> Iterator[str]:
+    """Sections of one subject's report, in document order."""
+    scoring_config = result.get("scoring_config", {})
+    trade_signals = result.get("trade_signals", {})
+    policy_signals = result.get("policy_signals", {})
+    warnings = result.get("warnings", [])
+
+    yield _render_kv_table("Subject", result.get("subject", {}))
+    yield _render_kv_table("Resolved Target", result.get("resolved", {}))
+    yield _render_kv_table("Macro Data", result.get("macro", {}))
+    yield _render_narrative(result)
+    yield _render_quality_legend()
+    yield _render_key_takeaways(result)
+    yield _render_run_delta(result)
+    yield _render_executive_summary(result)
+    yield _render_scores(result.get("scores", {}))
+    yield _render_kv_table("Scoring Weights", scoring_config.get("weights", {}))
+    yield _render_kv_table("Trade Signals", {payload.get("label"): payload.get("value") for payload in trade_signals.values()})
+    yield _render_kv_table("Policy Signals", {payload.get("label"): payload.get("value") for payload in policy_signals.values()})
+    yield f"""
       <section>
         <h2>Warnings</h2>
-        {warnings_html or "<p>None.</p>"}
+        {_render_list(warnings) if warnings else "<p>None.</p>"}
       </section>
 
       <section>
         <h2>Query Plan</h2>
-        {queries_html}
+        {_render_list(result.get("query_plan", []))}
       </section>
 
       <section>
         <h2>Tender Filters</h2>
-        {tender_filters_html}
+        {_render_list(result.get("tender_filters", []))}
       </section>
-
-      {_render_evidence(evidence)}
-
+    """
+    yield from _iter_evidence(result.get("evidence", []))
+    yield f"""
       <section>
         <h2>Data Sources</h2>
-        {sources_html}
+        {_render_list(result.get("data_sources", []))}
       </section>
-    </body>
-    </html>
     """
-    return html
+
+
+def iter_html_report(result: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yields the HTML report in chunks, evidence rows in batches, so it can be streamed
+    (e.g. as a ``StreamingResponse``) or written to disk without building the document.
+    """
+    yield _DOCUMENT_HEAD.format(title="Market Opportunity OSINT Report")
+    yield """
+      <h1>Market Opportunity OSINT Report</h1>
+      <p class="meta">Generated with open-source intelligence only.</p>
+    """
+    yield from _iter_report_body(result)
+    yield _DOCUMENT_TAIL
+
+
+def iter_combined_html_report(results: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    One document covering several subjects. ``results`` is consumed lazily, so passing a
+    generator that loads each result on demand keeps a single subject in memory at a time.
+    """
+    yield _DOCUMENT_HEAD.format(title="Market Opportunity OSINT Report (Combined)")
+    yield """
+      <h1>Market Opportunity OSINT Report</h1>
+      <p class="meta">Combined report. Generated with open-source intelligence only.</p>
+    """
+    count = 0
+    for result in results:
+        count += 1
+        target = result.get("subject", {}).get("target_name") or result.get("resolved", {}).get("country_name")
+        yield f'<article>\n      <h1>{count}. {_escape(target or "Unnamed subject")}</h1>\n'
+        yield from _iter_report_body(result)
+        yield "</article>\n"
+    if not count:
+        yield "<p>No results selected.</p>"
+    yield _DOCUMENT_TAIL
+
+
+def write_html_report(chunks: Iterable[str], path: str) -> int:
+    """Writes chunks from ``iter_html_report``/``iter_combined_html_report`` to ``path``. Returns bytes written."""
+    written = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+            written += len(chunk.encode("utf-8"))
+    return written
+
+
+def build_html_report(result: Dict[str, Any]) -> str:
+    return "".join(iter_html_report(result))
@@ -0,0 +1,91 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.pdf_report import build_pdf_report
+from services.report import build_html_report, build_score_narrative
+from services.result_store import result_digest
+
+ArtifactKey = Tuple[str, str, str]
+
+
+class ArtifactCache:
+    """
+    Bounded LRU of rendered report artifacts, keyed by result digest.
+
+    Each key is built at most once while it stays cached: concurrent callers asking
+    for the same artifact wait on a per-key lock instead of rendering it again.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[ArtifactKey, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ArtifactKey, threading.Lock] = {}
+
+    def get_or_build(self, key: ArtifactKey, builder: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+            value = builder()
+            with self._lock:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._key_locks.pop(key, None)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+ARTIFACTS = ArtifactCache()
+
+
+def _key(kind: str, result: Dict[str, Any], digest: Optional[str], report_delta: Optional[Dict[str, Any]]) -> ArtifactKey:
+    delta = json.dumps(report_delta, sort_keys=True, default=str) if report_delta else ""
+    return kind, digest or result_digest(result), delta
+
+
+def _with_delta(result: Dict[str, Any], report_delta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not report_delta:
+        return result
+    return {**result, "report_delta": report_delta}
+
+
+def get_score_narrative(result: Dict[str, Any], digest: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Memoized ``build_score_narrative``. Pass ``digest`` when the caller already knows
+    it (e.g. the ``ResultStore`` ref) to skip hashing the result again.
+    """
+    return ARTIFACTS.get_or_build(_key("narrative", result, digest, None), lambda: build_score_narrative(result))
+
+
+def get_html_report(
+    result: Dict[str, Any], digest: Optional[str] = None, report_delta: Optional[Dict[str, Any]] = None
+) -> str:
+    return ARTIFACTS.get_or_build(
+        _key("html", result, digest, report_delta),
+        lambda: build_html_report(_with_delta(result, report_delta)),
+    )
+
+
+def get_pdf_report(
+    result: Dict[str, Any], digest: Optional[str] = None, report_delta: Optional[Dict[str, Any]] = None
+) -> bytes:
+    return ARTIFACTS.get_or_build(
+        _key("pdf", result, digest, report_delta),
+        lambda: build_pdf_report(_with_delta(result, report_delta)),
+    )
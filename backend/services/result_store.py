@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.cache import default_cache_path, register_default_store
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+def canonical_json(result: Dict[str, Any]) -> bytes:
+    return json.dumps(result, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def result_digest(result: Dict[str, Any]) -> str:
+    """
+    Content address of an analysis result (sha256 over canonical JSON). The hash covers
+    ``run_id``, ``usage`` and ``telemetry``, so every run gets its own address.
+    """
+    return hashlib.sha256(canonical_json(result)).hexdigest()
+
+
+def _encode_json(result: Dict[str, Any]) -> bytes:
+    return canonical_json(result)
+
+
+def _decode_json(payload: bytes) -> Dict[str, Any]:
+    return json.loads(payload.decode("utf-8"))
+
+
+def _encode_msgpack(result: Dict[str, Any]) -> bytes:
+    return msgpack.packb(result, default=str, use_bin_type=True)
+
+
+def _decode_msgpack(payload: bytes) -> Dict[str, Any]:
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+def _zstd_compress(payload: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=10).compress(payload)
+
+
+def _zstd_decompress(payload: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+
+Codec = Tuple[Callable[[Dict[str, Any]], bytes], Callable[[bytes], Dict[str, Any]]]
+Compression = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+_SERIALIZERS: Dict[str, Codec] = {"json": (_encode_json, _decode_json)}
+if msgpack is not None:
+    _SERIALIZERS["msgpack"] = (_encode_msgpack, _decode_msgpack)
+
+_COMPRESSORS: Dict[str, Compression] = {"gz": (gzip.compress, gzip.decompress)}
+if zstandard is not None:
+    _COMPRESSORS["zst"] = (_zstd_compress, _zstd_decompress)
+
+
+class ResultStore:
+    """
+    Content-addressed, compressed store for full ``analyze_subject`` outputs.
+
+    Results are written once under ``<root>/<aa>/<digest>.<format>.<compression>``;
+    writing the same result again is a no-op. Results are not shared between runs.
+    msgpack + zstd are used when installed, falling back to JSON + gzip; reads accept
+    any format so stores written by other deployments stay readable.
+    """
+
+    def __init__(self, root: str, serializer: Optional[str] = None, compression: Optional[str] = None):
+        self.root = root
+        self.serializer = serializer or ("msgpack" if "msgpack" in _SERIALIZERS else "json")
+        self.compression = compression or ("zst" if "zst" in _COMPRESSORS else "gz")
+        if self.serializer not in _SERIALIZERS:
+            raise ValueError(f"Serializer '{self.serializer}' is not available.")
+        if self.compression not in _COMPRESSORS:
+            raise ValueError(f"Compression '{self.compression}' is not available.")
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str, serializer: str, compression: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.{serializer}.{compression}")
+
+    def _find(self, digest: str) -> Optional[Tuple[str, str, str]]:
+        if len(digest) != 64 or any(char not in "0123456789abcdef" for char in digest):
+            return None
+        for serializer in _SERIALIZERS:
+            for compression in _COMPRESSORS:
+                path = self._path(digest, serializer, compression)
+                if os.path.exists(path):
+                    return path, serializer, compression
+        return None
+
+    def put(self, result: Dict[str, Any]) -> str:
+        digest = result_digest(result)
+        if self._find(digest):
+            return digest
+        path = self._path(digest, self.serializer, self.compression)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        encode, _ = _SERIALIZERS[self.serializer]
+        compress, _ = _COMPRESSORS[self.compression]
+        payload = compress(encode(result))
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                temp_file.write(payload)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        found = self._find(digest)
+        if not found:
+            return None
+        path, serializer, compression = found
+        try:
+            with open(path, "rb") as handle:
+                payload = handle.read()
+            _, decompress = _COMPRESSORS[compression]
+            _, decode = _SERIALIZERS[serializer]
+            return decode(decompress(payload))
+        except Exception as exc:
+            logger.error("Failed to read stored result %s: %s", digest, exc)
+            return None
+
+    def exists(self, digest: str) -> bool:
+        return self._find(digest) is not None
+
+    def delete(self, digest: str) -> bool:
+        """Removes a stored result in whatever format it was written; False if there was none."""
+        found = self._find(digest)
+        if not found:
+            return False
+        try:
+            os.remove(found[0])
+        except FileNotFoundError:
+            return False
+        return True
+
+
+_default_store: Optional[ResultStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultStore(default_cache_path("results"))
+        return _default_store
+
+
+def _reset_default_store() -> None:
+    global _default_store
+    with _default_store_lock:
+        _default_store = None
+
+
+register_default_store(_reset_default_store)
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from services.cache import default_cache_path, register_default_store
+from services.result_store import ResultStore, get_result_store
+
+logger = logging.getLogger(__name__)
+
+RUN_COLUMNS = (
+    "run_id",
+    "timestamp",
+    "target",
+    "type",
+    "overall_score",
+    "confidence",
+    "official_sources",
+    "evidence_count",
+    "result_ref",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    target TEXT,
+    type TEXT,
+    overall_score INTEGER,
+    confidence INTEGER,
+    official_sources INTEGER,
+    evidence_count INTEGER,
+    result_ref TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_target_timestamp ON runs (target COLLATE NOCASE, timestamp);
+"""
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def build_run_row(result: Dict[str, Any], result_ref: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summary row for one analysis result, keyed by the pipeline's ``run_id``.
+    ``result_ref`` is the digest of the full result in the ``ResultStore``.
+    """
+    scores = result.get("scores", {})
+    row = {
+        "run_id": result.get("run_id"),
+        "timestamp": _utc_now(),
+        "target": result.get("subject", {}).get("target_name"),
+        "type": result.get("subject", {}).get("target_type"),
+        "overall_score": scores.get("overall_score"),
+        "confidence": scores.get("confidence"),
+        "official_sources": scores.get("confidence_sources", {}).get("official", 0),
+        "evidence_count": len(result.get("evidence", [])),
+        "result_ref": result_ref,
+    }
+    if "usage" in result:
+        row["api_cost"] = result["usage"].get("cost")
+        row["user"] = result["usage"].get("user")
+    return row
+
+
+def _legacy_run_id(row: Dict[str, Any]) -> str:
+    # Rows exported before run ids existed get a content hash, so re-importing them is a no-op.
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return "legacy-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class RunStore:
+    """
+    Append-only run history in SQLite, one row per analysis.
+
+    Writes are idempotent by ``run_id``; reads are indexed by target and timestamp and
+    paginated. ``compact`` enforces retention and reclaims space, and runs
+    automatically every ``compact_every`` inserts. With a ``result_store``, it also
+    deletes stored results that no remaining run references.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_rows: Optional[int] = 10000,
+        max_age_days: Optional[int] = None,
+        compact_every: int = 500,
+        result_store: Optional[ResultStore] = None,
+    ):
+        self.db_path = db_path
+        self.result_store = result_store
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.compact_every = compact_every
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)").fetchall()}
+            if columns and "result_ref" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN result_ref TEXT")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, row: Dict[str, Any]) -> bool:
+        """Appends a run. Returns False when a run with the same ``run_id`` already exists."""
+        return self.record_many([row]) == 1
+
+    def record_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        values = []
+        for row in rows:
+            row = dict(row)
+            run_id = row.get("run_id") or _legacy_run_id(row)
+            extra = {key: value for key, value in row.items() if key not in RUN_COLUMNS}
+            values.append(
+                (
+                    run_id,
+                    row.get("timestamp") or _utc_now(),
+                    row.get("target"),
+                    row.get("type"),
+                    row.get("overall_score"),
+                    row.get("confidence"),
+                    row.get("official_sources"),
+                    row.get("evidence_count"),
+                    row.get("result_ref"),
+                    json.dumps(extra, ensure_ascii=False, default=str) if extra else None,
+                )
+            )
+        if not values:
+            return 0
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO runs ({', '.join(RUN_COLUMNS)}, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            inserted = conn.total_changes - before
+            total = conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        if inserted and self.compact_every and total // self.compact_every != (total - inserted) // self.compact_every:
+            self.compact()
+        return inserted
+
+    def _where(self, target: Optional[str], since: Optional[str], until: Optional[str]):
+        clauses = []
+        params: List[Any] = []
+        if target:
+            clauses.append("target = ? COLLATE NOCASE")
+            params.append(target)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(
+        self,
+        target: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Newest runs first. ``since``/``until`` are ISO-8601 UTC timestamps."""
+        where, params = self._where(target, since, until)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM runs{where} ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def count(self, target: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> int:
+        where, params = self._where(target, since, until)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def targets(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT target FROM runs WHERE target IS NOT NULL ORDER BY target").fetchall()
+        return [row[0] for row in rows]
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        offset = 0
+        while True:
+            batch = self.query(limit=batch_size, offset=offset)
+            if not batch:
+                return
+            yield from batch
+            offset += batch_size
+
+    def compact(self) -> int:
+        """
+        Drops runs beyond the retention limits, deletes results only they referenced
+        and vacuums the file. Returns rows removed.
+        """
+        removed = 0
+        orphans: List[str] = []
+        with self._connect() as conn:
+            conditions = []
+            if self.max_age_days:
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=self.max_age_days)).isoformat(timespec="seconds")
+                conditions.append(("timestamp < ?", (cutoff.replace("+00:00", "Z"),)))
+            if self.max_rows:
+                conditions.append(
+                    (
+                        "rowid NOT IN (SELECT rowid FROM runs ORDER BY timestamp DESC, rowid DESC LIMIT ?)",
+                        (self.max_rows,),
+                    )
+                )
+            dropped_refs = set()
+            for condition, params in conditions:
+                dropped_refs.update(
+                    row["result_ref"]
+                    for row in conn.execute(f"SELECT result_ref FROM runs WHERE {condition}", params)
+                    if row["result_ref"]
+                )
+                removed += conn.execute(f"DELETE FROM runs WHERE {condition}", params).rowcount
+            if dropped_refs:
+                # Each recorded run has its own result, but rows written by other tools may share one; keep those.
+                refs = sorted(dropped_refs)
+                kept = set()
+                for start in range(0, len(refs), 900):
+                    chunk = refs[start : start + 900]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    kept.update(
+                        row["result_ref"]
+                        for row in conn.execute(
+                            f"SELECT DISTINCT result_ref FROM runs WHERE result_ref IN ({placeholders})", chunk
+                        )
+                    )
+                orphans = [ref for ref in refs if ref not in kept]
+        if self.result_store is not None:
+            for digest in orphans:
+                self.result_store.delete(digest)
+        if removed:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+        return removed
+
+    def migrate_legacy_json(self, json_path: str) -> int:
+        """Imports a pre-SQLite ``run_history.json`` once, then renames it out of the way."""
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as handle:
+                rows = json.load(handle)
+        except Exception as exc:
+            logger.error("Failed to read legacy run history %s: %s", json_path, exc)
+            return 0
+        inserted = self.record_many(row for row in rows if isinstance(row, dict)) if isinstance(rows, list) else 0
+        os.replace(json_path, json_path + ".migrated")
+        return inserted
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    data = {column: row[column] for column in RUN_COLUMNS}
+    if row["extra"]:
+        data.update(json.loads(row["extra"]))
+    return data
+
+
+_default_store: Optional[RunStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_run_store() -> RunStore:
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = RunStore(default_cache_path("run_history.sqlite3"), result_store=get_result_store())
+        return _default_store
+
+
+def _reset_default_store() -> None:
+    global _default_store
+    with _default_store_lock:
+        _default_store = None
+
+
+register_default_store(_reset_default_store)
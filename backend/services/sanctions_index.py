@@ -0,0 +1,596 @@
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import pycountry
+
+from services.cache import default_cache_path, register_default_store
+
+logger = logging.getLogger(__name__)
+
+# Dice similarity over name trigrams needed for a hit.
+DEFAULT_THRESHOLD = 0.85
+# Phrases pulled from evidence titles are short and noisy; require a closer match.
+EVIDENCE_THRESHOLD = 0.9
+MAX_EVIDENCE_PHRASES = 200
+# A program "targets" a country when at least this share of its located entries are there.
+PROGRAM_COUNTRY_SHARE = 0.5
+PROGRAM_MIN_ENTRIES = 5
+# Words that do not identify an entity and would inflate similarity between unrelated names.
+LEGAL_SUFFIXES = {
+    "co", "company", "corp", "corporation", "inc", "llc", "ltd", "limited", "plc", "gmbh", "sa", "ag",
+    "jsc", "ojsc", "pjsc", "cjsc", "fze", "fzco", "bv", "nv", "srl", "spa", "the",
+}
+# Program names that refer to a country by something other than its ISO name or code.
+PROGRAM_COUNTRY_ALIASES = {"KP": {"dprk", "nkorea"}, "SY": {"syria"}, "RU": {"russia"}, "VE": {"venezuela"}}
+OFAC_FILES = ("sdn.csv", "alt.csv", "add.csv")
+OFAC_NULL = "-0-"
+_PHRASE = re.compile(r"\b(?:[A-Z][\w&'.-]*\s+){1,5}[A-Z][\w&'.-]*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sanctions_sources (
+    source TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    loaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sanctions_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    ref TEXT,
+    name TEXT NOT NULL,
+    kind TEXT,
+    programs TEXT NOT NULL,
+    countries TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sanctions_entries_source ON sanctions_entries (source);
+CREATE TABLE IF NOT EXISTS sanctions_names (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    gram_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sanctions_names_source ON sanctions_names (source);
+CREATE TABLE IF NOT EXISTS sanctions_grams (
+    gram TEXT NOT NULL,
+    name_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, name_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sanctions_countries (
+    country TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    program TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sanctions_countries_country ON sanctions_countries (country);
+CREATE INDEX IF NOT EXISTS idx_sanctions_countries_source ON sanctions_countries (source);
+"""
+
+
+@dataclass
+class SanctionsEntry:
+    source: str
+    ref: str
+    name: str
+    kind: str = ""
+    aliases: List[str] = field(default_factory=list)
+    programs: List[str] = field(default_factory=list)
+    # ISO alpha-2 where the list's country text resolves, else the normalized text.
+    countries: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SanctionsHit:
+    query: str
+    name: str
+    listed_name: str
+    source: str
+    ref: str
+    kind: str
+    programs: List[str]
+    countries: List[str]
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "name": self.name,
+            "listed_name": self.listed_name,
+            "source": self.source,
+            "ref": self.ref,
+            "kind": self.kind,
+            "programs": self.programs,
+            "countries": self.countries,
+            "score": self.score,
+        }
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, accents and punctuation stripped, legal-form words dropped."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    text = re.sub(r"[^\w\s]|_", " ", text)
+    return " ".join(token for token in text.split() if token not in LEGAL_SUFFIXES)
+
+
+def name_trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+@lru_cache(maxsize=4096)
+def country_code(text: str) -> str:
+    """ISO alpha-2 for a list's country text, or the normalized text when it does not resolve."""
+    cleaned = (text or "").strip()
+    if not cleaned:
+        return ""
+    try:
+        return pycountry.countries.lookup(cleaned).alpha_2
+    except LookupError:
+        pass
+    try:
+        return pycountry.countries.search_fuzzy(re.sub(r"\(.*?\)", "", cleaned).strip() or cleaned)[0].alpha_2
+    except LookupError:
+        return normalize_name(cleaned)
+
+
+def _ofac_value(value: Optional[str]) -> str:
+    value = (value or "").strip()
+    return "" if value == OFAC_NULL else value
+
+
+def parse_ofac(directory: str) -> Iterator[SanctionsEntry]:
+    """OFAC SDN CSVs (no header): ``sdn.csv`` with optional ``alt.csv`` aliases and ``add.csv`` addresses."""
+    aliases: Dict[str, List[str]] = {}
+    countries: Dict[str, List[str]] = {}
+    alt_path = os.path.join(directory, "alt.csv")
+    if os.path.exists(alt_path):
+        with open(alt_path, newline="", encoding="utf-8", errors="replace") as handle:
+            for row in csv.reader(handle):
+                if len(row) >= 4 and _ofac_value(row[3]):
+                    aliases.setdefault(row[0].strip(), []).append(_ofac_value(row[3]))
+    add_path = os.path.join(directory, "add.csv")
+    if os.path.exists(add_path):
+        with open(add_path, newline="", encoding="utf-8", errors="replace") as handle:
+            for row in csv.reader(handle):
+                if len(row) >= 5 and _ofac_value(row[4]):
+                    countries.setdefault(row[0].strip(), []).append(country_code(_ofac_value(row[4])))
+    with open(os.path.join(directory, "sdn.csv"), newline="", encoding="utf-8", errors="replace") as handle:
+        for row in csv.reader(handle):
+            if len(row) < 4 or not _ofac_value(row[1]):
+                continue
+            ref = row[0].strip()
+            programs = [value.strip() for value in re.split(r"[\[\]]", row[3]) if value.strip()]
+            yield SanctionsEntry(
+                source="ofac",
+                ref=ref,
+                name=_ofac_value(row[1]),
+                kind=_ofac_value(row[2]) or "entity",
+                aliases=aliases.get(ref, []),
+                programs=programs,
+                countries=sorted(set(countries.get(ref, []))),
+            )
+
+
+def _texts(element: ET.Element, path: str) -> List[str]:
+    return [node.text.strip() for node in element.iterfind(path) if node.text and node.text.strip()]
+
+
+def parse_un(path: str) -> Iterator[SanctionsEntry]:
+    """UN Security Council consolidated list XML."""
+    for _event, element in ET.iterparse(path, events=("end",)):
+        if element.tag not in ("INDIVIDUAL", "ENTITY"):
+            continue
+        parts = [element.findtext(tag) for tag in ("FIRST_NAME", "SECOND_NAME", "THIRD_NAME", "FOURTH_NAME")]
+        name = " ".join(part.strip() for part in parts if part and part.strip())
+        if name:
+            found = _texts(element, "NATIONALITY/VALUE") + _texts(element, "*/COUNTRY")
+            yield SanctionsEntry(
+                source="un",
+                ref=(element.findtext("REFERENCE_NUMBER") or element.findtext("DATAID") or "").strip(),
+                name=name,
+                kind="individual" if element.tag == "INDIVIDUAL" else "entity",
+                aliases=_texts(element, "INDIVIDUAL_ALIAS/ALIAS_NAME") + _texts(element, "ENTITY_ALIAS/ALIAS_NAME"),
+                programs=_texts(element, "UN_LIST_TYPE"),
+                countries=sorted({country_code(value) for value in found}),
+            )
+        element.clear()
+
+
+def parse_eu(path: str) -> Iterator[SanctionsEntry]:
+    """EU consolidated financial sanctions CSV (``;``-separated, one row per name/address/etc.)."""
+    current: Optional[SanctionsEntry] = None
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        for row in csv.DictReader(handle, delimiter=";"):
+            logical_id = (row.get("Entity_LogicalId") or "").strip()
+            if not logical_id:
+                continue
+            if current is None or current.ref != logical_id:
+                if current is not None and current.name:
+                    yield current
+                current = SanctionsEntry(
+                    source="eu",
+                    ref=logical_id,
+                    name="",
+                    kind=(row.get("Entity_SubjectType_ClassificationCode") or "").strip() or "entity",
+                )
+            programme = (row.get("Entity_Regulation_Programme") or "").strip()
+            if programme and programme not in current.programs:
+                current.programs.append(programme)
+            whole_name = (row.get("NameAlias_WholeName") or "").strip()
+            if whole_name:
+                if not current.name:
+                    current.name = whole_name
+                elif whole_name != current.name and whole_name not in current.aliases:
+                    current.aliases.append(whole_name)
+            for column in ("Address_CountryDescription", "Citizenship_CountryDescription"):
+                value = (row.get(column) or "").strip()
+                if value and value.upper() != "UNKNOWN":
+                    code = country_code(value)
+                    if code not in current.countries:
+                        current.countries.append(code)
+    if current is not None and current.name:
+        yield current
+
+
+def _sniff(path: str) -> str:
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as handle:
+        head = handle.read(4096)
+    if "<CONSOLIDATED_LIST" in head:
+        return "un"
+    if "Entity_LogicalId" in head:
+        return "eu"
+    return ""
+
+
+def discover_sources(directory: str) -> Dict[str, Tuple[List[str], Callable[[], Iterable[SanctionsEntry]]]]:
+    """Lists found in ``directory``: source name -> (files, parser)."""
+    sources: Dict[str, Tuple[List[str], Callable[[], Iterable[SanctionsEntry]]]] = {}
+    if not os.path.isdir(directory):
+        return sources
+    names = {name.lower(): name for name in os.listdir(directory)}
+    if "sdn.csv" in names:
+        files = [os.path.join(directory, names[name]) for name in OFAC_FILES if name in names]
+        sources["ofac"] = (files, lambda: parse_ofac(directory))
+    for lower, name in sorted(names.items()):
+        if lower in OFAC_FILES or not lower.endswith((".xml", ".csv")):
+            continue
+        path = os.path.join(directory, name)
+        kind = _sniff(path)
+        parser = {"un": parse_un, "eu": parse_eu}.get(kind)
+        if parser is None:
+            continue
+        source = kind if kind not in sources else f"{kind}:{name}"
+        sources[source] = ([path], lambda path=path, parser=parser: parser(path))
+    return sources
+
+
+def _fingerprint(files: Sequence[str]) -> str:
+    parts = []
+    for path in files:
+        stat = os.stat(path)
+        parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _content_hash(files: Sequence[str]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SanctionsIndex:
+    """
+    Local restricted-party index over OFAC SDN, UN and EU consolidated lists.
+
+    List files dropped into ``lists_dir`` are compiled into SQLite: one row per listed
+    party, its names and aliases, and a trigram posting table for fuzzy matching.
+    ``refresh`` reloads only the lists whose files changed (by content hash).
+    ``screen`` scores names by Dice similarity of trigram sets, reading only the
+    postings of the query's trigrams.
+    """
+
+    def __init__(self, db_path: str, lists_dir: str):
+        self.db_path = db_path
+        self.lists_dir = lists_dir
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def refresh(self) -> Dict[str, str]:
+        """Brings the index in line with ``lists_dir``; returns each source's status."""
+        found = discover_sources(self.lists_dir)
+        with self._connect() as conn:
+            stored = {row["source"]: row for row in conn.execute("SELECT * FROM sanctions_sources")}
+        statuses: Dict[str, str] = {}
+        for source in stored.keys() - found.keys():
+            with self._connect() as conn:
+                self._delete_source(conn, source)
+            statuses[source] = "removed"
+        for source, (files, parser) in found.items():
+            fingerprint = _fingerprint(files)
+            previous = stored.get(source)
+            if previous is not None and previous["fingerprint"] == fingerprint:
+                statuses[source] = "unchanged"
+                continue
+            content_hash = _content_hash(files)
+            try:
+                status = self._update_source(source, parser, fingerprint, content_hash, previous)
+            except Exception as exc:
+                # A malformed list keeps its previous contents rather than emptying the index.
+                logger.error("Failed to load sanctions list %s: %s", source, exc)
+                status = "failed"
+            statuses[source] = status
+        return statuses
+
+    def _update_source(
+        self,
+        source: str,
+        parser: Callable[[], Iterable[SanctionsEntry]],
+        fingerprint: str,
+        content_hash: str,
+        previous: Optional[sqlite3.Row],
+    ) -> str:
+        with self._connect() as conn:
+            if previous is not None and previous["content_hash"] == content_hash:
+                # Touched but not changed (e.g. re-downloaded): remember the new stat only.
+                conn.execute("UPDATE sanctions_sources SET fingerprint = ? WHERE source = ?", (fingerprint, source))
+                return "unchanged"
+            count = self._load_source(conn, source, parser())
+            conn.execute(
+                "INSERT OR REPLACE INTO sanctions_sources (source, fingerprint, content_hash, entries, loaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source, fingerprint, content_hash, count, time.time()),
+            )
+        logger.info("Loaded %s sanctions entries from %s", count, source)
+        return "loaded"
+
+    def _delete_source(self, conn: sqlite3.Connection, source: str) -> None:
+        conn.execute(
+            "DELETE FROM sanctions_grams WHERE name_id IN (SELECT id FROM sanctions_names WHERE source = ?)", (source,)
+        )
+        for table in ("sanctions_names", "sanctions_countries", "sanctions_entries", "sanctions_sources"):
+            conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+
+    def _load_source(self, conn: sqlite3.Connection, source: str, entries: Iterable[SanctionsEntry]) -> int:
+        conn.execute("BEGIN IMMEDIATE")
+        self._delete_source(conn, source)
+        count = 0
+        for entry in entries:
+            entry_id = conn.execute(
+                "INSERT INTO sanctions_entries (source, ref, name, kind, programs, countries) VALUES (?, ?, ?, ?, ?, ?)",
+                (source, entry.ref, entry.name, entry.kind, json.dumps(entry.programs), json.dumps(entry.countries)),
+            ).lastrowid
+            for name in dict.fromkeys([entry.name] + entry.aliases):
+                grams = name_trigrams(normalize_name(name))
+                if not grams:
+                    continue
+                name_id = conn.execute(
+                    "INSERT INTO sanctions_names (entry_id, source, name, gram_count) VALUES (?, ?, ?, ?)",
+                    (entry_id, source, name, len(grams)),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO sanctions_grams (gram, name_id) VALUES (?, ?)",
+                    [(gram, name_id) for gram in grams],
+                )
+            conn.executemany(
+                "INSERT INTO sanctions_countries (country, entry_id, source, program) VALUES (?, ?, ?, ?)",
+                [(country, entry_id, source, program) for country in entry.countries for program in entry.programs or [""]],
+            )
+            count += 1
+        return count
+
+    def sources(self) -> Dict[str, Dict[str, Any]]:
+        with self._connect() as conn:
+            return {
+                row["source"]: {"entries": row["entries"], "loaded_at": row["loaded_at"]}
+                for row in conn.execute("SELECT source, entries, loaded_at FROM sanctions_sources")
+            }
+
+    def available(self) -> bool:
+        return bool(self.sources())
+
+    def screen(
+        self, names: Iterable[str], threshold: float = DEFAULT_THRESHOLD, limit: int = 5
+    ) -> Dict[str, List[SanctionsHit]]:
+        """Best matches (score >= ``threshold``) for each name, best first."""
+        results: Dict[str, List[SanctionsHit]] = {}
+        with self._connect() as conn:
+            for query in names:
+                if query in results:
+                    continue
+                results[query] = self._screen_one(conn, query, threshold, limit)
+        return results
+
+    def _screen_one(self, conn: sqlite3.Connection, query: str, threshold: float, limit: int) -> List[SanctionsHit]:
+        grams = name_trigrams(normalize_name(query))
+        if not grams:
+            return []
+        # Dice >= t needs at least t * |A| / (2 - t) shared trigrams, whatever the other name's length.
+        min_common = max(1, math.ceil(threshold * len(grams) / (2 - threshold)))
+        placeholders = ", ".join("?" for _ in grams)
+        rows = conn.execute(
+            f"""
+            SELECT n.id, n.name, n.gram_count, COUNT(*) AS common,
+                   e.source, e.ref, e.name AS listed_name, e.kind, e.programs, e.countries
+            FROM sanctions_grams g
+            JOIN sanctions_names n ON n.id = g.name_id
+            JOIN sanctions_entries e ON e.id = n.entry_id
+            WHERE g.gram IN ({placeholders})
+            GROUP BY g.name_id
+            HAVING common >= ?
+            """,
+            [*grams, min_common],
+        ).fetchall()
+        best: Dict[Tuple[str, str], SanctionsHit] = {}
+        for row in rows:
+            score = round(2 * row["common"] / (len(grams) + row["gram_count"]), 3)
+            if score < threshold:
+                continue
+            key = (row["source"], row["ref"])
+            if key in best and best[key].score >= score:
+                continue
+            best[key] = SanctionsHit(
+                query=query,
+                name=row["name"],
+                listed_name=row["listed_name"],
+                source=row["source"],
+                ref=row["ref"],
+                kind=row["kind"],
+                programs=json.loads(row["programs"]),
+                countries=json.loads(row["countries"]),
+                score=score,
+            )
+        return sorted(best.values(), key=lambda hit: -hit.score)[:limit]
+
+    def country_exposure(self, code: str) -> Dict[str, Any]:
+        """
+        Listed parties located in (or nationals of) the country, and the programs that
+        target it: those named after it, or where most of the program's located
+        parties are in it.
+        """
+        code = (code or "").upper()
+        with self._connect() as conn:
+            listed = {
+                row["source"]: row["entries"]
+                for row in conn.execute(
+                    "SELECT source, COUNT(DISTINCT entry_id) AS entries FROM sanctions_countries "
+                    "WHERE country = ? GROUP BY source",
+                    (code,),
+                )
+            }
+            program_rows = conn.execute(
+                """
+                SELECT source, program, COUNT(DISTINCT entry_id) AS located,
+                       COUNT(DISTINCT CASE WHEN country = ? THEN entry_id END) AS here
+                FROM sanctions_countries WHERE program != '' GROUP BY source, program
+                """,
+                (code,),
+            ).fetchall()
+        names = _country_tokens(code)
+        programs = []
+        for row in program_rows:
+            named = bool(names & set(normalize_name(row["program"]).split()))
+            dominant = row["located"] >= PROGRAM_MIN_ENTRIES and row["here"] / row["located"] >= PROGRAM_COUNTRY_SHARE
+            if row["here"] and (named or dominant):
+                programs.append(f"{row['source']}:{row['program']}")
+        return {
+            "country_code": code,
+            "listed_entries": sum(listed.values()),
+            "listed_by_source": listed,
+            "programs": sorted(programs),
+        }
+
+
+def _country_tokens(code: str) -> Set[str]:
+    country = pycountry.countries.get(alpha_2=code)
+    if country is None:
+        return PROGRAM_COUNTRY_ALIASES.get(code, set())
+    # Not alpha-2: two-letter codes collide with words in program names ("AL" in "Al-Qaida").
+    tokens = {country.alpha_3.lower()} | PROGRAM_COUNTRY_ALIASES.get(code, set())
+    for attribute in ("name", "common_name", "official_name"):
+        value = getattr(country, attribute, None)
+        if value:
+            tokens.add(normalize_name(value.split(",")[0]))
+            tokens.update(token for token in normalize_name(value).split() if len(token) > 3)
+    tokens -= {"republic", "islamic", "democratic", "people", "peoples", "kingdom", "state", "federation", "united", "arab"}
+    return tokens
+
+
+def evidence_phrases(evidence: Iterable[Any], limit: int = MAX_EVIDENCE_PHRASES) -> List[str]:
+    """Capitalized multi-word phrases from evidence titles: candidate organization and person names."""
+    phrases: Dict[str, None] = {}
+    for item in evidence:
+        for match in _PHRASE.finditer(str(item.get("title") or "")):
+            phrases.setdefault(match.group(0).strip(" .-'"), None)
+            if len(phrases) >= limit:
+                return list(phrases)
+    return list(phrases)
+
+
+def screen_subject(
+    index: Optional[SanctionsIndex], country: str = "", names: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """
+    Sanctions summary for scoring: country exposure plus hits for ``names``
+    (non-country targets, partners). ``{"available": False}`` without an index.
+    """
+    if index is None or not index.available():
+        return {"available": False}
+    hits = [hit.to_dict() for matches in index.screen(names).values() for hit in matches]
+    return {
+        "available": True,
+        "sources": index.sources(),
+        "country": index.country_exposure(country) if country else {},
+        "entity_hits": hits,
+        "evidence_hits": [],
+    }
+
+
+def screen_evidence(index: Optional[SanctionsIndex], sanctions: Dict[str, Any], evidence: Iterable[Any]) -> Dict[str, Any]:
+    """Adds hits for names mentioned in evidence titles to a ``screen_subject`` summary."""
+    if index is None or not sanctions.get("available"):
+        return sanctions
+    matches = index.screen(evidence_phrases(evidence), threshold=EVIDENCE_THRESHOLD, limit=1)
+    hits = [hit.to_dict() for found in matches.values() for hit in found]
+    return {**sanctions, "evidence_hits": hits}
+
+
+def sanctions_lists_dir() -> str:
+    return os.getenv("OSINT_SANCTIONS_DIR") or default_cache_path("sanctions")
+
+
+_default_index: Optional[SanctionsIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_sanctions_index() -> SanctionsIndex:
+    """Shared index, refreshed from the lists directory on each call (unchanged lists cost a stat)."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SanctionsIndex(default_cache_path("sanctions.sqlite3"), sanctions_lists_dir())
+        try:
+            _default_index.refresh()
+        except Exception as exc:
+            logger.error("Failed to refresh sanctions index: %s", exc)
+        return _default_index
+
+
+def _reset_default_index() -> None:
+    global _default_index
+    with _default_index_lock:
+        _default_index = None
+
+
+register_default_store(_reset_default_index)
@@ -1,5 +1,5 @@
 import math
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
 
 from models.subject import Subject
 from models.scoring_config import ScoringConfig
@@ -12,29 +12,121 @@ def _log_score(value: float, min_log: float, max_log: float) -> int:
     return max(0, min(100, int(score * 100)))
 
 
+def _indicator_score(distributions: Any, indicator: str, value: float, min_log: float, max_log: float) -> int:
+    """
+    The value's percentile rank among all countries when ``distributions`` has a table
+    for the indicator, otherwise its position between the log bounds.
+    """
+    if value <= 0:
+        return 0
+    percentile = distributions.percentile(indicator, value) if distributions is not None else None
+    if percentile is None:
+        return _log_score(value, min_log, max_log)
+    return int(round(percentile))
+
+
+class EvidenceTally:
+    """
+    Running counts over an evidence stream: everything scoring needs from the
+    evidence, without keeping the items. Feed it as items arrive and score at any point.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.sources = {"news": 0, "trade": 0, "policy": 0, "tender": 0, "official": 0, "other": 0}
+
+    @classmethod
+    def from_evidence(cls, evidence: Iterable[Any]) -> "EvidenceTally":
+        tally = cls()
+        tally.extend(evidence)
+        return tally
+
+    def add(self, item: Any) -> None:
+        self.count += 1
+        signal_type = (item.get("signal_type") or "").lower()
+        quality = (item.get("quality") or "").lower()
+        if signal_type.startswith("trade:"):
+            self.sources["trade"] += 1
+        elif signal_type.startswith("policy:"):
+            self.sources["policy"] += 1
+        elif signal_type == "news":
+            self.sources["news"] += 1
+        elif signal_type == "tender":
+            self.sources["tender"] += 1
+        else:
+            self.sources["other"] += 1
+        if quality == "official":
+            self.sources["official"] += 1
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.add(item)
+
+
 def score_subject(
     subject: Subject,
     macro: Dict[str, Any],
     evidence: List[Dict[str, Any]],
     trade_signals: Dict[str, Any],
     config: ScoringConfig,
+    sanctions: Optional[Dict[str, Any]] = None,
+    distributions: Any = None,
+) -> Dict[str, Any]:
+    return score_tally(
+        subject, macro, EvidenceTally.from_evidence(evidence), trade_signals, config, sanctions, distributions
+    )
+
+
+def score_tally(
+    subject: Subject,
+    macro: Dict[str, Any],
+    tally: EvidenceTally,
+    trade_signals: Dict[str, Any],
+    config: ScoringConfig,
+    sanctions: Optional[Dict[str, Any]] = None,
+    distributions: Any = None,
 ) -> Dict[str, Any]:
+    """
+    ``score_subject`` from running evidence counts; used for partial scores while collecting.
+
+    With ``distributions`` (``services.indicator_distributions``), GDP, population and
+    import volume score as percentile ranks across countries instead of log bounds.
+    """
     if not isinstance(config, ScoringConfig):
         config = ScoringConfig(**config)
     gdp = macro.get("gdp") or 0
     population = macro.get("population") or 0
 
     market_demand = int(
-        0.6 * _log_score(gdp, min_log=9, max_log=14)
-        + 0.4 * _log_score(population, min_log=6, max_log=10)
+        0.6 * _indicator_score(distributions, "NY.GDP.MKTP.CD", gdp, min_log=9, max_log=14)
+        + 0.4 * _indicator_score(distributions, "SP.POP.TOTL", population, min_log=6, max_log=10)
     )
-
-    signal_count = len(evidence)
+    # With product-level flows from the local trade store, demand for the subject's HS
+    # codes outweighs the economy-wide proxies.
+    product_imports = trade_signals.get("HS.IMPORTS", {}).get("value") or 0
+    if product_imports:
+        growth = trade_signals.get("HS.IMPORTS.GROWTH", {}).get("value")
+        product_demand = 0.7 * _log_score(product_imports, min_log=5, max_log=9) + 0.3 * _growth_score(growth)
+        market_demand = int(0.4 * market_demand + 0.6 * product_demand)
+    # Supply-chain targets have no country macro: demand is the focus country's product
+    # imports when there is one, otherwise the product's world market.
+    world_imports = trade_signals.get("SC.WORLD.IMPORTS", {}).get("value") or 0
+    supply_chain = bool(world_imports) and not gdp
+    if supply_chain:
+        market_demand = int(product_demand) if product_imports else _log_score(world_imports, min_log=7, max_log=12)
+
+    signal_count = tally.count
     signal_score = min(100, signal_count * 5)
 
     import_value = trade_signals.get("NE.IMP.GNFS.CD", {}).get("value") or 0
-    trade_ease = int(0.5 * _log_score(import_value, min_log=9, max_log=13) + 0.5 * 50)
-    political_risk = 50
+    trade_ease = int(
+        0.5 * _indicator_score(distributions, "NE.IMP.GNFS.CD", import_value, min_log=9, max_log=13) + 0.5 * 50
+    )
+    # Diversified supply, counting indirect dependencies, makes sourcing easier.
+    supply_concentration = trade_signals.get("SC.SUPPLIER.CONCENTRATION", {}).get("value")
+    if supply_concentration is not None:
+        trade_ease = int(0.5 * 100 * (1 - supply_concentration) + 0.5 * 50)
+    political_risk = _political_risk(sanctions)
     financial_viability = int(0.5 * market_demand + 0.5 * signal_score)
     strategic_fit = 50
 
@@ -47,15 +139,32 @@ def score_subject(
         + weights.get("strategic_fit", 0) * strategic_fit
     )
 
-    rationale = (
-        "Score is based on macro demand signals (GDP/population) and the volume of recent "
-        "open-source evidence. Trade ease incorporates import volume. Political risk and "
-        "strategic fit are neutral defaults until more data sources are integrated."
+    if sanctions and sanctions.get("available"):
+        risk_note = (
+            "Political risk reflects sanctions programs targeting the country and sanctioned "
+            "parties matched in the subject and evidence. Strategic fit is a neutral default."
+        )
+    else:
+        risk_note = (
+            "Political risk and strategic fit are neutral defaults until more data sources are integrated."
+        )
+    demand_note = (
+        "Market demand combines macro signals (GDP/population) with imports and import growth "
+        "for the subject's HS codes. "
+        if product_imports
+        else "Score is based on macro demand signals (GDP/population) and the volume of recent open-source evidence. "
     )
-
-    confidence = _calculate_confidence(macro, trade_signals, evidence)
-    confidence_breakdown = _confidence_breakdown(macro, trade_signals, evidence)
-    confidence_sources = _confidence_sources(evidence)
+    trade_note = "Trade ease incorporates import volume. "
+    if supply_chain:
+        demand_note = "Market demand reflects imports of the subject's HS codes from the trade-flow graph. "
+        trade_note = "Trade ease reflects how concentrated their supply is, including indirect dependencies. "
+    elif distributions is not None and distributions.table("NY.GDP.MKTP.CD") is not None:
+        demand_note += "GDP, population and import volume are percentile ranks across countries. "
+    rationale = demand_note + trade_note + risk_note
+
+    confidence = _calculate_confidence(macro, trade_signals, tally)
+    confidence_breakdown = _confidence_breakdown(macro, trade_signals, tally)
+    confidence_sources = dict(tally.sources)
 
     return {
         "overall_score": overall,
@@ -75,10 +184,34 @@ def score_subject(
     }
 
 
+def _growth_score(growth_pct: Optional[float]) -> int:
+    """0-100 with flat imports at 50; a CAGR of +/-25% saturates."""
+    if growth_pct is None:
+        return 50
+    return max(0, min(100, int(50 + 2 * growth_pct)))
+
+
+def _political_risk(sanctions: Optional[Dict[str, Any]]) -> int:
+    """
+    Higher is safer. Neutral without a sanctions index; otherwise starts high and drops
+    for each program targeting the country, the number of listed parties located there,
+    and each sanctioned party matched in the subject or evidence.
+    """
+    if not sanctions or not sanctions.get("available"):
+        return 50
+    country = sanctions.get("country") or {}
+    score = 85
+    score -= 20 * min(3, len(country.get("programs") or []))
+    score -= min(20, int(5 * math.log2(1 + (country.get("listed_entries") or 0))))
+    hits = len(sanctions.get("entity_hits") or []) + len(sanctions.get("evidence_hits") or [])
+    score -= min(30, 10 * hits)
+    return max(0, min(100, score))
+
+
 def _calculate_confidence(
     macro: Dict[str, Any],
     trade_signals: Dict[str, Any],
-    evidence: List[Dict[str, Any]],
+    tally: EvidenceTally,
 ) -> int:
     score = 0
     if macro.get("gdp"):
@@ -89,11 +222,11 @@ def _calculate_confidence(
         score += 20
     if trade_signals.get("TM.VAL.MRCH.CD.WT", {}).get("value"):
         score += 10
-    if len(evidence) >= 5:
+    if tally.count >= 5:
         score += 20
-    elif len(evidence) >= 1:
+    elif tally.count >= 1:
         score += 10
-    source_types = _confidence_sources(evidence)
+    source_types = tally.sources
     if source_types.get("news", 0) >= 5:
         score += 10
     if source_types.get("trade", 0) >= 2:
@@ -106,32 +239,13 @@ def _calculate_confidence(
 def _confidence_breakdown(
     macro: Dict[str, Any],
     trade_signals: Dict[str, Any],
-    evidence: List[Dict[str, Any]],
+    tally: EvidenceTally,
 ) -> Dict[str, Any]:
     return {
         "has_gdp": bool(macro.get("gdp")),
         "has_population": bool(macro.get("population")),
         "has_imports_goods_services": bool(trade_signals.get("NE.IMP.GNFS.CD", {}).get("value")),
         "has_merch_imports": bool(trade_signals.get("TM.VAL.MRCH.CD.WT", {}).get("value")),
-        "evidence_count": len(evidence),
+        "evidence_count": tally.count,
     }
 
-
-def _confidence_sources(evidence: List[Dict[str, Any]]) -> Dict[str, int]:
-    counts = {"news": 0, "trade": 0, "policy": 0, "tender": 0, "official": 0, "other": 0}
-    for item in evidence:
-        signal_type = (item.get("signal_type") or "").lower()
-        quality = (item.get("quality") or "").lower()
-        if signal_type.startswith("trade:"):
-            counts["trade"] += 1
-        elif signal_type.startswith("policy:"):
-            counts["policy"] += 1
-        elif signal_type == "news":
-            counts["news"] += 1
-        elif signal_type == "tender":
-            counts["tender"] += 1
-        else:
-            counts["other"] += 1
-        if quality == "official":
-            counts["official"] += 1
-    return counts
@@ -1,3 +1,5 @@
+from typing import Any, Dict, Iterator, Tuple
+
 from services.data_collector import DataCollector
 from services.gemini_service import GeminiService, GeminiConfigurationError
 import logging
@@ -13,30 +15,43 @@ class ScoringEngine:
             logger.error(str(e))
             self.gemini_service = None
 
-    def score_country(self, country_code: str, country_name: str):
-        # 1. Collect Data
-        data = self.data_collector.get_country_data(country_code)
+    def iter_score_country(self, country_code: str, country_name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yields ``(stage, payload)`` for each step of the Gemini analysis:
+        data, news, analysis, analysis_persian and finally the combined result.
+        """
+        if not self.gemini_service:
+            raise GeminiConfigurationError("Gemini service not configured.")
+
         # 1. Collect Data
         data = self.data_collector.get_country_data(country_code)
-        
+        yield "data", {"data": dict(data)}
+
         # Collect News
         news = self.data_collector.get_regional_news(country_name)
         data["news"] = news
-        
-        if not self.gemini_service:
-            raise GeminiConfigurationError("Gemini service not configured.")
+        yield "news", {"news": news}
+
         # 2. Analyze with Gemini
         analysis = self.gemini_service.analyze_market(country_name, data)
-        
+        yield "analysis", {"analysis": analysis}
+
         # 3. Translate to Persian for Iranian users
         analysis_persian = self.gemini_service.translate_to_persian(analysis, country_name)
-        
+        yield "analysis_persian", {"analysis_persian": analysis_persian}
+
         # 4. Combine results
-        result = {
+        yield "result", {
             "country": country_name,
             "country_code": country_code,
             "data": data,
             "analysis": analysis,
             "analysis_persian": analysis_persian
         }
+
+    def score_country(self, country_code: str, country_name: str):
+        result = {}
+        for stage, payload in self.iter_score_country(country_code, country_name):
+            if stage == "result":
+                result = payload
         return result
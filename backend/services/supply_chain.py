@@ -0,0 +1,265 @@
+"""
+Supply-chain analysis of one product over the whole bilateral trade graph.
+
+The product's flows from the local trade store (``services.trade_store``) become
+a weighted adjacency matrix, ``weights[i, j]`` being country i's imports from
+country j. A single pass over that matrix gives, for every country at once:
+
+- upstream: supplier shares of its imports and their concentration (HHI)
+- downstream: buyer shares of its exports and their concentration
+- multi-hop: supplier shares once indirect dependencies are included. A
+  supplier's own suppliers count with their share of its imports, damped by
+  ``DEPENDENCY_DAMPING`` per hop because part of what a country exports is
+  produced at home. That is ``S + aS^2 + a^2S^3 + ... = (I - aS)^-1 S`` for the
+  import-share matrix S, solved as one linear system.
+
+The matrix is a SciPy CSR matrix when SciPy is installed and a dense NumPy array
+otherwise; with ~250 trading countries either takes milliseconds.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pycountry
+
+from services.trade_store import get_trade_store, normalize_hs_codes
+
+try:
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import spsolve
+except ImportError:  # pragma: no cover - optional dependency
+    sp = None
+
+logger = logging.getLogger(__name__)
+
+# Target types analysed as a product's supply chain rather than a country market.
+SUPPLY_CHAIN_TARGETS = ("supply_chain", "sector", "product")
+# Weight of each further hop in multi-hop dependency (0: direct suppliers only).
+DEPENDENCY_DAMPING = 0.5
+TOP_PARTNERS = 5
+TOP_COUNTRIES = 10
+# Importers below this share of world imports are left out of the "most exposed" ranking.
+MIN_IMPORT_SHARE = 0.005
+
+
+def _shares(values: np.ndarray) -> np.ndarray:
+    total = values.sum()
+    return values / total if total > 0 else np.zeros_like(values)
+
+
+def _inverse(values: np.ndarray) -> np.ndarray:
+    return np.divide(1.0, values, out=np.zeros_like(values, dtype=float), where=values > 0)
+
+
+def _country_name(code: str) -> str:
+    country = pycountry.countries.get(alpha_2=code)
+    return country.name if country else code
+
+
+class TradeGraph:
+    """One product's bilateral flows; ``weights[i, j]`` is country i's imports from country j."""
+
+    def __init__(self, countries: List[str], weights: Any):
+        self.countries = countries
+        self.weights = weights
+        self.index = {country: position for position, country in enumerate(countries)}
+
+    @property
+    def sparse(self) -> bool:
+        return sp is not None and sp.issparse(self.weights)
+
+    @classmethod
+    def from_arrays(cls, reporters: Sequence[str], partners: Sequence[str], values: Sequence[float]) -> "TradeGraph":
+        reporters = np.asarray(reporters, dtype=object)
+        partners = np.asarray(partners, dtype=object)
+        values = np.asarray(values, dtype=float)
+        # Re-imports of a country's own goods are not a dependency.
+        keep = (reporters != partners) & (values > 0)
+        countries, positions = np.unique(np.concatenate([reporters[keep], partners[keep]]), return_inverse=True)
+        rows, cols = np.split(positions, 2)
+        size = len(countries)
+        if sp is not None:
+            # Duplicate (reporter, partner) pairs, e.g. several HS6 lines, are summed.
+            weights = sp.csr_matrix((values[keep], (rows, cols)), shape=(size, size))
+        else:
+            weights = np.zeros((size, size))
+            np.add.at(weights, (rows, cols), values[keep])
+        return cls([str(country) for country in countries], weights)
+
+    def analyze(self, damping: float = DEPENDENCY_DAMPING) -> "SupplyChainAnalysis":
+        weights = self.weights
+        size = len(self.countries)
+        imports = np.asarray(weights.sum(axis=1), dtype=float).ravel()
+        exports = np.asarray(weights.sum(axis=0), dtype=float).ravel()
+        if self.sparse:
+            supplier_shares = sp.diags(_inverse(imports)) @ weights
+            buyer_shares = weights @ sp.diags(_inverse(exports))
+            dependency = spsolve((sp.identity(size) - damping * supplier_shares).tocsc(), supplier_shares.tocsc())
+            supplier_shares = supplier_shares.toarray()
+            buyer_shares = buyer_shares.toarray()
+            dependency = dependency.toarray() if sp.issparse(dependency) else np.asarray(dependency)
+        else:
+            supplier_shares = weights * _inverse(imports)[:, None]
+            buyer_shares = weights * _inverse(exports)[None, :]
+            dependency = np.linalg.solve(np.eye(size) - damping * supplier_shares, supplier_shares)
+        dependency = dependency.reshape(size, size)
+        # Chains that lead back to the importer itself are not a foreign dependency.
+        np.fill_diagonal(dependency, 0.0)
+        effective_shares = dependency * _inverse(dependency.sum(axis=1))[:, None]
+        return SupplyChainAnalysis(self.countries, imports, exports, supplier_shares, buyer_shares, effective_shares)
+
+
+class SupplyChainAnalysis:
+    """Per-country exposure and concentration for one product, from ``TradeGraph.analyze``."""
+
+    def __init__(
+        self,
+        countries: List[str],
+        imports: np.ndarray,
+        exports: np.ndarray,
+        supplier_shares: np.ndarray,
+        buyer_shares: np.ndarray,
+        effective_shares: np.ndarray,
+    ):
+        self.countries = countries
+        self.index = {country: position for position, country in enumerate(countries)}
+        self.imports = imports
+        self.exports = exports
+        self.supplier_shares = supplier_shares
+        self.buyer_shares = buyer_shares
+        self.effective_shares = effective_shares
+        self.import_hhi = (supplier_shares ** 2).sum(axis=1)
+        self.export_hhi = (buyer_shares ** 2).sum(axis=0)
+        self.effective_hhi = (effective_shares ** 2).sum(axis=1)
+        world_import_shares = _shares(imports)
+        # Share of world imports that depends on each supplier, directly or through intermediaries.
+        self.systemic_dependency = world_import_shares @ effective_shares
+        self.world_imports = float(imports.sum())
+        self.world_import_shares = world_import_shares
+
+    def _top(self, shares: np.ndarray, limit: int = TOP_PARTNERS) -> List[Dict[str, Any]]:
+        order = np.argsort(-shares, kind="stable")[:limit]
+        return [
+            {"country": self.countries[position], "share": round(float(shares[position]), 4)}
+            for position in order
+            if shares[position] > 0
+        ]
+
+    def profile(self, country_code: str) -> Optional[Dict[str, Any]]:
+        """Upstream, downstream and multi-hop exposure of one country, or None if it does not trade the product."""
+        position = self.index.get(country_code.upper())
+        if position is None:
+            return None
+        return {
+            "country_code": self.countries[position],
+            "country_name": _country_name(self.countries[position]),
+            "imports": round(float(self.imports[position]), 2),
+            "exports": round(float(self.exports[position]), 2),
+            "upstream": {
+                "suppliers": self._top(self.supplier_shares[position]),
+                "concentration": round(float(self.import_hhi[position]), 4),
+            },
+            "downstream": {
+                "buyers": self._top(self.buyer_shares[:, position]),
+                "concentration": round(float(self.export_hhi[position]), 4),
+            },
+            "multi_hop": {
+                "suppliers": [
+                    {**row, "direct_share": round(float(self.supplier_shares[position, self.index[row["country"]]]), 4)}
+                    for row in self._top(self.effective_shares[position])
+                ],
+                "concentration": round(float(self.effective_hhi[position]), 4),
+            },
+        }
+
+    def summary(self, focus: Optional[str] = None, limit: int = TOP_COUNTRIES) -> Dict[str, Any]:
+        suppliers = np.argsort(-self.exports, kind="stable")[:limit]
+        export_shares = _shares(self.exports)
+        exposed = [
+            position
+            for position in np.argsort(-self.effective_hhi, kind="stable")
+            if self.world_import_shares[position] >= MIN_IMPORT_SHARE
+        ][:limit]
+        return {
+            "countries": len(self.countries),
+            "world_imports": round(self.world_imports, 2),
+            # HHI of world supply, by direct exports and by multi-hop dependency.
+            "supplier_concentration": round(float((export_shares ** 2).sum()), 4),
+            "effective_supplier_concentration": round(float((self.systemic_dependency ** 2).sum()), 4),
+            "top_suppliers": [
+                {
+                    "country": self.countries[position],
+                    "exports": round(float(self.exports[position]), 2),
+                    "share": round(float(export_shares[position]), 4),
+                    "systemic_dependency": round(float(self.systemic_dependency[position]), 4),
+                }
+                for position in suppliers
+                if self.exports[position] > 0
+            ],
+            "most_exposed_importers": [
+                {
+                    "country": self.countries[position],
+                    "import_share": round(float(self.world_import_shares[position]), 4),
+                    "concentration": round(float(self.import_hhi[position]), 4),
+                    "multi_hop_concentration": round(float(self.effective_hhi[position]), 4),
+                }
+                for position in exposed
+            ],
+            "focus": self.profile(focus) if focus else None,
+        }
+
+
+def build_trade_graph(hs_codes: Sequence[str], year: Optional[int] = None, store: Any = None) -> Optional[TradeGraph]:
+    """The product's graph for ``year`` (default: latest on file), or None without matching flows."""
+    store = store or get_trade_store()
+    codes = normalize_hs_codes(hs_codes)
+    years = store.years()
+    if not codes or not years:
+        return None
+    year = year or years[-1]
+    flows = store.query(None, codes, years=[year], columns=("reporter", "partner", "value_usd"))
+    if not flows.num_rows:
+        return None
+    return TradeGraph.from_arrays(
+        flows["reporter"].to_numpy(zero_copy_only=False),
+        flows["partner"].to_numpy(zero_copy_only=False),
+        flows["value_usd"].to_numpy(zero_copy_only=False),
+    )
+
+
+def analyze_supply_chain(
+    hs_codes: Sequence[str], focus: Optional[str] = None, year: Optional[int] = None, store: Any = None
+) -> Dict[str, Any]:
+    """Whole-graph summary for the HS codes, with ``focus`` country's profile; empty without data."""
+    store = store or get_trade_store()
+    if not hs_codes or not store.available():
+        return {}
+    year = year or store.years()[-1]
+    graph = build_trade_graph(hs_codes, year=year, store=store)
+    if graph is None:
+        return {}
+    summary = graph.analyze().summary(focus=focus)
+    return {
+        "hs_codes": normalize_hs_codes(hs_codes),
+        "year": year,
+        "method": "sparse" if graph.sparse else "dense",
+        **summary,
+    }
+
+
+def supply_chain_signals(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """The headline numbers as trade signals, so they reach evidence and scoring like other indicators."""
+    if not analysis:
+        return {}
+    codes = ", ".join(analysis["hs_codes"])
+    return {
+        "SC.WORLD.IMPORTS": {
+            "label": f"World imports of HS {codes} (US$, {analysis['year']})",
+            "value": analysis["world_imports"],
+        },
+        "SC.SUPPLIER.CONCENTRATION": {
+            "label": f"Concentration of world supply of HS {codes}, incl. indirect dependencies (HHI)",
+            "value": analysis["effective_supplier_concentration"],
+        },
+    }
@@ -0,0 +1,301 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+_current_trace: ContextVar[Optional["RunTrace"]] = ContextVar("osint_run_trace", default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar("osint_run_span", default=None)
+
+
+def _empty_http_stats() -> Dict[str, float]:
+    return {"requests": 0, "errors": 0, "retries": 0, "bytes": 0, "duration_ms": 0.0}
+
+
+def _empty_cache_stats() -> Dict[str, float]:
+    return {"hits": 0, "misses": 0, "writes": 0, "io_ms": 0.0}
+
+
+def _empty_usage_stats() -> Dict[str, float]:
+    return {"calls": 0, "cache_hits": 0, "blocked": 0, "cost": 0.0}
+
+
+class RunTrace:
+    """
+    Collects wall time per stage, upstream HTTP traffic and cache hit rates for one run.
+
+    Instrumented code (``HttpClient``, ``SimpleFileCache``, collectors) reports to the
+    trace that is active in the current context, so nothing has to be passed through
+    call signatures. Activate it with ``stage()``/``span()`` or ``activate()``.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, user: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.user = user
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.http: Dict[str, Dict[str, float]] = {}
+        self.cache: Dict[str, Dict[str, float]] = {}
+        self.usage: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["RunTrace"]:
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        start = time.perf_counter()
+        with self._lock:
+            record = {
+                "id": len(self.spans),
+                "parent": _current_span.get() if _current_trace.get() is self else None,
+                "name": name,
+                "start_ms": round((start - self._origin) * 1000, 3),
+                "duration_ms": None,
+                "attributes": dict(attributes),
+            }
+            self.spans.append(record)
+        trace_token = _current_trace.set(self)
+        span_token = _current_span.set(record["id"])
+        try:
+            yield record
+        except Exception as exc:
+            record["attributes"]["error"] = str(exc)
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    def stage(self, name: str) -> Any:
+        """Top-level pipeline stage; a span tagged so exporters can tell stages apart."""
+        return self.span(name, kind="stage")
+
+    def record_http(self, host: str, duration_seconds: float, size_bytes: int, retries: int, error: bool) -> None:
+        with self._lock:
+            stats = self.http.setdefault(host, _empty_http_stats())
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += retries
+            stats["bytes"] += size_bytes
+            stats["duration_ms"] = round(stats["duration_ms"] + duration_seconds * 1000, 3)
+
+    def record_cache(self, cache_name: str, event: str, io_seconds: float) -> None:
+        with self._lock:
+            stats = self.cache.setdefault(cache_name, _empty_cache_stats())
+            stats[event] += 1
+            stats["io_ms"] = round(stats["io_ms"] + io_seconds * 1000, 3)
+
+    def record_usage(self, api: str, calls: int, cache_hits: int, blocked: int, cost: float) -> None:
+        with self._lock:
+            stats = self.usage.setdefault(api, _empty_usage_stats())
+            stats["calls"] += calls
+            stats["cache_hits"] += cache_hits
+            stats["blocked"] += blocked
+            stats["cost"] = round(stats["cost"] + cost, 6)
+
+    def usage_summary(self) -> Dict[str, Any]:
+        """Paid API calls made by this run and their estimated cost."""
+        with self._lock:
+            apis = {api: dict(stats) for api, stats in self.usage.items()}
+        return {
+            "user": self.user,
+            "apis": apis,
+            "calls": sum(stats["calls"] for stats in apis.values()),
+            "cost": round(sum(stats["cost"] for stats in apis.values()), 6),
+        }
+
+    def stage_durations(self) -> Dict[str, float]:
+        return {
+            span["name"]: span["duration_ms"]
+            for span in self.spans
+            if span["attributes"].get("kind") == "stage" and span["duration_ms"] is not None
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "total_ms": round((time.perf_counter() - self._origin) * 1000, 3),
+                "stages": self.stage_durations(),
+                "spans": [dict(span, attributes=dict(span["attributes"])) for span in self.spans],
+                "http": {host: dict(stats) for host, stats in self.http.items()},
+                "cache": {name: dict(stats) for name, stats in self.cache.items()},
+            }
+
+
+def current_trace() -> Optional[RunTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Opens a child span on the active trace, or does nothing when no trace is active."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, **attributes) as record:
+        yield record
+
+
+def record_http(host: str, duration_seconds: float, size_bytes: int = 0, retries: int = 0, error: bool = False) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record_http(host, duration_seconds, size_bytes, retries, error)
+    METRICS.record_http(host, duration_seconds, size_bytes, retries, error)
+
+
+def record_cache(cache_name: str, event: str, io_seconds: float = 0.0) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record_cache(cache_name, event, io_seconds)
+    METRICS.record_cache(cache_name, event, io_seconds)
+
+
+class MetricsRegistry:
+    """Process-wide cumulative counters, exposed in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.http: Dict[str, Dict[str, float]] = {}
+        self.cache: Dict[str, Dict[str, float]] = {}
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.runs = 0
+
+    def record_http(self, host: str, duration_seconds: float, size_bytes: int, retries: int, error: bool) -> None:
+        with self._lock:
+            stats = self.http.setdefault(host, _empty_http_stats())
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += retries
+            stats["bytes"] += size_bytes
+            stats["duration_ms"] += duration_seconds * 1000
+
+    def record_cache(self, cache_name: str, event: str, io_seconds: float) -> None:
+        with self._lock:
+            stats = self.cache.setdefault(cache_name, _empty_cache_stats())
+            stats[event] += 1
+            stats["io_ms"] += io_seconds * 1000
+
+    def observe_run(self, trace: RunTrace) -> None:
+        with self._lock:
+            self.runs += 1
+            for name, duration_ms in trace.stage_durations().items():
+                stats = self.stages.setdefault(name, {"count": 0, "duration_ms": 0.0})
+                stats["count"] += 1
+                stats["duration_ms"] += duration_ms
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP osint_runs_total Completed OSINT pipeline runs.",
+                "# TYPE osint_runs_total counter",
+                f"osint_runs_total {self.runs}",
+            ]
+            lines.extend(_stage_metrics(self.stages))
+            lines.extend(_http_metrics(self.http))
+            lines.extend(_cache_metrics(self.cache))
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _stage_metrics(stages: Dict[str, Dict[str, float]]) -> List[str]:
+    lines = [
+        "# HELP osint_stage_seconds_total Wall time spent per pipeline stage.",
+        "# TYPE osint_stage_seconds_total counter",
+    ]
+    for name, stats in sorted(stages.items()):
+        lines.append(f'osint_stage_seconds_total{{stage="{_label(name)}"}} {stats["duration_ms"] / 1000:.6f}')
+    lines.extend(["# HELP osint_stage_runs_total Pipeline stage executions.", "# TYPE osint_stage_runs_total counter"])
+    for name, stats in sorted(stages.items()):
+        lines.append(f'osint_stage_runs_total{{stage="{_label(name)}"}} {stats["count"]}')
+    return lines
+
+
+def _http_metrics(http: Dict[str, Dict[str, float]]) -> List[str]:
+    lines = []
+    for metric, key, help_text in (
+        ("osint_http_requests_total", "requests", "Upstream HTTP requests."),
+        ("osint_http_errors_total", "errors", "Upstream HTTP requests that failed."),
+        ("osint_http_retries_total", "retries", "Retries performed by the HTTP adapter."),
+        ("osint_http_response_bytes_total", "bytes", "Response bytes received."),
+    ):
+        lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"])
+        for host, stats in sorted(http.items()):
+            lines.append(f'{metric}{{host="{_label(host)}"}} {int(stats[key])}')
+    lines.extend(
+        [
+            "# HELP osint_http_seconds_total Time spent waiting on upstream HTTP.",
+            "# TYPE osint_http_seconds_total counter",
+        ]
+    )
+    for host, stats in sorted(http.items()):
+        lines.append(f'osint_http_seconds_total{{host="{_label(host)}"}} {stats["duration_ms"] / 1000:.6f}')
+    return lines
+
+
+def _cache_metrics(cache: Dict[str, Dict[str, float]]) -> List[str]:
+    lines = []
+    for metric, key, help_text in (
+        ("osint_cache_hits_total", "hits", "Cache lookups served from disk."),
+        ("osint_cache_misses_total", "misses", "Cache lookups that missed or expired."),
+        ("osint_cache_writes_total", "writes", "Cache entries written."),
+    ):
+        lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"])
+        for name, stats in sorted(cache.items()):
+            lines.append(f'{metric}{{cache="{_label(name)}"}} {int(stats[key])}')
+    lines.extend(["# HELP osint_cache_io_seconds_total Time spent on cache file I/O.", "# TYPE osint_cache_io_seconds_total counter"])
+    for name, stats in sorted(cache.items()):
+        lines.append(f'osint_cache_io_seconds_total{{cache="{_label(name)}"}} {stats["io_ms"] / 1000:.6f}')
+    return lines
+
+
+def trace_to_prometheus(trace: RunTrace) -> str:
+    """Renders a single run as Prometheus text (e.g. for a push gateway)."""
+    stages = {name: {"count": 1, "duration_ms": duration} for name, duration in trace.stage_durations().items()}
+    with trace._lock:
+        http = {host: dict(stats) for host, stats in trace.http.items()}
+        cache = {name: dict(stats) for name, stats in trace.cache.items()}
+    lines = _stage_metrics(stages) + _http_metrics(http) + _cache_metrics(cache)
+    return "\n".join(lines) + "\n"
+
+
+def export_otel_spans(trace: RunTrace, tracer: Any = None) -> int:
+    """
+    Replays the recorded spans through OpenTelemetry. Requires ``opentelemetry-api``;
+    without a configured SDK the spans are no-ops. Returns the number of spans emitted.
+    """
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError as exc:
+        raise RuntimeError("opentelemetry-api is required to export spans.") from exc
+
+    tracer = tracer or otel_trace.get_tracer("market-opportunity-osint")
+    origin_ns = int(trace.started_at * 1_000_000_000)
+    emitted: Dict[int, Any] = {}
+    for record in trace.spans:
+        start_ns = origin_ns + int(record["start_ms"] * 1_000_000)
+        end_ns = start_ns + int((record["duration_ms"] or 0) * 1_000_000)
+        parent = emitted.get(record["parent"]) if record["parent"] is not None else None
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        attributes = {key: str(value) for key, value in record["attributes"].items()}
+        attributes["osint.run_id"] = trace.run_id
+        otel_span = tracer.start_span(record["name"], context=context, start_time=start_ns, attributes=attributes)
+        otel_span.end(end_time=end_ns)
+        emitted[record["id"]] = otel_span
+    return len(emitted)
@@ -2,13 +2,18 @@ import json
 import logging
 import os
 import xml.etree.ElementTree as ET
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
-from services.cache import SimpleFileCache
+from services.cache import SimpleFileCache, default_cache_path
 from services.http_client import HttpClient
+from services.telemetry import span
 
 logger = logging.getLogger(__name__)
 
+RSS_PARSE_CHUNK_CHARS = 64 * 1024
+# Larger feeds are streamed straight through instead of being kept for the cache.
+TENDER_CACHE_MAX_ITEMS = 5000
+
 
 class TenderSource:
     def __init__(self, name: str, source_type: str, url: str):
@@ -34,26 +39,43 @@ def _load_config_sources() -> List[TenderSource]:
         return []
 
 
-def _parse_rss(xml_text: str) -> List[Dict[str, Any]]:
-    items = []
+def _rss_item(element: ET.Element) -> Dict[str, Any]:
+    return {
+        "title": (element.findtext("title") or "").strip(),
+        "url": (element.findtext("link") or "").strip(),
+        "summary": (element.findtext("description") or "").strip(),
+        "date": (element.findtext("pubDate") or "").strip(),
+    }
+
+
+def _iter_rss(source: Union[str, Iterable[bytes]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields RSS items while parsing incrementally, from the whole text or from body
+    chunks as they are downloaded. Each ``<item>`` element is cleared once read, so
+    neither the feed nor the parsed tree is ever held whole.
+    """
+    if isinstance(source, str):
+        text = source
+        source = (text[start : start + RSS_PARSE_CHUNK_CHARS] for start in range(0, len(text), RSS_PARSE_CHUNK_CHARS))
+    parser = ET.XMLPullParser(events=("end",))
     try:
-        root = ET.fromstring(xml_text)
-        for item in root.findall(".//item"):
-            title = item.findtext("title") or ""
-            link = item.findtext("link") or ""
-            description = item.findtext("description") or ""
-            pub_date = item.findtext("pubDate") or ""
-            items.append(
-                {
-                    "title": title.strip(),
-                    "url": link.strip(),
-                    "summary": description.strip(),
-                    "date": pub_date.strip(),
-                }
-            )
-    except Exception as exc:
+        for chunk in source:
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if element.tag == "item":
+                    yield _rss_item(element)
+                    element.clear()
+        parser.close()
+    except ET.ParseError as exc:
         logger.error("Failed to parse RSS: %s", exc)
-    return items
+    finally:
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()
+
+
+def _parse_rss(xml_text: str) -> List[Dict[str, Any]]:
+    return list(_iter_rss(xml_text))
 
 
 def _parse_json(text: str) -> List[Dict[str, Any]]:
@@ -78,36 +100,61 @@ def _parse_json(text: str) -> List[Dict[str, Any]]:
     return items
 
 
-def collect_tenders(extra_sources: List[str] | None = None) -> List[Dict[str, Any]]:
+def collect_tenders(extra_sources: List[str] | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yields tender items feed by feed, as each feed is fetched and parsed, so callers
+    can filter and score them without holding every feed in memory. RSS feeds are
+    parsed while they download; JSON feeds are read whole. Feeds with more than
+    ``TENDER_CACHE_MAX_ITEMS`` items are streamed but not cached.
+    """
     http = HttpClient(timeout_seconds=10)
-    cache_path = os.path.join(os.path.dirname(__file__), "..", ".cache", "tender_cache.json")
-    cache = SimpleFileCache(os.path.normpath(cache_path), default_ttl_seconds=3600)
+    cache = SimpleFileCache(default_cache_path("tender_cache.json"), default_ttl_seconds=3600)
 
     sources = _load_config_sources()
     if extra_sources:
         for url in extra_sources:
             sources.append(TenderSource("Custom", "rss", url))
 
-    all_items = []
     for source in sources:
         if not source.url:
             continue
         cache_key = f"tender:{source.source_type}:{source.url}"
-        cached = cache.get(cache_key)
+        with span("tenders.feed", source=source.name, url=source.url) as record:
+            cached = cache.get(cache_key)
+            body = None
+            if cached:
+                if record is not None:
+                    record["attributes"].update(cache="hit", items=len(cached))
+            else:
+                try:
+                    if source.source_type == "json":
+                        body = http.get_text(source.url)
+                    else:
+                        body = http.iter_chunks(source.url)
+                except Exception as exc:
+                    logger.error("Tender source failed %s: %s", source.url, exc)
+                    continue
+        # Items are yielded outside the span, so the consumer's work is not timed as this feed's.
         if cached:
-            all_items.extend(cached)
+            yield from cached
             continue
+        items = _iter_rss(body) if source.source_type != "json" else iter(_parse_json(body))
+        to_cache: Optional[List[Dict[str, Any]]] = []
+        count = 0
         try:
-            if source.source_type == "json":
-                text = http.get_text(source.url)
-                items = _parse_json(text)
-            else:
-                xml_text = http.get_text(source.url)
-                items = _parse_rss(xml_text)
-            cache.set(cache_key, items, ttl_seconds=3600)
-            all_items.extend(items)
-        except Exception as exc:
+            for item in items:
+                count += 1
+                if to_cache is not None:
+                    to_cache.append(item)
+                    if len(to_cache) > TENDER_CACHE_MAX_ITEMS:
+                        to_cache = None
+                yield item
+        except OSError as exc:
+            # Includes requests' errors: the connection can drop partway through a streamed feed.
+            # Items already yielded stand, but the incomplete feed is not cached.
             logger.error("Tender source failed %s: %s", source.url, exc)
             continue
-
-    return all_items
+        if record is not None:
+            record["attributes"]["items"] = count
+        if to_cache is not None:
+            cache.set(cache_key, to_cache, ttl_seconds=3600)
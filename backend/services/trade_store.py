@@ -0,0 +1,352 @@
+"""
+Local bilateral trade flows at HS6 level, from bulk dumps (CEPII BACI, UN Comtrade).
+
+Flows are stored as Parquet under ``<root>/year=<yyyy>/chapter=<hs2>/`` and read
+with ``pyarrow.dataset``: year and chapter filters prune whole directories, and
+reporter/product filters are pushed down to Parquet row-group statistics. Product
+signals for a run therefore need no API call.
+
+    cd backend
+    python -m services.trade_store baci BACI_HS17_Y2022_V202401.csv
+    python -m services.trade_store comtrade comtrade_imports_2022.csv
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pycountry
+
+from services.cache import default_cache_path
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# Years considered for growth, counting back from the latest year on file.
+GROWTH_WINDOW_YEARS = 5
+TOP_SUPPLIERS = 5
+# Rows per Parquet row group; small enough that reporter statistics prune well.
+ROW_GROUP_ROWS = 64 * 1024
+# BACI numeric codes that differ from ISO 3166-1 numeric.
+BACI_COUNTRY_OVERRIDES = {251: "FR", 490: "TW", 579: "NO", 699: "IN", 757: "CH", 842: "US"}
+
+
+def _schema() -> "pa.Schema":
+    return pa.schema(
+        [
+            ("reporter", pa.string()),
+            ("partner", pa.string()),
+            ("hs6", pa.string()),
+            ("hs4", pa.string()),
+            ("value_usd", pa.float64()),
+            ("quantity", pa.float64()),
+            ("year", pa.int16()),
+            ("chapter", pa.string()),
+        ]
+    )
+
+
+def _partitioning() -> "ds.Partitioning":
+    return ds.partitioning(pa.schema([("year", pa.int16()), ("chapter", pa.string())]), flavor="hive")
+
+
+def normalize_hs_codes(codes: Iterable[str]) -> List[str]:
+    """Digits only, cut to HS6; keeps 2-, 4- and 6-digit codes, drops the rest."""
+    normalized = []
+    for code in codes or []:
+        digits = re.sub(r"\D", "", str(code))[:6]
+        if len(digits) in (2, 4, 6) and digits not in normalized:
+            normalized.append(digits)
+    return normalized
+
+
+def _alpha2_from_numeric(code: Any) -> str:
+    try:
+        number = int(code)
+    except (TypeError, ValueError):
+        return str(code)
+    if number in BACI_COUNTRY_OVERRIDES:
+        return BACI_COUNTRY_OVERRIDES[number]
+    country = pycountry.countries.get(numeric=f"{number:03d}")
+    return country.alpha_2 if country else str(number)
+
+
+def _alpha2(code: Any) -> str:
+    text = str(code or "").strip()
+    if text.isdigit():
+        return _alpha2_from_numeric(text)
+    country = pycountry.countries.get(alpha_3=text.upper()) if len(text) == 3 else None
+    return country.alpha_2 if country else text.upper()
+
+
+def _map_codes(values: "pa.Array", mapper: Any) -> "pa.Array":
+    # Country columns have a few hundred distinct values; map those, not every row.
+    encoded = pc.dictionary_encode(values.cast(pa.string()))
+    mapped = pa.array([mapper(value) for value in encoded.dictionary.to_pylist()], type=pa.string())
+    return pc.take(mapped, encoded.indices)
+
+
+def _flows_batch(
+    year: "pa.Array", reporter: "pa.Array", partner: "pa.Array", hs6: "pa.Array", value_usd: "pa.Array",
+    quantity: "pa.Array",
+) -> "pa.RecordBatch":
+    hs6 = pc.utf8_lpad(hs6.cast(pa.string()), 6, "0")
+    batch = pa.record_batch(
+        [
+            reporter,
+            partner,
+            hs6,
+            pc.utf8_slice_codeunits(hs6, 0, 4),
+            value_usd.cast(pa.float64()),
+            quantity.cast(pa.float64()),
+            year.cast(pa.int16()),
+            pc.utf8_slice_codeunits(hs6, 0, 2),
+        ],
+        schema=_schema(),
+    )
+    return batch.take(pc.sort_indices(batch, [("reporter", "ascending"), ("hs6", "ascending")]))
+
+
+def read_baci(path: str) -> Iterator["pa.RecordBatch"]:
+    """
+    BACI CSV (``t,i,j,k,v,q``: year, exporter, importer, HS6, value in thousand USD,
+    tonnes), as import flows: reporter is the importer, partner the exporter.
+    """
+    convert = pa_csv.ConvertOptions(
+        column_types={
+            "t": pa.int16(), "i": pa.int32(), "j": pa.int32(), "k": pa.string(), "v": pa.float64(), "q": pa.string()
+        },
+        include_columns=["t", "i", "j", "k", "v", "q"],
+    )
+    reader = pa_csv.open_csv(path, convert_options=convert)
+    for batch in reader:
+        # Missing quantities are written as "NA".
+        quantity_text = pc.utf8_trim_whitespace(batch["q"])
+        missing = pc.or_(pc.equal(quantity_text, "NA"), pc.equal(quantity_text, ""))
+        quantity = pc.cast(pc.if_else(missing, pa.scalar(None, pa.string()), quantity_text), pa.float64())
+        yield _flows_batch(
+            batch["t"],
+            _map_codes(batch["j"], _alpha2_from_numeric),
+            _map_codes(batch["i"], _alpha2_from_numeric),
+            batch["k"],
+            pc.multiply(batch["v"], 1000.0),
+            quantity,
+        )
+
+
+def read_comtrade(path: str) -> Iterator["pa.RecordBatch"]:
+    """
+    UN Comtrade bulk CSV (``refYear``/``period``, ``reporterISO``, ``partnerISO``,
+    ``cmdCode``, ``flowCode``, ``primaryValue``, ``netWgt``); HS6 import rows (``M``) by partner only.
+    """
+    # Codes stay text: inferred as integers, HS6 codes of chapters 01-09 would lose their leading zero.
+    convert = pa_csv.ConvertOptions(
+        column_types={
+            "cmdCode": pa.string(), "reporterISO": pa.string(), "partnerISO": pa.string(), "flowCode": pa.string()
+        },
+        strings_can_be_null=True,
+    )
+    reader = pa_csv.open_csv(path, convert_options=convert)
+    for batch in reader:
+        names = set(batch.schema.names)
+        year_column = "refYear" if "refYear" in names else "period"
+        mask = pc.equal(batch["flowCode"].cast(pa.string()), "M")
+        mask = pc.and_(mask, pc.equal(pc.utf8_length(batch["cmdCode"].cast(pa.string())), 6))
+        # "W00" rows are the reporter's total over all partners and would double-count.
+        mask = pc.and_(mask, pc.not_equal(batch["partnerISO"].cast(pa.string()), "W00"))
+        batch = batch.filter(mask)
+        if not batch.num_rows:
+            continue
+        partner = _map_codes(batch["partnerISO"], _alpha2)
+        yield _flows_batch(
+            pc.cast(pc.utf8_slice_codeunits(batch[year_column].cast(pa.string()), 0, 4), pa.int16()),
+            _map_codes(batch["reporterISO"], _alpha2),
+            partner,
+            batch["cmdCode"],
+            batch["primaryValue"],
+            batch["netWgt"] if "netWgt" in names else pa.nulls(batch.num_rows, pa.float64()),
+        )
+
+
+class TradeStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def available(self) -> bool:
+        if pa is None or not os.path.isdir(self.root):
+            return False
+        return any(name.startswith("year=") for name in os.listdir(self.root))
+
+    def ingest(self, batches: Iterable["pa.RecordBatch"], name: str) -> int:
+        """
+        Writes flows into the year/chapter partitions under files named after ``name``.
+        Files from an earlier ingest of the same name are replaced; other dumps that
+        cover the same partitions (e.g. one Comtrade file per reporter) are kept.
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the trade store.")
+        os.makedirs(self.root, exist_ok=True)
+        basename = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+        for path in glob.glob(os.path.join(self.root, "year=*", "chapter=*", f"{basename}-*.parquet")):
+            os.remove(path)
+        counted = {"rows": 0}
+
+        def counting() -> Iterator["pa.RecordBatch"]:
+            for batch in batches:
+                counted["rows"] += batch.num_rows
+                yield batch
+
+        ds.write_dataset(
+            pa.RecordBatchReader.from_batches(_schema(), counting()),
+            self.root,
+            format="parquet",
+            partitioning=_partitioning(),
+            basename_template=f"{basename}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=ROW_GROUP_ROWS,
+            min_rows_per_group=ROW_GROUP_ROWS // 4,
+        )
+        logger.info("Ingested %s trade flow rows from %s", counted["rows"], name)
+        return counted["rows"]
+
+    def _dataset(self) -> "ds.Dataset":
+        return ds.dataset(self.root, format="parquet", partitioning=_partitioning())
+
+    def query(
+        self,
+        reporter: Optional[str],
+        hs_codes: Sequence[str],
+        years: Optional[Sequence[int]] = None,
+        partners: Optional[Sequence[str]] = None,
+        columns: Sequence[str] = ("year", "partner", "hs6", "value_usd"),
+    ) -> "pa.Table":
+        """
+        Import flows into ``reporter`` (every reporter when None) for the HS codes
+        (2, 4 or 6 digits), optionally by year and partner.
+        """
+        codes = normalize_hs_codes(hs_codes)
+        if not codes or not self.available():
+            return pa.table({name: pa.array([], type=_schema().field(name).type) for name in columns})
+        expression = ds.field("chapter").isin(sorted({code[:2] for code in codes}))
+        if reporter:
+            expression &= ds.field("reporter") == reporter.upper()
+        product = None
+        for width, field_name in ((2, "chapter"), (4, "hs4"), (6, "hs6")):
+            selected = [code for code in codes if len(code) == width]
+            if selected:
+                term = ds.field(field_name).isin(selected)
+                product = term if product is None else product | term
+        expression &= product
+        if years:
+            expression &= ds.field("year").isin([int(year) for year in years])
+        if partners:
+            expression &= ds.field("partner").isin([partner.upper() for partner in partners])
+        return self._dataset().to_table(columns=list(columns), filter=expression)
+
+    def years(self) -> List[int]:
+        if not self.available():
+            return []
+        return sorted(
+            int(name.split("=", 1)[1]) for name in os.listdir(self.root) if name.startswith("year=")
+        )
+
+    def product_signals(self, reporter: str, hs_codes: Sequence[str]) -> Dict[str, Any]:
+        """
+        Import value for the latest year on file, its growth (CAGR) over up to
+        ``GROWTH_WINDOW_YEARS`` and the leading suppliers' shares, shaped like
+        ``get_trade_signals`` entries. Empty when nothing matches.
+        """
+        codes = normalize_hs_codes(hs_codes)
+        years = self.years()
+        if not codes or not years:
+            return {}
+        window = [year for year in years if year > years[-1] - GROWTH_WINDOW_YEARS]
+        flows = self.query(reporter, codes, years=window)
+        if not flows.num_rows:
+            return {}
+        by_year = {
+            row["year"]: row["value_usd_sum"]
+            for row in flows.group_by("year").aggregate([("value_usd", "sum")]).to_pylist()
+            if row["value_usd_sum"]
+        }
+        if not by_year:
+            return {}
+        latest, first = max(by_year), min(by_year)
+        label_codes = ", ".join(codes)
+        signals: Dict[str, Any] = {
+            "HS.IMPORTS": {
+                "label": f"Imports of HS {label_codes} (US$, {latest})",
+                "value": round(by_year[latest], 2),
+                "year": latest,
+                "hs_codes": codes,
+            }
+        }
+        if latest > first and by_year[first] > 0:
+            cagr = (by_year[latest] / by_year[first]) ** (1 / (latest - first)) - 1
+            signals["HS.IMPORTS.GROWTH"] = {
+                "label": f"HS {label_codes} import growth, CAGR {first}-{latest} (%)",
+                "value": round(cagr * 100, 1),
+            }
+        latest_flows = flows.filter(pc.equal(flows["year"], latest))
+        suppliers = latest_flows.group_by("partner").aggregate([("value_usd", "sum")]).to_pylist()
+        suppliers.sort(key=lambda row: -(row["value_usd_sum"] or 0))
+        total = by_year[latest]
+        top = [
+            {"partner": row["partner"], "value": round(row["value_usd_sum"], 2), "share": round(row["value_usd_sum"] / total, 4)}
+            for row in suppliers[:TOP_SUPPLIERS]
+        ]
+        signals["HS.TOP.SUPPLIERS"] = {
+            "label": f"Top suppliers of HS {label_codes} ({latest})",
+            "value": ", ".join(f"{row['partner']} {row['share']:.0%}" for row in top),
+            "suppliers": top,
+            # Herfindahl index of supplier shares: near 1 means one dominant supplier.
+            "concentration": round(sum((row["value_usd_sum"] / total) ** 2 for row in suppliers), 4),
+        }
+        return signals
+
+
+def trade_store_dir() -> str:
+    return os.getenv("OSINT_TRADE_DIR") or default_cache_path("trade_flows")
+
+
+def get_trade_store() -> TradeStore:
+    return TradeStore(trade_store_dir())
+
+
+def get_product_trade_signals(country_code: str, hs_codes: Sequence[str]) -> Dict[str, Any]:
+    """Product-level import signals from the local store; empty without data or HS codes."""
+    store = get_trade_store()
+    if not hs_codes or not store.available():
+        return {}
+    try:
+        return store.product_signals(country_code, hs_codes)
+    except Exception as exc:
+        logger.error("Trade store query failed for %s: %s", country_code, exc)
+        return {}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest bulk trade flow dumps into the local Parquet store.")
+    parser.add_argument("format", choices=("baci", "comtrade"))
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    store = get_trade_store()
+    reader = read_baci if args.format == "baci" else read_comtrade
+    for path in args.paths:
+        rows = store.ingest(reader(path), os.path.splitext(os.path.basename(path))[0])
+        print(f"{path}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.cache import default_cache_path, register_default_store
+from services.telemetry import current_trace
+
+logger = logging.getLogger(__name__)
+
+# Rough list prices per call in USD, for the per-analysis cost report. Override with
+# OSINT_<API>_COST_PER_CALL.
+DEFAULT_COST_PER_CALL = {"brave": 0.005, "gemini": 0.002}
+# Share of each daily quota that planning leaves untouched, so runs already in
+# flight can finish their calls when several users share a key.
+DEFAULT_QUOTA_RESERVE = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    day TEXT NOT NULL,
+    api TEXT NOT NULL,
+    key_hash TEXT NOT NULL,
+    user TEXT NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    cache_hits INTEGER NOT NULL DEFAULT 0,
+    blocked INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, api, key_hash, user)
+);
+"""
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+@dataclass
+class QuotaDecision:
+    allowed: bool
+    remaining: Optional[int] = None
+    reason: Optional[str] = None
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Stable, non-reversible identifier for an API key; keys themselves are never stored."""
+    if not api_key:
+        return "none"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def current_user() -> str:
+    """The user the active run belongs to, else ``OSINT_USER``, else "anonymous"."""
+    trace = current_trace()
+    if trace is not None and trace.user:
+        return trace.user
+    return os.getenv("OSINT_USER") or "anonymous"
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        logger.error("Ignoring non-integer %s=%r", name, value)
+        return None
+    return limit if limit > 0 else None
+
+
+def daily_quota(api: str) -> Optional[int]:
+    return _env_int(f"OSINT_{api.upper()}_DAILY_QUOTA")
+
+
+def user_daily_quota(api: str) -> Optional[int]:
+    return _env_int(f"OSINT_{api.upper()}_USER_DAILY_QUOTA")
+
+
+def cost_per_call(api: str) -> float:
+    return float(os.getenv(f"OSINT_{api.upper()}_COST_PER_CALL", DEFAULT_COST_PER_CALL.get(api, 0.0)))
+
+
+def _quota_reserve() -> float:
+    return min(max(float(os.getenv("OSINT_QUOTA_RESERVE", DEFAULT_QUOTA_RESERVE)), 0.0), 1.0)
+
+
+class UsageLedger:
+    """
+    Paid API calls per day, API, key and user in SQLite.
+
+    ``check`` is the pre-flight test used when planning a run: it keeps
+    ``OSINT_QUOTA_RESERVE`` of each quota back. ``acquire`` is called right before
+    each upstream call and checks and books the call in one transaction, against
+    the full quota. Cache hits are booked too, so reports show what the cache saved.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _used(self, conn: sqlite3.Connection, day: str, api: str, key_hash: str, user: str) -> Dict[str, int]:
+        key_calls = conn.execute(
+            "SELECT COALESCE(SUM(calls), 0) FROM usage WHERE day = ? AND api = ? AND key_hash = ?", (day, api, key_hash)
+        ).fetchone()[0]
+        user_calls = conn.execute(
+            "SELECT COALESCE(SUM(calls), 0) FROM usage WHERE day = ? AND api = ? AND user = ?", (day, api, user)
+        ).fetchone()[0]
+        return {"key": key_calls, "user": user_calls}
+
+    def _decide(self, used: Dict[str, int], api: str, calls: int, reserve: float) -> QuotaDecision:
+        remaining: Optional[int] = None
+        reason = None
+        for scope, limit in (("key", daily_quota(api)), ("user", user_daily_quota(api))):
+            if limit is None:
+                continue
+            usable = limit - math.ceil(limit * reserve)
+            left = max(usable - used[scope], 0)
+            if remaining is None or left < remaining:
+                remaining = left
+                reason = f"{api} daily {scope} quota: {used[scope]} of {limit} calls used"
+        if remaining is None:
+            return QuotaDecision(allowed=True)
+        return QuotaDecision(allowed=calls <= remaining, remaining=remaining, reason=reason)
+
+    def check(self, api: str, api_key: Optional[str], calls: int = 1, user: Optional[str] = None) -> QuotaDecision:
+        """Whether ``calls`` more calls fit today's quotas, keeping the planning reserve."""
+        user = user or current_user()
+        with self._connect() as conn:
+            used = self._used(conn, _today(), api, key_fingerprint(api_key), user)
+        return self._decide(used, api, calls, _quota_reserve())
+
+    def acquire(self, api: str, api_key: Optional[str], calls: int = 1, user: Optional[str] = None) -> QuotaDecision:
+        """Books ``calls`` if they fit the full quotas; otherwise books them as blocked."""
+        user = user or current_user()
+        day, key_hash = _today(), key_fingerprint(api_key)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            decision = self._decide(self._used(conn, day, api, key_hash, user), api, calls, 0.0)
+            booked, blocked = (calls, 0) if decision.allowed else (0, calls)
+            self._book(conn, day, api, key_hash, user, booked, 0, blocked)
+        _report(api, booked, 0, blocked)
+        if not decision.allowed:
+            logger.warning("Skipping %s call: %s", api, decision.reason)
+        return decision
+
+    def record_cache_hit(self, api: str, api_key: Optional[str], user: Optional[str] = None) -> None:
+        user = user or current_user()
+        with self._connect() as conn:
+            self._book(conn, _today(), api, key_fingerprint(api_key), user, 0, 1, 0)
+        _report(api, 0, 1, 0)
+
+    @staticmethod
+    def _book(
+        conn: sqlite3.Connection, day: str, api: str, key_hash: str, user: str, calls: int, cache_hits: int, blocked: int
+    ) -> None:
+        conn.execute(
+            "INSERT INTO usage (day, api, key_hash, user, calls, cache_hits, blocked, cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(day, api, key_hash, user) DO UPDATE SET calls = calls + excluded.calls, "
+            "cache_hits = cache_hits + excluded.cache_hits, blocked = blocked + excluded.blocked, "
+            "cost = cost + excluded.cost",
+            (day, api, key_hash, user, calls, cache_hits, blocked, calls * cost_per_call(api)),
+        )
+
+    def report(
+        self, since: Optional[str] = None, until: Optional[str] = None, api: Optional[str] = None, user: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Ledger rows, newest day first. ``since``/``until`` are ISO dates (inclusive)."""
+        clauses, params = [], []
+        for column, operator, value in (("day", ">=", since), ("day", "<=", until), ("api", "=", api), ("user", "=", user)):
+            if value:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM usage{where} ORDER BY day DESC, api, user", params).fetchall()
+        return [{**dict(row), "cost": round(row["cost"], 6)} for row in rows]
+
+
+def _report(api: str, calls: int, cache_hits: int, blocked: int) -> None:
+    trace = current_trace()
+    if trace is not None:
+        trace.record_usage(api, calls, cache_hits, blocked, calls * cost_per_call(api))
+
+
+_default_ledger: Optional[UsageLedger] = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    global _default_ledger
+    with _default_ledger_lock:
+        if _default_ledger is None:
+            _default_ledger = UsageLedger(default_cache_path("usage.sqlite3"))
+        return _default_ledger
+
+
+def _reset_default_ledger() -> None:
+    global _default_ledger
+    with _default_ledger_lock:
+        _default_ledger = None
+
+
+register_default_store(_reset_default_ledger)
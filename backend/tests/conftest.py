@@ -4,3 +4,21 @@ import sys
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+import pytest
+
+from services.cache import reset_default_stores
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    """
+    Pipeline runs record corpus statistics, query yields, usage and more; keep them
+    out of the real ``backend/.cache`` by pointing every store at a fresh directory.
+    """
+    monkeypatch.setenv("OSINT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("OSINT_SANCTIONS_DIR", raising=False)
+    monkeypatch.delenv("OSINT_TRADE_DIR", raising=False)
+    reset_default_stores()
+    yield
+    reset_default_stores()
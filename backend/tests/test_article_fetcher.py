@@ -0,0 +1,81 @@
+import io
+
+import requests
+
+from services.article_fetcher import ArticleCache, ArticleFetcher, extract_main_text
+from services.http_client import HttpClient
+
+ARTICLE = b"""<html><head><script>var tracking = 1;</script></head><body>
+<nav><p>Home | World | Business | Sport | Weather | Contact us today</p></nav>
+<article><h1>Tyre recycling</h1>
+<p>The ministry announced a tender for crumb rubber surfaces in twelve new schools.</p>
+<p>Share</p>
+<p>Importers expect demand for recycled rubber tiles to double over two years.</p>
+</article><footer><p>Copyright 2025 Example News Group, all rights reserved worldwide.</p></footer>
+</body></html>"""
+
+
+class _PageAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.calls = []
+        self.bytes_read = 0
+
+    def send(self, request, **kwargs):
+        self.calls.append(request.url)
+        body, content_type = self.pages[request.url]
+        adapter = self
+
+        class _Body(io.BytesIO):
+            def read(self, size=-1):
+                chunk = super().read(size)
+                adapter.bytes_read += len(chunk)
+                return chunk
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 200
+        response.headers["Content-Type"] = content_type
+        response.raw = _Body(body)
+        return response
+
+    def close(self):
+        pass
+
+
+def _fetcher(monkeypatch, tmp_path, pages, **kwargs):
+    adapter = _PageAdapter(pages)
+    monkeypatch.setattr(HttpClient, "transport_adapter", adapter)
+    cache = ArticleCache(str(tmp_path / "articles.sqlite3"))
+    return ArticleFetcher(cache=cache, **kwargs), adapter
+
+
+def test_extracts_article_paragraphs_without_boilerplate():
+    text = extract_main_text(ARTICLE)
+    assert "crumb rubber surfaces" in text and "recycled rubber tiles" in text
+    assert "tracking" not in text and "Copyright" not in text and "Weather" not in text
+    assert "Share" not in text
+
+
+def test_fetch_is_capped_cached_and_html_only(monkeypatch, tmp_path):
+    pages = {
+        "https://news.example/a": (ARTICLE, "text/html; charset=utf-8"),
+        "https://news.example/big": (b"<p>" + b"rubber tiles " * 200_000 + b"</p>", "text/html"),
+        "https://news.example/report.pdf": (b"%PDF-1.7 rubber", "application/pdf"),
+    }
+    fetcher, adapter = _fetcher(monkeypatch, tmp_path, pages, max_workers=2, max_bytes=256 * 1024)
+
+    items = [{"url": url, "title": url} for url in pages]
+    enriched = list(fetcher.iter_enriched(items))
+    assert [item["url"] for item in enriched] == list(pages)
+    assert "crumb rubber surfaces" in enriched[0]["full_text"]
+    assert "full_text" in enriched[1]
+    assert "full_text" not in enriched[2]
+    assert adapter.bytes_read < 2 * 256 * 1024 + len(ARTICLE)
+
+    calls = len(adapter.calls)
+    again = list(fetcher.iter_enriched(items))
+    assert len(adapter.calls) == calls
+    assert again == enriched
@@ -0,0 +1,113 @@
+import csv
+
+import services.company_registry as company_registry
+import services.osint_pipeline as pipeline
+from models.subject import Subject
+from services.company_registry import CompanyRegistry, read_gleif, read_gleif_relations, resolve_company
+
+LEI_COLUMNS = [
+    "LEI",
+    "Entity.LegalName",
+    "Entity.OtherEntityNames.OtherEntityName.1",
+    "Entity.LegalAddress.City",
+    "Entity.LegalAddress.Country",
+    "Entity.LegalJurisdiction",
+    "Entity.EntityStatus",
+]
+LEI_ROWS = [
+    ("LEI0000000000000SAG", "Siemens Aktiengesellschaft", "", "Muenchen", "DE", "DE", "ACTIVE"),
+    ("LEI000000000000SMUS", "Siemens Corporation", "Siemens USA", "Washington", "US", "US-DE", "ACTIVE"),
+    ("LEI0000000000000SEN", "Siemens Energy AG", "", "Muenchen", "DE", "DE", "ACTIVE"),
+    ("LEI0000000000000BOS", "Robert Bosch GmbH", "Bosch", "Gerlingen", "DE", "DE", "ACTIVE"),
+    ("LEI0000000000000OLD", "Siemens Corp", "", "Iselin", "US", "US-NJ", "INACTIVE"),
+]
+RELATION_COLUMNS = [
+    "Relationship.StartNode.NodeID",
+    "Relationship.EndNode.NodeID",
+    "Relationship.RelationshipType",
+    "Relationship.RelationshipStatus",
+]
+RELATION_ROWS = [
+    ("LEI000000000000SMUS", "LEI0000000000000SAG", "IS_DIRECTLY_CONSOLIDATED_BY", "ACTIVE"),
+    ("LEI000000000000SMUS", "LEI0000000000000SAG", "IS_ULTIMATELY_CONSOLIDATED_BY", "ACTIVE"),
+    ("LEI0000000000000SEN", "LEI0000000000000SAG", "IS_DIRECTLY_CONSOLIDATED_BY", "INACTIVE"),
+]
+
+
+def _write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    return str(path)
+
+
+def _registry(tmp_path):
+    registry = CompanyRegistry(str(tmp_path / "company_registry.sqlite3"))
+    lei = _write_csv(tmp_path / "lei.csv", LEI_COLUMNS, LEI_ROWS)
+    rr = _write_csv(tmp_path / "rr.csv", RELATION_COLUMNS, RELATION_ROWS)
+    registry.ingest("gleif:lei", records=read_gleif(lei))
+    registry.ingest("gleif-relations:rr", relations=read_gleif_relations(rr))
+    return registry
+
+
+def test_resolve_matches_misspellings_aliases_and_related_entities(tmp_path):
+    registry = _registry(tmp_path)
+
+    matches = registry.resolve("Siemmens Corporation")
+    assert matches[0].entity_id == "LEI000000000000SMUS"
+    assert registry.resolve("Bosch")[0].name == "Robert Bosch GmbH"
+    assert registry.resolve("Acme Widgets") == []
+
+    # Legal forms are dropped, so "Siemens AG" and "Siemens Corp" tie; country and status break it.
+    assert registry.resolve("Siemens", country="DE")[0].entity_id == "LEI0000000000000SAG"
+    assert registry.resolve("Siemens", country="US")[0].entity_id == "LEI000000000000SMUS"
+
+    related = registry.related("LEI0000000000000SAG")
+    assert related["parents"] == []
+    assert [(row["entity_id"], row["kind"]) for row in related["subsidiaries"]] == [
+        ("LEI000000000000SMUS", "direct_parent"),
+        ("LEI000000000000SMUS", "ultimate_parent"),
+    ]
+    parents = registry.related("LEI000000000000SMUS")["parents"]
+    assert {row["name"] for row in parents} == {"Siemens Aktiengesellschaft"}
+
+    # Re-ingesting a source replaces its rows instead of duplicating them.
+    registry.ingest("gleif:lei", records=read_gleif(str(tmp_path / "lei.csv")))
+    assert registry.sources()["gleif:lei"]["entities"] == len(LEI_ROWS)
+    assert len(registry.resolve("Robert Bosch")) == 1
+
+
+def test_company_target_drives_country_collection_and_queries(monkeypatch, tmp_path):
+    registry = _registry(tmp_path)
+    assert resolve_company(CompanyRegistry(str(tmp_path / "empty.sqlite3")), "Siemens") == {"available": False}
+
+    calls = {}
+
+    class _Collector:
+        def get_country_data(self, code):
+            calls["macro"] = code
+            return {"country_name": "United States", "gdp": 2.5e13, "population": 3.3e8}
+
+        def get_regional_news(self, name, queries=None):
+            calls["news"] = (name, queries)
+            return []
+
+    monkeypatch.setattr(company_registry, "_default_registry", registry)
+    monkeypatch.setattr(pipeline, "DataCollector", lambda: _Collector())
+    monkeypatch.setattr(pipeline, "get_trade_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "get_policy_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "collect_tenders", lambda _feeds: [])
+
+    result = pipeline.analyze_subject(Subject(target_type="company", target_name="Siemens Corporation"))
+    assert result["company"]["entity"]["entity_id"] == "LEI000000000000SMUS"
+    assert result["company"]["related"]["parents"][0]["name"] == "Siemens Aktiengesellschaft"
+    assert calls["macro"] == "US"
+    assert calls["news"][0] == "United States"
+    assert "Siemens Corporation contract United States" in calls["news"][1]
+    assert "Siemens Aktiengesellschaft Siemens Corporation" in calls["news"][1]
+    assert not any("company registry" in warning for warning in result["warnings"])
+
+    missing = pipeline.analyze_subject(Subject(target_type="company", target_name="Acme Widgets"))
+    assert missing["company"]["entity"] is None
+    assert any("not found in the local company registry" in warning for warning in missing["warnings"])
@@ -14,3 +14,33 @@ def test_build_evidence_from_news_sets_quality():
     news_items = [{"title": "Gov report", "url": "https://example.gov/report", "description": "x"}]
     evidence = build_evidence_from_news(news_items)
     assert evidence[0]["quality"] == "official"
+
+
+def test_evidence_record_is_mapping_compatible_and_compact():
+    import sys
+
+    from models.evidence import Evidence, EvidenceQuality
+
+    item = {"title": "A", "url": "https://a.example", "source": "Brave Search", "signal_type": "news", "quality": "media"}
+    evidence = Evidence.from_dict({**item, "fetched": True})
+    assert evidence["quality"] == "media" and evidence.quality is EvidenceQuality.MEDIA
+    assert evidence.get("severity", "n/a") == "n/a" and evidence.get("fetched") is True
+    evidence["relevance_score"] = 40.0
+    assert evidence.to_dict() == {**item, "relevance_score": 40.0, "fetched": True}
+    assert evidence.signal_type is Evidence(signal_type="".join(["ne", "ws"])).signal_type
+    assert not hasattr(evidence, "__dict__")
+    assert sys.getsizeof(evidence) * 2 < sys.getsizeof(evidence.to_dict())
+
+
+def test_evidence_batch_converts_to_typed_columns():
+    from models.evidence import EvidenceBatch
+
+    batch = EvidenceBatch.from_items(
+        build_evidence_from_news([{"title": "Gov report", "url": "https://example.gov/report", "keyword_hits": 2}])
+        + [{"title": "Imports", "signal_type": "trade:TM.VAL", "quality": "official", "relevance_score": 12.5}]
+    )
+    frame = batch.to_dataframe()
+    assert len(batch) == 2 and batch[1].get("relevance_score") == 12.5
+    assert str(frame["quality"].dtype) == "category"
+    assert frame["keyword_hits"].iloc[0] == 2 and frame["keyword_hits"].isna().iloc[1]
+    assert str(frame["relevance_score"].dtype) == "Float64"
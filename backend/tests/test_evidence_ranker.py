@@ -0,0 +1,43 @@
+import numpy as np
+
+from models.subject import Subject
+from services.evidence_ranker import CorpusStats, rank_evidence, top_k_indices
+
+SUBJECT = Subject(
+    target_name="Turkey",
+    products=["crumb rubber", "rubber tiles"],
+    signals_of_interest=["construction projects"],
+    risk_focus=["sanctions"],
+)
+
+EVIDENCE = [
+    {"title": "Football results", "summary": "Galatasaray won in Turkey"},
+    {"title": "Crumb rubber imports grow", "summary": "Crumb rubber demand from construction projects"},
+    {"title": "New sanctions on shipping", "summary": "EU measures"},
+    {"title": "Imports of goods and services", "summary": "31.2"},
+]
+
+
+def test_rank_scores_every_item_and_orders_top_k():
+    ranked = rank_evidence(EVIDENCE, SUBJECT)
+    scores = [item["relevance_score"] for item in ranked]
+    assert [item["title"] for item in ranked] == [item["title"] for item in EVIDENCE]
+    assert scores[0] == 0.0 and all(0 <= score <= 100 for score in scores)
+    top = rank_evidence(EVIDENCE, SUBJECT, top_k=2)
+    assert [item["title"] for item in top] == ["Crumb rubber imports grow", "New sanctions on shipping"]
+    assert top_k_indices(np.array([0.1, 3.0, 2.0, 5.0]), 2) == [3, 1]
+
+
+def test_corpus_stats_are_incremental_and_shift_idf(tmp_path):
+    stats = CorpusStats(str(tmp_path / "corpus.sqlite3"))
+    rank_evidence(EVIDENCE, SUBJECT, stats=stats)
+    rank_evidence(EVIDENCE, SUBJECT, stats=stats)
+    assert stats.snapshot(["rubber"]).doc_count == len(EVIDENCE)
+
+    # Once "rubber" is everywhere in the corpus it stops discriminating.
+    items = [{"title": "Rubber prices", "summary": "Rubber rubber"}, {"title": "Sanctions widen", "summary": "EU"}]
+    before = rank_evidence(items, SUBJECT, stats=stats)
+    assert before[0]["relevance_score"] > before[1]["relevance_score"]
+    stats.add([(f"doc-{index}", ["rubber", "price", "index", "weekly", "market", "report"]) for index in range(200)])
+    after = rank_evidence(items, SUBJECT, stats=stats)
+    assert after[0]["relevance_score"] < after[1]["relevance_score"]
@@ -0,0 +1,40 @@
+from services.evidence_table import build_evidence_frame, build_table_frame, evidence_facets, query_evidence
+
+
+EVIDENCE = [
+    {"title": "Rubber imports rise", "url": "https://a.example/1", "source": "Brave Search", "signal_type": "news", "quality": "media", "relevance_score": 40, "keyword_hits": 2},
+    {"title": "Imports of goods", "source": "World Bank", "signal_type": "trade:NE.IMP.GNFS.CD", "quality": "official", "relevance_score": None},
+    {"title": "Tender: rubber tiles", "url": "https://b.example/2", "source": "Tender Feed", "signal_type": "tender", "quality": "official", "relevance_score": 85, "keyword_hits": 4},
+    {"title": "Port expansion", "summary": "New RUBBER terminal", "source": "Brave Search", "signal_type": "news", "quality": "media", "relevance_score": 10},
+]
+
+
+def test_evidence_frame_is_typed_not_stringified():
+    frame = build_evidence_frame(EVIDENCE)
+    assert str(frame["quality"].dtype) == "category"
+    assert str(frame["relevance_score"].dtype) == "Float64"
+    assert str(frame["keyword_hits"].dtype) == "Int64"
+    assert frame["relevance_score"].isna().sum() == 1
+    assert evidence_facets(frame)["signal_group"] == ["news", "tender", "trade"]
+
+
+def test_query_filters_sorts_and_paginates():
+    frame = build_evidence_frame(EVIDENCE)
+
+    page, total = query_evidence(frame, qualities=["official"])
+    assert total == 2
+    assert list(page["title"]) == ["Tender: rubber tiles", "Imports of goods"]
+
+    page, total = query_evidence(frame, search="rubber", sort_by="relevance_score", page_size=1, page=2)
+    assert total == 3
+    assert list(page["title"]) == ["Rubber imports rise"]
+
+    page, total = query_evidence(frame, signal_groups=["news"], min_relevance=20, page=9)
+    assert total == 1
+    assert list(page["title"]) == ["Rubber imports rise"]
+
+
+def test_table_frame_keeps_scalars_and_stringifies_nested_values():
+    frame = build_table_frame([{"score": 61, "warnings": ["a", "b"]}, {"score": None, "warnings": "none"}])
+    assert frame["score"].dtype.kind == "i"
+    assert frame["warnings"].iloc[0] == "['a', 'b']"
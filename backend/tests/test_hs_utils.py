@@ -4,3 +4,28 @@ from services.hs_utils import suggest_hs_codes
 def test_suggest_hs_codes_matches_category():
     codes = suggest_hs_codes("We sell crumb rubber and rubber tiles")
     assert "4004" in codes or "4016" in codes
+
+
+def test_rank_hs_codes_uses_nomenclature_csv(monkeypatch, tmp_path):
+    from services import hs_utils
+
+    nomenclature = tmp_path / "hs.csv"
+    nomenclature.write_text(
+        "code,description,parent\n"
+        "40,Rubber and articles thereof,\n"
+        "4011,\"New pneumatic tyres, of rubber\",40\n"
+        "401110,\"Rubber; new pneumatic tyres, of a kind used on motor cars\",4011\n"
+        "0306,\"Crustaceans; frozen shrimps and prawns\",03\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("OSINT_HS_NOMENCLATURE", str(nomenclature))
+    hs_utils._build_index.cache_clear()
+    try:
+        ranked = hs_utils.rank_hs_codes("car tyres", limit=2)
+        assert [match["code"] for match in ranked] == ["401110", "4011"]
+        assert ranked[0]["score"] > ranked[1]["score"] > 0
+        batch = hs_utils.rank_hs_codes_batch(["frozen shrimp", "car tyres", "frozen shrimp"], limit=1)
+        assert list(batch) == ["frozen shrimp", "car tyres"]
+        assert batch["frozen shrimp"][0]["code"] == "0306"
+    finally:
+        hs_utils._build_index.cache_clear()
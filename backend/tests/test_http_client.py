@@ -0,0 +1,105 @@
+import pytest
+import requests
+
+from benchmarks.replay import ReplayAdapter
+from services.http_client import CircuitOpenError, HostHealth, HttpClient, host_health, reset_host_health
+from services.tender_sources import _iter_rss, _parse_rss
+
+
+def test_replay_adapter_serves_recorded_fixtures(monkeypatch):
+    adapter = ReplayAdapter()
+    monkeypatch.setattr(HttpClient, "transport_adapter", adapter)
+    client = HttpClient()
+
+    series = client.get_json("https://api.worldbank.org/v2/country/TR/indicator/SP.POP.TOTL?format=json&per_page=1")
+    assert series[1][0]["indicator"]["id"] == "SP.POP.TOTL"
+    items = _parse_rss(client.get_text("https://tenders.example.test/rss"))
+    assert len(items) == 3
+    assert len(adapter.requests) == 2
+    # Parsed while the body downloads, in chunks smaller than one item.
+    assert list(_iter_rss(client.iter_chunks("https://tenders.example.test/rss", chunk_size=16))) == items
+
+
+def test_replay_adapter_returns_404_for_unrecorded_urls(monkeypatch):
+    monkeypatch.setattr(HttpClient, "transport_adapter", ReplayAdapter())
+    client = HttpClient()
+    with pytest.raises(requests.HTTPError, match="404"):
+        client.get_text("https://unknown.example.test/feed")
+
+
+class _StatusAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, status_code):
+        super().__init__()
+        self.status_code = status_code
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = self.status_code
+        response._content = b"{}"
+        return response
+
+    def close(self):
+        pass
+
+
+def test_circuit_opens_after_repeated_failures_and_recovers(monkeypatch):
+    reset_host_health()
+    adapter = _StatusAdapter(503)
+    monkeypatch.setattr(HttpClient, "transport_adapter", adapter)
+    client = HttpClient()
+    url = "https://down.example.test/feed"
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client.get_text(url)
+    with pytest.raises(CircuitOpenError):
+        client.get_text(url)
+    assert adapter.calls == 3
+
+    health = host_health("down.example.test")
+    health.recovery_seconds = 0
+    adapter.status_code = 200
+    assert client.get_text(url) == "{}"
+    assert health.state == "closed"
+    reset_host_health()
+
+
+def test_single_failure_keeps_retries_until_breaker_trips(monkeypatch):
+    reset_host_health()
+    adapter = _StatusAdapter(503)
+    monkeypatch.setattr(HttpClient, "transport_adapter", adapter)
+    client = HttpClient()
+    retrying = []
+    original_get = client.session.get
+
+    def counting_get(*args, **kwargs):
+        retrying.append(1)
+        return original_get(*args, **kwargs)
+
+    monkeypatch.setattr(client.session, "get", counting_get)
+    url = "https://flaky.example.test/feed"
+
+    with pytest.raises(requests.HTTPError):
+        client.get_text(url)
+    adapter.status_code = 200
+    assert client.get_text(url) == "{}"
+    assert len(retrying) == 2
+
+    health = host_health("flaky.example.test")
+    assert not health.is_degraded()
+    for _ in range(health.failure_threshold):
+        health.record_failure()
+    assert health.is_degraded()
+    reset_host_health()
+
+
+def test_timeout_adapts_to_observed_latency():
+    health = HostHealth(min_samples=5, latency_multiplier=4.0, min_timeout_seconds=1.0)
+    assert health.timeout(10) == (3.05, 10)
+    for _ in range(20):
+        health.record_success(0.5)
+    assert health.timeout(10) == (2.0, 2.0)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from models.scoring_config import ScoringConfig
+from models.subject import Subject
+from services.indicator_distributions import (
+    IndicatorDistributions,
+    QuantileTable,
+    build_distributions,
+    get_indicator_distributions,
+    latest_values_by_country,
+)
+from services.scoring import score_subject
+
+WB_ALL_COUNTRIES = [
+    {"page": 1, "pages": 1, "total": 5},
+    [
+        {"countryiso3code": "WLD", "date": "2023", "value": 1.0e14},
+        {"countryiso3code": "TUR", "date": "2023", "value": 1.1e12},
+        {"countryiso3code": "TUR", "date": "2022", "value": 9.0e11},
+        {"countryiso3code": "DEU", "date": "2023", "value": 4.5e12},
+        {"countryiso3code": "", "date": "2023", "value": 5.0e11},
+        {"countryiso3code": "NRU", "date": "2023", "value": None},
+    ],
+]
+
+
+def test_quantile_table_mid_rank_percentiles():
+    table = QuantileTable([30, 10, 20, 20, 40])
+    assert table.percentile(20) == 40.0
+    assert table.percentile(5) == 0.0 and table.percentile(50) == 100.0
+    assert table.percentiles([5, 20, 50]).tolist() == [0.0, 40.0, 100.0]
+
+    table.replace(40, 15)
+    assert table.values == [10, 15, 20, 20, 30]
+    assert table.percentiles(np.array([15])).tolist() == [table.percentile(15)]
+
+
+def test_observe_updates_tables_incrementally_and_across_instances(tmp_path):
+    db_path = str(tmp_path / "distributions.sqlite3")
+    distributions = IndicatorDistributions(db_path)
+    for index in range(25):
+        distributions.observe("NY.GDP.MKTP.CD", f"C{index}", 10.0 ** (9 + index / 5))
+    assert distributions.percentile("SP.POP.TOTL", 1e6) is None
+    largest = 10.0 ** (9 + 24 / 5)
+    assert distributions.percentile("NY.GDP.MKTP.CD", largest) == 98.0
+
+    assert distributions.observe("NY.GDP.MKTP.CD", "C24", 1e14) is True
+    assert distributions.observe("NY.GDP.MKTP.CD", "C24", 1e14) is False
+    assert distributions.percentile("NY.GDP.MKTP.CD", 1e14) == 98.0
+    assert distributions.percentile("NY.GDP.MKTP.CD", largest) == 96.0
+    assert IndicatorDistributions(db_path).table("NY.GDP.MKTP.CD").values == distributions.table("NY.GDP.MKTP.CD").values
+
+
+def test_build_from_world_bank_and_score_as_percentiles():
+    assert latest_values_by_country(WB_ALL_COUNTRIES) == {
+        "TR": {"value": 1.1e12, "year": 2023},
+        "DE": {"value": 4.5e12, "year": 2023},
+    }
+
+    codes = "TUR DEU FRA ITA ESP POL NLD BEL AUT CHE SWE NOR DNK FIN IRL PRT GRC CZE HUN ROU BGR HRV SVK SVN EST"
+
+    class _Collector:
+        def get_indicator_all_countries(self, indicator):
+            rows = [
+                {"countryiso3code": code, "date": "2023", "value": 10.0 ** (9 + index / 10)}
+                for index, code in enumerate(codes.split())
+            ]
+            return [{}, rows]
+
+    assert build_distributions(_Collector(), ["NY.GDP.MKTP.CD"]) == {"NY.GDP.MKTP.CD": 25}
+    distributions = get_indicator_distributions()
+
+    subject = Subject(target_name="Turkey")
+    macro = {"gdp": 1e14, "population": 0}
+    log_scored = score_subject(subject, macro, [], {}, ScoringConfig())
+    ranked = score_subject(subject, macro, [], {}, ScoringConfig(), distributions=distributions)
+    # 1e14 saturates the log bounds; as a rank it sits above every stored country.
+    assert log_scored["dimensional_scores"]["market_demand"] == 60
+    assert ranked["dimensional_scores"]["market_demand"] == 60
+    median = score_subject(subject, {"gdp": 10.0 ** 10.2}, [], {}, ScoringConfig(), distributions=distributions)
+    assert median["dimensional_scores"]["market_demand"] == int(0.6 * 50)
+    assert "percentile ranks" in ranked["rationale"] and "percentile ranks" not in log_scored["rationale"]
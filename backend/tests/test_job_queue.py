@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from services import job_queue
+from services.cache import reset_default_stores
+from services.job_queue import JobCancelledError, JobContext, JobQueue, JobQueueFullError
+
+
+def _queue(tmp_path, handlers, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), handlers=handlers, **kwargs)
+
+
+def test_jobs_run_by_priority_and_persist_results(tmp_path):
+    order = []
+
+    def handler(payload, _context):
+        order.append(payload["name"])
+        return {"name": payload["name"]}
+
+    queue = _queue(tmp_path, {"echo": handler})
+    low = queue.submit("echo", {"name": "low"}, priority=0)
+    high = queue.submit("echo", {"name": "high"}, priority=5)
+    assert queue.run_pending() == 2
+    assert order == ["high", "low"]
+    assert queue.get(low)["status"] == "succeeded"
+    reopened = _queue(tmp_path, {"echo": handler})
+    assert reopened.get(high)["result"] == {"name": "high"}
+
+
+def test_cancel_queued_job_skips_execution(tmp_path):
+    calls = []
+    queue = _queue(tmp_path, {"echo": lambda payload, _context: calls.append(payload)})
+    job_id = queue.submit("echo", {})
+    assert queue.cancel(job_id)
+    assert queue.run_pending() == 0
+    assert queue.get(job_id)["status"] == "cancelled"
+    assert calls == []
+
+
+def test_running_job_stops_at_stage_boundary(tmp_path):
+    def handler(_payload, context):
+        context.set_stage("macro")
+        context.queue.cancel(context.job_id)
+        context.check_cancelled()
+        return {"unreachable": True}
+
+    queue = _queue(tmp_path, {"staged": handler})
+    job_id = queue.submit("staged", {})
+    queue.run_pending()
+    job = queue.get(job_id)
+    assert job["status"] == "cancelled"
+    assert job["stage"] == "macro"
+
+
+def test_submit_rejects_when_queue_is_full(tmp_path):
+    queue = _queue(tmp_path, {"echo": lambda payload, _context: payload}, max_pending=1)
+    queue.submit("echo", {})
+    with pytest.raises(JobQueueFullError):
+        queue.submit("echo", {})
+
+
+def test_start_requeues_only_jobs_whose_lease_expired(tmp_path):
+    handlers = {"echo": lambda payload, _context: payload}
+    owner = _queue(tmp_path, handlers)
+    live = owner.submit("echo", {"name": "live"}, priority=1)
+    stale = owner.submit("echo", {"name": "stale"})
+    assert owner._claim_next()["job_id"] == live
+    assert owner._claim_next()["job_id"] == stale
+    owner._update_owned(stale, heartbeat_at=time.time() - 120)
+
+    other = _queue(tmp_path, handlers, lease_seconds=60, poll_interval_seconds=0.05)
+    other.start()
+    try:
+        deadline = time.time() + 5
+        while other.get(stale)["status"] != "succeeded" and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        other.shutdown()
+    assert other.get(stale)["status"] == "succeeded"
+    assert other.get(stale)["worker_id"] == other.worker_id
+    job = other.get(live)
+    assert job["status"] == "running"
+    assert job["worker_id"] == owner.worker_id
+
+
+def test_worker_that_lost_its_lease_discards_the_outcome(tmp_path):
+    recorded = []
+
+    def handler(payload, context):
+        # While this worker stalls, its lease expires and another worker claims the job.
+        stale._update_owned(context.job_id, heartbeat_at=time.time() - 120)
+        assert other._claim_next()["job_id"] == context.job_id
+        context.on_success(lambda: recorded.append(payload))
+        return {"from": "stale"}
+
+    stale = _queue(tmp_path, {"slow": handler})
+    other = _queue(tmp_path, {"slow": handler})
+    job_id = stale.submit("slow", {"name": "slow"})
+    stale._execute(stale._claim_next())
+    job = stale.get(job_id)
+    assert job["status"] == "running"
+    assert job["worker_id"] == other.worker_id
+    assert job["result"] is None
+    assert recorded == []
+    with pytest.raises(JobCancelledError):
+        JobContext(stale, job_id).set_stage("news")
+
+
+def test_resetting_default_stores_stops_the_shared_queue(tmp_path):
+    queue = job_queue.get_job_queue()
+    threads = list(queue._workers)
+    assert threads and all(thread.is_alive() for thread in threads)
+    reset_default_stores()
+    assert not any(thread.is_alive() for thread in threads)
+    assert job_queue.get_job_queue() is not queue
@@ -0,0 +1,70 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import api.markets as markets
+from main import app
+from services.osint_pipeline import SubjectResolutionError
+
+client = TestClient(app)
+
+
+def test_osint_stream_emits_ndjson_events(monkeypatch):
+    def fake_stages(_subject, _config):
+        yield "resolution", {"resolved": {"country_code": "TR"}}
+        yield "scores", {"scores": {"overall_score": 42}}
+
+    monkeypatch.setattr(markets, "iter_analysis_stages", fake_stages)
+    response = client.post("/api/markets/osint/stream", json={"subject": {"target_name": "Turkey"}})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["stage"] for event in events] == ["resolution", "scores"]
+    assert events[1]["data"]["scores"]["overall_score"] == 42
+
+
+def test_osint_stream_unknown_country_returns_404(monkeypatch):
+    def failing_stages(_subject, _config):
+        raise SubjectResolutionError("Country 'Nowhere' not found.")
+        yield
+
+    monkeypatch.setattr(markets, "iter_analysis_stages", failing_stages)
+    response = client.post("/api/markets/osint/stream", json={"subject": {"target_name": "Nowhere"}})
+    assert response.status_code == 404
+
+
+def test_combined_report_streams_stored_results(monkeypatch, tmp_path):
+    from services.result_store import ResultStore
+
+    store = ResultStore(str(tmp_path))
+    digests = [
+        store.put({"subject": {"target_name": name}, "scores": {"overall_score": 50}, "evidence": []})
+        for name in ("Germany", "Poland")
+    ]
+    monkeypatch.setattr(markets, "get_result_store", lambda: store)
+
+    response = client.post("/api/markets/reports/combined", json={"digests": digests})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.text.index("1. Germany") < response.text.index("2. Poland")
+    assert response.text.count("<article>") == 2
+
+    missing = client.post("/api/markets/reports/combined", json={"digests": digests + ["0" * 64]})
+    assert missing.status_code == 404
+
+
+def test_pdf_batch_returns_zip_of_reports(monkeypatch, tmp_path):
+    import io
+    import zipfile
+
+    from services.result_store import ResultStore
+
+    store = ResultStore(str(tmp_path))
+    digests = [store.put({"subject": {"target_name": name}, "scores": {}, "evidence": []}) for name in ("Germany", "Côte d'Ivoire")]
+    monkeypatch.setattr(markets, "get_result_store", lambda: store)
+    monkeypatch.setattr(markets, "build_pdf_reports", lambda results, max_workers=None: [b"%PDF-1"] * len(results))
+
+    response = client.post("/api/markets/reports/pdf-batch", json={"digests": digests})
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+    assert names == ["001-Germany.pdf", "002-C_te_d_Ivoire.pdf"]
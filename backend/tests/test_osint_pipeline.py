@@ -22,3 +22,101 @@ def test_analyze_subject_outputs_expected_keys(monkeypatch):
     assert "scores" in result
     assert "evidence" in result
     assert len(result["evidence"]) > 0
+    assert set(result["telemetry"]["stages"]) == set(pipeline.PIPELINE_STAGES)
+    assert result["run_id"] == result["telemetry"]["run_id"]
+
+
+def test_iter_analysis_stages_emits_stages_in_order(monkeypatch):
+    monkeypatch.setattr(pipeline, "DataCollector", lambda: DummyCollector())
+    monkeypatch.setattr(pipeline, "get_trade_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "get_policy_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "collect_tenders", lambda _feeds: [])
+    monkeypatch.setattr(pipeline, "_resolve_country", lambda _name: {"country_code": "TR", "country_name": "Turkey"})
+
+    stages = [stage for stage, _ in pipeline.iter_analysis_stages(Subject(target_name="Turkey"))]
+    assert stages == list(pipeline.PIPELINE_STAGES) + ["result"]
+
+
+def test_rescore_result_only_changes_scores(monkeypatch):
+    monkeypatch.setattr(pipeline, "DataCollector", lambda: DummyCollector())
+    monkeypatch.setattr(pipeline, "get_trade_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "get_policy_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "collect_tenders", lambda _feeds: [])
+    monkeypatch.setattr(pipeline, "_resolve_country", lambda _name: {"country_code": "TR", "country_name": "Turkey"})
+    result = pipeline.analyze_subject(Subject(target_name="Turkey", products=["rubber"]))
+
+    weights = {"market_demand": 1.0, "trade_ease": 0.0, "political_risk": 0.0, "financial_viability": 0.0, "strategic_fit": 0.0}
+    rescored = pipeline.rescore_result(result, {"weights": weights})
+    assert rescored["scoring_config"]["weights"] == weights
+    assert rescored["scores"]["overall_score"] == rescored["scores"]["dimensional_scores"]["market_demand"]
+    assert rescored["evidence"] is result["evidence"]
+    assert rescored["run_id"] == result["run_id"]
+
+
+def test_partial_scores_stream_from_a_tender_generator(monkeypatch):
+    consumed = []
+
+    def tender_feed(_feeds):
+        for index in range(50):
+            consumed.append(index)
+            summary = "rubber tiles" if index % 10 == 0 else "office chairs"
+            yield {"title": f"Tender {index}", "url": f"https://tenders.gov/{index}", "summary": summary}
+
+    monkeypatch.setattr(pipeline, "DataCollector", lambda: DummyCollector())
+    monkeypatch.setattr(pipeline, "get_trade_signals", lambda _code, _collector: {"NE.IMP.GNFS.CD": {"label": "Imports", "value": 1}})
+    monkeypatch.setattr(pipeline, "get_policy_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "collect_tenders", tender_feed)
+    monkeypatch.setattr(pipeline, "_resolve_country", lambda _name: {"country_code": "TR", "country_name": "Turkey"})
+
+    events = list(pipeline.iter_analysis_stages(Subject(target_name="Turkey", products=["rubber"]), partial_scores=True))
+    partials = [payload for stage, payload in events if stage == "partial_scores"]
+    assert [payload["after"] for payload in partials] == ["macro", "trade", "policy", "news", "tenders"]
+    assert [payload["evidence_count"] for payload in partials] == [0, 1, 1, 2, 7]
+
+    result = events[-1][1]
+    assert len(consumed) == 50
+    assert len(result["evidence"]) == 7
+    assert partials[-1]["scores"] == result["scores"]
+    assert result["scores"] == pipeline.score_subject(
+        Subject(target_name="Turkey", products=["rubber"]),
+        result["macro"],
+        result["evidence"],
+        result["trade_signals"],
+        pipeline.ScoringConfig(),
+        result["sanctions"],
+    )
+
+
+def test_stage_payloads_are_capped_and_article_text_is_not_kept(monkeypatch):
+    class _Collector(DummyCollector):
+        def iter_regional_news(self, _name, queries=None):
+            for index in range(5):
+                yield {
+                    "title": f"News {index}",
+                    "url": f"https://example.com/{index}",
+                    "description": "rubber import",
+                    "full_text": "rubber " * 1000,
+                }
+
+    kept = []
+    original_drop = pipeline._drop_evidence_text
+
+    def tracking_drop(item):
+        original_drop(item)
+        kept.append(item)
+
+    monkeypatch.setattr(pipeline, "MAX_STAGE_ITEMS", 2)
+    monkeypatch.setattr(pipeline, "_drop_evidence_text", tracking_drop)
+    monkeypatch.setattr(pipeline, "DataCollector", lambda: _Collector())
+    monkeypatch.setattr(pipeline, "get_trade_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "get_policy_signals", lambda _code, _collector: {})
+    monkeypatch.setattr(pipeline, "collect_tenders", lambda _feeds: [])
+    monkeypatch.setattr(pipeline, "_resolve_country", lambda _name: {"country_code": "TR", "country_name": "Turkey"})
+
+    events = dict(pipeline.iter_analysis_stages(Subject(target_name="Turkey", products=["rubber"])))
+    assert len(events["news"]["news"]) == 2
+    assert events["news"]["news_total"] == 5
+    assert "full_text" not in events["news"]["news"][0]
+    assert len(events["result"]["evidence"]) == 5
+    assert all(item.get("full_text") is None and item.get("full_text_chars") == 7000 for item in kept)
+    assert all(item["relevance_score"] > 0 for item in events["result"]["evidence"])
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+from services import pdf_report
+
+
+def _result(evidence_count):
+    return {
+        "subject": {"target_name": "Türkiye"},
+        "scores": {"overall_score": 55, "confidence": 40, "rationale": "Gümrük verileri ve ایران تجارت"},
+        "evidence": [{"title": f"Haber {index}: ihracat artışı", "url": f"https://example.com/{index}"} for index in range(evidence_count)],
+    }
+
+
+@pytest.fixture(autouse=True)
+def isolated_fonts(monkeypatch, tmp_path):
+    caches = (pdf_report.report_fonts, pdf_report._parsed_fonts)
+    monkeypatch.setenv("OSINT_CACHE_DIR", str(tmp_path))
+    for cache in caches:
+        cache.cache_clear()
+    yield
+    for cache in caches:
+        cache.cache_clear()
+
+
+@pytest.fixture
+def rendered_text(monkeypatch):
+    texts = []
+    original = pdf_report._safe_multi_cell
+
+    def capture(pdf, width, height, text):
+        texts.append(pdf_report._safe_text(text, unicode=pdf.unicode))
+        original(pdf, width, height, text)
+
+    monkeypatch.setattr(pdf_report, "_safe_multi_cell", capture)
+    return texts
+
+
+def test_pdf_includes_every_evidence_item(rendered_text):
+    output = pdf_report.build_pdf_report(_result(60))
+    assert output.startswith(b"%PDF")
+    titles = [text for text in rendered_text if text.startswith(tuple(f"{index}. Haber" for index in range(1, 61)))]
+    assert len(titles) == 60
+
+
+def test_pdf_keeps_unicode_text_when_a_font_is_available(rendered_text):
+    if pdf_report.report_fonts() is None:
+        pytest.skip("No Unicode TTF font installed.")
+    pdf_report.build_pdf_report(_result(1))
+    assert any("Gümrük verileri ve ایران تجارت" in text for text in rendered_text)
+
+
+def test_unicode_text_keeps_urls_and_long_tokens_intact(rendered_text):
+    url = "https://example.com/reports/market_entry-" + "x" * 120
+    assert pdf_report._safe_text(url, unicode=True) == url
+    if pdf_report.report_fonts() is None:
+        pytest.skip("No Unicode TTF font installed.")
+    result = _result(0)
+    result["evidence"] = [{"title": "Long link", "url": url}]
+    assert pdf_report.build_pdf_report(result).startswith(b"%PDF")
+    assert url in rendered_text
+
+
+def test_persian_text_is_shaped_right_to_left(monkeypatch):
+    monkeypatch.delenv("OSINT_PDF_FONT", raising=False)
+    assert os.path.basename(pdf_report.report_fonts()[""]).startswith("DejaVuSans-")
+    pdf = pdf_report._new_pdf()
+    pdf.add_page()
+    pdf.set_font(pdf.report_font, "", 11)
+    pdf_report._safe_multi_cell(pdf, pdf_report._epw(pdf), 6, "بازار ایران")
+    glyphs = [glyph.glyph_name for glyph, _ in pdf.fonts["reportsans"].subset.items() if glyph]
+    drawn = [name for name in glyphs if name not in (".notdef", "space")]
+    # Joined forms (initial beh, initial Farsi yeh) replace the isolated letters...
+    assert {"uniFE91", "uniFBFE"} <= set(drawn)
+    assert "uni0628" not in drawn
+    # ...and the line is laid out right to left, starting from the final noon.
+    assert drawn[0] == "uni0646"
+
+
+def test_fonts_are_parsed_once_and_not_shared_between_documents(monkeypatch):
+    if pdf_report.report_fonts() is None:
+        pytest.skip("No Unicode TTF font installed.")
+    parsed = []
+    add_font = pdf_report.FPDF.add_font
+
+    def counting_add_font(self, *args, **kwargs):
+        parsed.append(args)
+        return add_font(self, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_report.FPDF, "add_font", counting_add_font)
+    persian = _result(0)
+    persian["scores"]["rationale"] = "بازار ایران"
+    first = pdf_report.build_pdf_report(persian)
+    second = pdf_report.build_pdf_report(_result(2))
+    assert len(parsed) == 2  # regular and bold, for the whole process
+    assert first.startswith(b"%PDF") and second.startswith(b"%PDF")
+
+    # Each document subsets its own copy, so glyphs from one never leak into the next.
+    fresh = pdf_report._new_pdf().fonts["reportsans"]
+    assert [glyph.glyph_name for glyph, _ in fresh.subset.items() if glyph] == [".notdef", "space"]
+    assert fresh.ttfont is not pdf_report._parsed_fonts()["reportsans"][0].ttfont
+
+
+def test_pdf_falls_back_to_latin1_core_fonts(rendered_text, monkeypatch):
+    monkeypatch.setattr(pdf_report, "report_fonts", lambda: None)
+    output = pdf_report.build_pdf_report(_result(1))
+    assert output.startswith(b"%PDF")
+    assert any(text.startswith("Gümrük verileri ve ") and "ایران" not in text for text in rendered_text)
+
+
+def test_batch_export_preserves_order():
+    results = [_result(count) for count in (0, 3)]
+    outputs = pdf_report.build_pdf_reports(results, max_workers=2)
+    # Documents embed their creation time, so compare sizes rather than bytes.
+    assert [len(output) for output in outputs] == [len(pdf_report.build_pdf_report(result)) for result in results]
+    assert len(outputs[0]) < len(outputs[1])
+
+
+def test_batch_export_caps_worker_processes(monkeypatch):
+    pools = []
+
+    class _Pool:
+        def __init__(self, max_workers, initializer=None):
+            pools.append(max_workers)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def map(self, function, items):
+            return [b"%PDF" for _ in items]
+
+    monkeypatch.setattr(pdf_report, "ProcessPoolExecutor", _Pool)
+    monkeypatch.setattr(pdf_report.os, "cpu_count", lambda: 2)
+    pdf_report.build_pdf_reports([_result(0)] * 3, max_workers=10_000)
+    assert pools == [2]
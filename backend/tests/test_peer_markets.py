@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+import services.peer_markets as peer_markets
+from main import app
+from services.indicator_distributions import get_indicator_distributions
+from services.job_queue import JobQueue
+from services.peer_markets import PeerIndex, find_peer_markets
+
+COUNTRIES = "TR PL MX TH ZA DE FR IT ES NL BE AT CH SE NO DK FI IE PT GR CZ HU RO BG HR SK SI EE LV LT".split()
+
+
+def _build_distributions():
+    distributions = get_indicator_distributions()
+    for index, country in enumerate(COUNTRIES):
+        # Rank order differs per indicator, so neighbours depend on all three.
+        distributions.observe("NY.GDP.MKTP.CD", country, 1e9 * (index + 1))
+        distributions.observe("SP.POP.TOTL", country, 1e6 * ((index * 7) % len(COUNTRIES) + 1))
+        distributions.observe("LP.LPI.OVRL.XQ", country, 2.0 + ((index * 11) % len(COUNTRIES)) / 10)
+    distributions.observe("NY.GDP.MKTP.CD", "VA", 1e7)
+    return distributions
+
+
+def test_neighbours_match_exhaustive_search():
+    index = PeerIndex.from_distributions(_build_distributions())
+    assert index.indicators == ["NY.GDP.MKTP.CD", "SP.POP.TOTL", "LP.LPI.OVRL.XQ"]
+    assert "TR" in index and "VA" not in index
+
+    peers = index.neighbours("TR", k=4)
+    row = index.countries.index("TR")
+    distances = sorted(
+        (float(((index.features[other] - index.features[row]) ** 2).sum() ** 0.5), index.countries[other])
+        for other in range(len(index))
+        if other != row
+    )
+    assert [peer["country_code"] for peer in peers] == [country for _distance, country in distances[:4]]
+    assert peers[0]["similarity"] >= peers[-1]["similarity"]
+    assert set(peers[0]["percentiles"]) == set(index.indicators)
+    assert index.neighbours("TR", k=500)[-1]["country_code"] == distances[-1][1]
+
+
+def test_peers_endpoint_queues_analyses_for_suggestions(monkeypatch, tmp_path):
+    client = TestClient(app)
+    subject = {"target_name": "Poland", "products": ["rubber tiles"], "hs_codes": ["4016"]}
+    assert client.post("/api/markets/peers", json={"subject": subject}).status_code == 409
+
+    _build_distributions()
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(peer_markets, "get_job_queue", lambda: queue)
+    response = client.post("/api/markets/peers", json={"subject": subject, "k": 3, "analyze": True})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["peers"] == find_peer_markets("PL", k=3)["peers"]
+    assert [job["country_code"] for job in body["jobs"]] == [peer["country_code"] for peer in body["peers"]]
+
+    queued = [queue.get(job["job_id"]) for job in body["jobs"]]
+    assert [job["payload"]["subject"]["target_name"] for job in queued] == [p["country_name"] for p in body["peers"]]
+    assert all(job["payload"]["subject"]["hs_codes"] == ["4016"] for job in queued)
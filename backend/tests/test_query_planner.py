@@ -0,0 +1,38 @@
+from models.subject import Subject
+from services.query_planner import QueryStats, canonical_query_key, plan_queries
+
+
+def _subject(target="Turkey"):
+    return Subject(
+        target_name=target,
+        products=["crumb rubber", "crumb rubbers", "rubber tiles"],
+        hs_codes=["4004", "4016"],
+        signals_of_interest=["import growth", "construction projects", "infrastructure tenders"],
+        risk_focus=["sanctions", "customs delays"],
+    )
+
+
+def test_equivalent_queries_share_a_key():
+    assert canonical_query_key("Crumb rubber imports Türkiye") == canonical_query_key("turkiye import of crumb rubber")
+
+
+def test_plan_respects_budget_and_covers_every_group():
+    plan = plan_queries(_subject(), budget=5)
+    groups = {candidate.group for candidate in plan.selected}
+    assert len(plan.selected) == 5
+    assert groups == {"product", "signal", "hs", "risk"}
+    assert "crumb rubbers market Turkey" in plan.duplicates
+
+
+def test_history_and_cache_shape_the_plan(tmp_path):
+    stats = QueryStats(str(tmp_path / "stats.sqlite3"))
+    # Tariff queries kept returning nothing new for another subject; the template carries over.
+    for _ in range(5):
+        stats.record("Germany", {"HS code 4004 Germany tariff": {"results": 5, "novel": 0}})
+    plan = plan_queries(_subject(), budget=10, stats=stats)
+    assert "HS code 4004 Turkey tariff" not in plan.queries
+
+    cached = plan_queries(_subject(), budget=2, is_cached=lambda query: "market" in query)
+    uncached = [candidate for candidate in cached.selected if not candidate.cached]
+    assert len(uncached) == 2
+    assert {"crumb rubber market Turkey", "rubber tiles market Turkey"} <= set(cached.queries)
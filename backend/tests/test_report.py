@@ -0,0 +1,36 @@
+from services import report
+
+
+def _evidence(count):
+    return [{"title": f"Item {index} <b>", "url": f"https://example.com/{index}"} for index in range(count)]
+
+
+def test_iter_html_report_batches_evidence_rows(monkeypatch, tmp_path):
+    monkeypatch.setattr(report, "EVIDENCE_ROWS_PER_CHUNK", 10)
+    result = {"subject": {"target_name": "Germany"}, "evidence": _evidence(25)}
+
+    chunks = list(report.iter_html_report(result))
+    row_chunks = [chunk for chunk in chunks if chunk.startswith("<tr>")]
+    assert [chunk.count("<tr>") for chunk in row_chunks] == [10, 10, 5]
+    assert "Item 3 &lt;b&gt;" in "".join(chunks)
+    assert report.build_html_report(result) == "".join(chunks)
+
+    path = tmp_path / "report.html"
+    written = report.write_html_report(report.iter_html_report(result), str(path))
+    assert written == len(path.read_bytes())
+
+
+def test_combined_report_consumes_results_lazily():
+    consumed = []
+
+    def results():
+        for name in ("Germany", "Poland"):
+            consumed.append(name)
+            yield {"subject": {"target_name": name}, "evidence": []}
+
+    chunks = report.iter_combined_html_report(results())
+    for chunk in chunks:
+        if "1. Germany" in chunk:
+            break
+    assert consumed == ["Germany"]
+    assert "2. Poland" in "".join(chunks)
@@ -0,0 +1,63 @@
+import threading
+
+from services import report_artifacts
+from services.report_artifacts import ArtifactCache, get_html_report, get_score_narrative
+
+
+RESULT = {
+    "run_id": "abc",
+    "subject": {"target_name": "Germany", "target_type": "country"},
+    "scores": {"overall_score": 61, "confidence": 40},
+    "evidence": [],
+}
+
+
+def test_artifacts_are_built_once_per_digest(monkeypatch):
+    calls = []
+    monkeypatch.setattr(report_artifacts, "ARTIFACTS", ArtifactCache())
+    monkeypatch.setattr(report_artifacts, "build_html_report", lambda result: calls.append(result) or "<html/>")
+
+    assert get_html_report(RESULT) == "<html/>"
+    assert get_html_report(dict(RESULT)) == "<html/>"
+    assert len(calls) == 1
+
+    get_html_report(RESULT, report_delta={"overall_score": 3})
+    assert len(calls) == 2
+    assert calls[-1]["report_delta"] == {"overall_score": 3}
+
+    narrative = get_score_narrative(RESULT, digest="known")
+    assert get_score_narrative(RESULT, digest="known") is narrative
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ArtifactCache(max_entries=2)
+    cache.get_or_build(("html", "a", ""), lambda: "a")
+    cache.get_or_build(("html", "b", ""), lambda: "b")
+    cache.get_or_build(("html", "a", ""), lambda: "rebuilt")
+    cache.get_or_build(("html", "c", ""), lambda: "c")
+    assert len(cache) == 2
+    assert cache.get_or_build(("html", "a", ""), lambda: "rebuilt") == "a"
+    assert cache.get_or_build(("html", "b", ""), lambda: "rebuilt") == "rebuilt"
+
+
+def test_concurrent_callers_share_one_build():
+    cache = ArtifactCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def builder():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "pdf"
+
+    first = threading.Thread(target=cache.get_or_build, args=(("pdf", "x", ""), builder))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=cache.get_or_build, args=(("pdf", "x", ""), builder))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+    assert len(calls) == 1
@@ -0,0 +1,23 @@
+from services.result_store import ResultStore, result_digest
+
+
+RESULT = {"run_id": "abc", "subject": {"target_name": "Turkey"}, "evidence": [{"title": "Gümrük"}], "scores": {"overall_score": 61}}
+
+
+def test_put_is_content_addressed_and_roundtrips(tmp_path):
+    store = ResultStore(str(tmp_path))
+    digest = store.put(RESULT)
+    assert digest == result_digest(RESULT)
+    assert store.put(dict(RESULT)) == digest
+    assert store.get(digest) == RESULT
+
+
+def test_reads_results_written_with_another_codec(tmp_path):
+    digest = ResultStore(str(tmp_path), serializer="json", compression="gz").put(RESULT)
+    assert ResultStore(str(tmp_path)).get(digest) == RESULT
+
+
+def test_get_rejects_unknown_or_malformed_digests(tmp_path):
+    store = ResultStore(str(tmp_path))
+    assert store.get("0" * 64) is None
+    assert store.get("../../etc/passwd") is None
@@ -0,0 +1,56 @@
+import json
+
+from services.result_store import ResultStore
+from services.run_store import RunStore, build_run_row
+
+
+def _row(run_id, target, timestamp):
+    return {"run_id": run_id, "timestamp": timestamp, "target": target, "type": "country", "overall_score": 50}
+
+
+def test_record_is_idempotent_by_run_id(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite3"))
+    result = {"run_id": "abc", "subject": {"target_name": "Turkey"}, "scores": {"overall_score": 61}, "evidence": [1, 2]}
+    assert store.record(build_run_row(result))
+    assert not store.record(build_run_row(result))
+    assert store.count() == 1
+    assert store.get("abc")["evidence_count"] == 2
+
+
+def test_query_filters_by_target_and_date_with_pagination(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite3"))
+    store.record_many(_row(f"r{i}", "Turkey" if i % 2 else "Iraq", f"2026-01-{i + 1:02d}T00:00:00Z") for i in range(10))
+    assert store.count(target="turkey") == 5
+    page = store.query(target="Turkey", limit=2, offset=1)
+    assert [row["run_id"] for row in page] == ["r7", "r5"]
+    assert store.count(since="2026-01-06T00:00:00Z") == 5
+
+
+def test_compaction_keeps_newest_rows(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite3"), max_rows=3, compact_every=5)
+    store.record_many(_row(f"r{i}", "Turkey", f"2026-01-{i + 1:02d}T00:00:00Z") for i in range(5))
+    assert [row["run_id"] for row in store.query()] == ["r4", "r3", "r2"]
+
+
+def test_compaction_deletes_results_no_run_references(tmp_path):
+    results = ResultStore(str(tmp_path / "results"), serializer="json", compression="gz")
+    shared = results.put({"score": "shared"})
+    old = results.put({"score": "old"})
+    store = RunStore(str(tmp_path / "runs.sqlite3"), max_rows=2, compact_every=0, result_store=results)
+    refs = [old, shared, shared, None]
+    store.record_many(
+        {**_row(f"r{i}", "Turkey", f"2026-01-{i + 1:02d}T00:00:00Z"), "result_ref": ref} for i, ref in enumerate(refs)
+    )
+    assert store.compact() == 2
+    assert not results.exists(old)
+    assert results.get(shared) == {"score": "shared"}
+
+
+def test_migrates_legacy_json_once(tmp_path):
+    legacy = tmp_path / "run_history.json"
+    rows = [{"timestamp": "2025-05-01T00:00:00Z", "target": "Iraq", "overall_score": 40}]
+    legacy.write_text(json.dumps(rows), encoding="utf-8")
+    store = RunStore(str(tmp_path / "runs.sqlite3"))
+    assert store.migrate_legacy_json(str(legacy)) == 1
+    assert not legacy.exists()
+    assert store.record_many(rows) == 0
@@ -0,0 +1,88 @@
+import os
+
+from services.sanctions_index import SanctionsIndex, screen_evidence, screen_subject
+
+SDN = """36,"AERO CONTINENTE S.A.","-0- ","SDNTK",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,"Peru based."
+7160,"BANK MELLI IRAN","-0- ","IRAN] [IRGC",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+7161,"ISLAMIC REPUBLIC OF IRAN SHIPPING LINES","-0- ","IRAN] [NPWMD",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+7162,"PERSIAN GULF PETROCHEMICAL INDUSTRY CO.","-0- ","IRAN",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+7163,"TEHRAN RUBBER TRADING LLC","-0- ","IRAN",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+7164,"KISH ISLAND TYRE COMPANY","-0- ","IRAN",-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0- ,-0-
+"""
+ALT = """7161,101,"aka","IRISL",-0-
+"""
+ADD = """7160,201,"Ferdowsi Avenue","Tehran","Iran",-0-
+7161,202,-0-,"Tehran","Iran",-0-
+7162,203,-0-,"Asaluyeh","Iran",-0-
+7163,204,-0-,"Tehran","Iran",-0-
+7164,205,-0-,"Kish","Iran",-0-
+36,206,-0-,"Lima","Peru",-0-
+"""
+UN = """<?xml version="1.0" encoding="UTF-8"?>
+<CONSOLIDATED_LIST><ENTITIES><ENTITY>
+<DATAID>110</DATAID><FIRST_NAME>KOREA MINING DEVELOPMENT TRADING CORPORATION</FIRST_NAME>
+<UN_LIST_TYPE>DPRK</UN_LIST_TYPE><REFERENCE_NUMBER>KPe.001</REFERENCE_NUMBER>
+<ENTITY_ALIAS><ALIAS_NAME>KOMID</ALIAS_NAME></ENTITY_ALIAS>
+<ENTITY_ADDRESS><COUNTRY>Democratic People's Republic of Korea</COUNTRY></ENTITY_ADDRESS>
+</ENTITY></ENTITIES></CONSOLIDATED_LIST>
+"""
+EU = """Entity_LogicalId;Entity_SubjectType_ClassificationCode;Entity_Regulation_Programme;NameAlias_WholeName;Address_CountryDescription
+13;enterprise;SYR;Syrian Petroleum Company;SYRIAN ARAB REPUBLIC
+13;enterprise;SYR;SPC;
+"""
+
+
+def _write(directory, name, text):
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as handle:
+        handle.write(text)
+
+
+def _index(tmp_path):
+    lists = tmp_path / "lists"
+    lists.mkdir()
+    for name, text in (("sdn.csv", SDN), ("alt.csv", ALT), ("add.csv", ADD), ("consolidated.xml", UN), ("eu.csv", EU)):
+        _write(lists, name, text)
+    return SanctionsIndex(str(tmp_path / "sanctions.sqlite3"), str(lists)), lists
+
+
+def test_fuzzy_screening_and_country_exposure(tmp_path):
+    index, _lists = _index(tmp_path)
+    assert index.refresh() == {"ofac": "loaded", "un": "loaded", "eu": "loaded"}
+
+    hits = index.screen(["Bank Meli Iran", "Irisl", "Komid", "Syrian Petroleum Co", "Istanbul Rubber Works"])
+    assert hits["Bank Meli Iran"][0].listed_name == "BANK MELLI IRAN"
+    assert hits["Irisl"][0].listed_name == "ISLAMIC REPUBLIC OF IRAN SHIPPING LINES"
+    assert hits["Komid"][0].source == "un"
+    assert hits["Syrian Petroleum Co"][0].countries == ["SY"]
+    assert hits["Istanbul Rubber Works"] == []
+
+    iran = index.country_exposure("IR")
+    assert iran["listed_entries"] == 5
+    assert "ofac:IRAN" in iran["programs"] and "ofac:SDNTK" not in iran["programs"]
+    assert index.country_exposure("KP")["programs"] == ["un:DPRK"]
+    assert index.country_exposure("TR") == {"country_code": "TR", "listed_entries": 0, "listed_by_source": {}, "programs": []}
+
+    summary = screen_subject(index, "IR", ["Tehran Rubber Trading"])
+    assert summary["entity_hits"][0]["listed_name"] == "TEHRAN RUBBER TRADING LLC"
+    summary = screen_evidence(index, summary, [{"title": "Kish Island Tyre Company wins export deal"}])
+    assert [hit["ref"] for hit in summary["evidence_hits"]] == ["7164"]
+    assert screen_subject(SanctionsIndex(str(tmp_path / "empty.sqlite3"), str(tmp_path / "none")), "IR") == {
+        "available": False
+    }
+
+
+def test_refresh_reloads_only_changed_lists(tmp_path):
+    index, lists = _index(tmp_path)
+    index.refresh()
+    assert set(index.refresh().values()) == {"unchanged"}
+
+    _write(lists, "eu.csv", EU + "14;person;RUS;Ivan Petrovich Sidorov;RUSSIAN FEDERATION\n")
+    os.utime(lists / "sdn.csv")
+    assert index.refresh() == {"ofac": "unchanged", "un": "unchanged", "eu": "loaded"}
+    assert index.sources()["eu"]["entries"] == 2
+    assert index.screen(["Ivan Sidorov Petrovich"])["Ivan Sidorov Petrovich"][0].source == "eu"
+
+    os.remove(lists / "consolidated.xml")
+    assert index.refresh()["un"] == "removed"
+    assert index.screen(["KOMID"])["KOMID"] == []
+    assert set(index.sources()) == {"ofac", "eu"}
@@ -16,3 +16,23 @@ def test_confidence_increases_with_evidence():
     evidence = [{"signal_type": "news", "quality": "official"} for _ in range(5)]
     result = score_subject(subject, macro, evidence, trade, ScoringConfig())
     assert result["confidence"] >= 70
+
+
+def test_political_risk_is_neutral_without_sanctions_index_and_drops_with_exposure():
+    subject = Subject(target_name="Iran")
+    macro = {"gdp": 1_000_000, "population": 1_000_000}
+
+    def political_risk(sanctions):
+        return score_subject(subject, macro, [], {}, ScoringConfig(), sanctions)["dimensional_scores"]["political_risk"]
+
+    assert political_risk(None) == 50
+    assert political_risk({"available": False}) == 50
+    clean = political_risk({"available": True, "country": {"programs": [], "listed_entries": 0}})
+    exposed = political_risk(
+        {
+            "available": True,
+            "country": {"programs": ["ofac:IRAN", "eu:IRN"], "listed_entries": 900},
+            "entity_hits": [{"listed_name": "TEHRAN RUBBER TRADING LLC"}],
+        }
+    )
+    assert clean > 50 > exposed
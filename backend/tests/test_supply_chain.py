@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import services.osint_pipeline as pipeline
+from models.subject import Subject
+from services.supply_chain import TradeGraph, analyze_supply_chain
+from services.trade_store import TradeStore, read_baci
+
+# BACI: year, exporter, importer (ISO numeric), HS6, value (k US$), tonnes. Turkey re-exports to Germany.
+BACI_ROWS = [
+    (2022, 156, 792, "400400", 1500.0, "60"),
+    (2022, 364, 792, "400400", 500.0, "40"),
+    (2022, 156, 276, "400400", 3000.0, "90"),
+    (2022, 792, 276, "400400", 1000.0, "30"),
+    (2022, 792, 792, "400400", 50.0, "1"),
+    (2022, 156, 276, "010121", 9000.0, "1"),
+]
+
+
+def test_multi_hop_dependency_matches_damped_path_sum():
+    graph = TradeGraph.from_arrays(
+        ["A", "B", "B", "C", "A"], ["B", "C", "D", "B", "A"], [100.0, 50.0, 50.0, 10.0, 999.0]
+    )
+    assert graph.countries == ["A", "B", "C", "D"]
+    analysis = graph.analyze(damping=0.5)
+
+    weights = np.array([[0, 100, 0, 0], [0, 0, 50, 50], [0, 10, 0, 0], [0, 0, 0, 0]], dtype=float)
+    shares = weights / np.maximum(weights.sum(axis=1, keepdims=True), 1)
+    paths = sum(0.5 ** hop * np.linalg.matrix_power(shares, hop + 1) for hop in range(60))
+    np.fill_diagonal(paths, 0)
+    expected = paths / np.maximum(paths.sum(axis=1, keepdims=True), 1e-12)
+    assert np.allclose(analysis.effective_shares, expected)
+
+    profile = analysis.profile("A")
+    assert profile["upstream"] == {"suppliers": [{"country": "B", "share": 1.0}], "concentration": 1.0}
+    assert [row["country"] for row in profile["multi_hop"]["suppliers"]] == ["B", "C", "D"]
+    assert profile["multi_hop"]["concentration"] < profile["upstream"]["concentration"]
+    assert analysis.profile("B")["downstream"]["buyers"] == [
+        {"country": "A", "share": 0.9091},
+        {"country": "C", "share": 0.0909},
+    ]
+    assert analysis.profile("ZZ") is None
+
+
+def test_supply_chain_target_is_analysed_from_trade_flows(monkeypatch, tmp_path):
+    path = tmp_path / "BACI_HS17_Y2022.csv"
+    lines = ["t,i,j,k,v,q"] + [",".join(str(value) for value in row) for row in BACI_ROWS]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    store = TradeStore(str(tmp_path / "flows"))
+    store.ingest(read_baci(str(path)), path.stem)
+    monkeypatch.setenv("OSINT_TRADE_DIR", store.root)
+
+    analysis = analyze_supply_chain(["4004"], focus="DE")
+    assert analysis["world_imports"] == 6_000_000.0
+    assert [row["country"] for row in analysis["top_suppliers"]] == ["CN", "TR", "IR"]
+    germany = analysis["focus"]["multi_hop"]["suppliers"]
+    assert [row["country"] for row in germany] == ["CN", "TR", "IR"]
+    assert germany[2]["direct_share"] == 0.0 and germany[2]["share"] > 0
+
+    class _Collector:
+        def get_regional_news(self, _name, queries=None):
+            return []
+
+    monkeypatch.setattr(pipeline, "DataCollector", lambda: _Collector())
+    monkeypatch.setattr(pipeline, "collect_tenders", lambda _feeds: [])
+    monkeypatch.setattr(pipeline, "_resolve_country", lambda _name: {"country_code": "DE", "country_name": "Germany"})
+    subject = Subject(target_type="supply_chain", target_name="Crumb rubber", region="Germany", hs_codes=["4004"])
+    result = pipeline.analyze_subject(subject)
+    assert result["supply_chain"]["focus"]["country_code"] == "DE"
+    assert not any("Only country targets" in warning for warning in result["warnings"])
+    assert result["trade_signals"]["HS.IMPORTS"]["value"] == 4_000_000.0
+    scores = result["scores"]["dimensional_scores"]
+    assert scores["market_demand"] > 0
+    concentration = result["trade_signals"]["SC.SUPPLIER.CONCENTRATION"]["value"]
+    assert scores["trade_ease"] == int(0.5 * 100 * (1 - concentration) + 0.5 * 50)
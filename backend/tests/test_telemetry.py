@@ -0,0 +1,34 @@
+from services.cache import SimpleFileCache
+from services.telemetry import RunTrace, span, trace_to_prometheus
+
+
+def test_trace_records_stages_and_nested_spans():
+    trace = RunTrace(run_id="run-1")
+    with trace.stage("news"):
+        with span("brave.query", query="rubber"):
+            pass
+    payload = trace.to_dict()
+    assert payload["run_id"] == "run-1"
+    assert "news" in payload["stages"]
+    child = payload["spans"][1]
+    assert child["name"] == "brave.query"
+    assert child["parent"] == payload["spans"][0]["id"]
+
+
+def test_span_is_noop_without_active_trace():
+    with span("orphan") as record:
+        assert record is None
+
+
+def test_cache_hits_and_misses_are_attributed_to_active_trace(tmp_path):
+    cache = SimpleFileCache(str(tmp_path / "cache.json"))
+    trace = RunTrace()
+    with trace.stage("macro"):
+        cache.get("missing")
+        cache.set("key", {"value": 1})
+        cache.get("key")
+    stats = trace.to_dict()["cache"]["cache.json"]
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+    exported = trace_to_prometheus(trace)
+    assert 'osint_cache_hits_total{cache="cache.json"} 1' in exported
+    assert 'osint_stage_seconds_total{stage="macro"}' in exported
@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from models.scoring_config import ScoringConfig
+from models.subject import Subject
+from services.scoring import score_subject
+from services.trade_store import TradeStore, read_baci, read_comtrade
+
+# BACI: year, exporter, importer (ISO numeric; 842 is BACI's code for the US), HS6, value (k US$), tonnes.
+BACI_ROWS = [
+    (2021, 156, 792, "400400", 1000.0, "50"),
+    (2021, 364, 792, "400400", 500.0, "NA"),
+    (2022, 156, 792, "400400", 1500.0, "60"),
+    (2022, 364, 792, "400400", 800.0, "40"),
+    (2022, 842, 792, "401699", 700.0, "5"),
+    (2022, 156, 792, "010121", 9000.0, "1"),
+    (2022, 156, 276, "400400", 4000.0, "90"),
+]
+
+
+def _store(tmp_path):
+    path = tmp_path / "BACI_HS17_Y2021-2022.csv"
+    lines = ["t,i,j,k,v,q"] + [",".join(str(value) for value in row) for row in BACI_ROWS]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    store = TradeStore(str(tmp_path / "flows"))
+    assert store.ingest(read_baci(str(path)), path.stem) == len(BACI_ROWS)
+    # Re-ingesting the same dump replaces its files instead of doubling the flows.
+    assert store.ingest(read_baci(str(path)), path.stem) == len(BACI_ROWS)
+    return store
+
+
+def test_filtered_queries_prune_partitions_and_compute_product_signals(tmp_path):
+    store = _store(tmp_path)
+    assert store.years() == [2021, 2022]
+    assert sorted((tmp_path / "flows" / "year=2022").iterdir())[0].name == "chapter=01"
+
+    flows = store.query("TR", ["4004"], years=[2022])
+    assert sorted(flows.column("partner").to_pylist()) == ["CN", "IR"]
+    assert store.query("TR", ["40"], partners=["US"]).column("value_usd").to_pylist() == [700_000.0]
+    assert store.query("TR", ["9999"]).num_rows == 0
+
+    signals = store.product_signals("TR", ["4004", "4016"])
+    assert signals["HS.IMPORTS"]["value"] == 3_000_000.0
+    assert signals["HS.IMPORTS"]["year"] == 2022
+    assert signals["HS.IMPORTS.GROWTH"]["value"] == 100.0
+    suppliers = signals["HS.TOP.SUPPLIERS"]["suppliers"]
+    assert [row["partner"] for row in suppliers] == ["CN", "IR", "US"]
+    assert suppliers[0]["share"] == 0.5
+    assert store.product_signals("TR", []) == {}
+
+
+def test_product_imports_drive_market_demand(tmp_path):
+    store = _store(tmp_path)
+    subject = Subject(target_name="Turkey", hs_codes=["4004"])
+    macro = {"gdp": 1_000_000_000_000, "population": 85_000_000}
+    base = score_subject(subject, macro, [], {}, ScoringConfig())["dimensional_scores"]["market_demand"]
+    with_product = score_subject(subject, macro, [], store.product_signals("TR", ["4004"]), ScoringConfig())
+    assert with_product["dimensional_scores"]["market_demand"] != base
+    assert "HS codes" in with_product["rationale"]
+
+
+def test_comtrade_ingest_keeps_leading_zero_codes_and_drops_totals(tmp_path):
+    path = tmp_path / "comtrade_imports_2022.csv"
+    path.write_text(
+        "refYear,reporterISO,partnerISO,cmdCode,flowCode,primaryValue,netWgt\n"
+        "2022,TUR,CHN,010121,M,500000,10\n"
+        "2022,TUR,CHN,400122,M,250000,20\n"
+        "2022,TUR,W00,400122,M,900000,30\n"
+        "2022,TUR,CHN,4001,M,250000,20\n"
+        "2022,TUR,DEU,400122,X,100000,5\n",
+        encoding="utf-8",
+    )
+    store = TradeStore(str(tmp_path / "flows"))
+    assert store.ingest(read_comtrade(str(path)), path.stem) == 2
+
+    assert store.query("TR", ["01"]).column("hs6").to_pylist() == ["010121"]
+    flows = store.query("TR", ["4001"])
+    assert flows.column("partner").to_pylist() == ["CN"]
+    assert flows.column("value_usd").to_pylist() == [250_000.0]
@@ -0,0 +1,36 @@
+from services.telemetry import RunTrace
+from services.usage_ledger import UsageLedger
+
+
+def test_acquire_books_calls_per_key_and_user_and_blocks_over_quota(tmp_path, monkeypatch):
+    monkeypatch.setenv("OSINT_BRAVE_DAILY_QUOTA", "3")
+    monkeypatch.setenv("OSINT_QUOTA_RESERVE", "0")
+    ledger = UsageLedger(str(tmp_path / "usage.sqlite3"))
+    trace = RunTrace(user="alice")
+    with trace.activate():
+        assert all(ledger.acquire("brave", "key-1").allowed for _ in range(3))
+        assert not ledger.acquire("brave", "key-1").allowed
+        ledger.record_cache_hit("brave", "key-1")
+    # Another key has its own quota.
+    assert ledger.acquire("brave", "key-2", user="bob").allowed
+
+    rows = {(row["user"], row["calls"]) for row in ledger.report(api="brave")}
+    assert rows == {("alice", 3), ("bob", 1)}
+    assert all("key-1" not in row["key_hash"] for row in ledger.report())
+    summary = trace.usage_summary()
+    assert summary["user"] == "alice"
+    assert summary["apis"]["brave"] == {"calls": 3, "cache_hits": 1, "blocked": 1, "cost": 0.015}
+
+
+def test_check_keeps_reserve_and_user_quota(tmp_path, monkeypatch):
+    monkeypatch.setenv("OSINT_BRAVE_DAILY_QUOTA", "10")
+    monkeypatch.setenv("OSINT_BRAVE_USER_DAILY_QUOTA", "4")
+    monkeypatch.setenv("OSINT_QUOTA_RESERVE", "0.2")
+    ledger = UsageLedger(str(tmp_path / "usage.sqlite3"))
+    assert ledger.check("brave", "key", calls=8, user="alice").allowed is False
+    decision = ledger.check("brave", "key", calls=3, user="alice")
+    assert decision.allowed and decision.remaining == 3
+    for _ in range(3):
+        ledger.acquire("brave", "key", user="alice")
+    assert ledger.check("brave", "key", calls=1, user="alice").remaining == 0
+    assert ledger.check("brave", "key", calls=3, user="bob").allowed
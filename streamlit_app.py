@@ -1,8 +1,7 @@
 import json
 import os
 import sys
-from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
 
@@ -12,9 +11,22 @@ from dotenv import load_dotenv
 sys.path.append(os.path.join(os.path.dirname(__file__), "backend"))
 
 from models.subject import Subject
-from services.osint_pipeline import analyze_subject, SubjectResolutionError
-from services.hs_utils import suggest_hs_codes
-from services.report import build_html_report, build_score_narrative
+from services.osint_pipeline import iter_analysis_stages, rescore_result, SubjectResolutionError
+from services.job_queue import JobQueueFullError
+from services.peer_markets import find_peer_markets, queue_peer_analyses
+from services.evidence_table import (
+    SORTABLE_COLUMNS,
+    build_evidence_frame,
+    build_table_frame,
+    evidence_facets,
+    page_count,
+    paginate_frame,
+    query_evidence,
+)
+from services.hs_utils import get_hs_index, suggest_hs_codes
+from services.report_artifacts import get_html_report, get_pdf_report, get_score_narrative
+from services.result_store import get_result_store, result_digest
+from services.run_store import RunStore, build_run_row, get_run_store
 
 load_dotenv()
 
@@ -26,7 +38,9 @@ st.set_page_config(
 )
 
 PRESET_PATH = os.path.join(os.path.dirname(__file__), "backend", ".cache", "weight_presets.json")
-RUN_HISTORY_PATH = os.path.join(os.path.dirname(__file__), "backend", ".cache", "run_history.json")
+LEGACY_RUN_HISTORY_PATH = os.path.join(os.path.dirname(__file__), "backend", ".cache", "run_history.json")
+HISTORY_PAGE_SIZES = [25, 50, 100]
+EVIDENCE_PAGE_SIZES = [25, 50, 100, 250]
 
 
 def _load_presets() -> Dict[str, Dict[str, float]]:
@@ -45,20 +59,18 @@ def _save_presets(presets: Dict[str, Dict[str, float]]) -> None:
         json.dump(presets, handle, ensure_ascii=False, indent=2)
 
 
-def _load_run_history() -> List[Dict[str, str]]:
-    if not os.path.exists(RUN_HISTORY_PATH):
-        return []
-    try:
-        with open(RUN_HISTORY_PATH, "r", encoding="utf-8") as handle:
-            return json.load(handle)
-    except Exception:
-        return []
+@st.cache_resource(show_spinner=False)
+def _run_store() -> RunStore:
+    store = get_run_store()
+    store.migrate_legacy_json(LEGACY_RUN_HISTORY_PATH)
+    return store
+
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _evidence_frame(result_key: str, _evidence: List[Dict[str, object]]) -> pd.DataFrame:
+    # Keyed by run id (re-scoring keeps the evidence): the evidence list itself is never hashed.
+    return build_evidence_frame(_evidence)
 
-def _save_run_history(history: List[Dict[str, str]]) -> None:
-    os.makedirs(os.path.dirname(RUN_HISTORY_PATH), exist_ok=True)
-    with open(RUN_HISTORY_PATH, "w", encoding="utf-8") as handle:
-        json.dump(history, handle, ensure_ascii=False, indent=2)
 
 def _parse_csv_list(value: str) -> List[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
@@ -68,42 +80,30 @@ def _dict_to_rows(data: Dict[str, object]) -> List[Dict[str, object]]:
     return [{"key": key, "value": value} for key, value in data.items()]
 
 
-
-
-@st.cache_data(ttl=3600, show_spinner=False)
-def run_analysis(subject_payload: dict, scoring_payload: dict):
+def run_analysis(subject_payload: dict, fetch_full_text: bool = False, _on_stage=None):
+    # Only called when the user runs an analysis, and every run must get its own run_id,
+    # history row and delta, so the result is not cached here: the collectors keep their
+    # own response caches. Weights are applied afterwards with rescore_result, so changing
+    # them never re-runs collection.
     subject = Subject(**subject_payload)
-    return analyze_subject(subject, scoring_config=scoring_payload)
+    result = {}
+    for stage, payload in iter_analysis_stages(subject, partial_scores=True, fetch_full_text=fetch_full_text):
+        if stage == "result":
+            result = payload
+        elif _on_stage:
+            _on_stage(stage, payload)
+    return result
 
 
-st.title("Market Opportunity OSINT")
-st.caption("Evidence-first research for export market screening using open sources.")
-st.markdown(
-    """
-This tool helps analysts quickly screen export markets using public data and OSINT.  
-Fill the **Subject Definition** on the left, run the analysis, and review the evidence-backed score.
-"""
-)
-
-with st.expander("How to interpret the score", expanded=False):
-    st.markdown(
-        """
-- **Overall score**: weighted composite of the dimensions you set in the sidebar.  
-- **Confidence**: data availability + evidence mix (news, trade, policy, tenders).  
-- **Evidence Pack**: raw sources used to justify the score. Always review before decisions.
-"""
-    )
+def _apply_rescore(scoring_payload: dict) -> None:
+    rescored = rescore_result(st.session_state["analysis_result"], scoring_payload)
+    st.session_state["analysis_result"] = rescored
+    st.session_state["result_digest"] = result_digest(rescored)
 
-if "comparisons" not in st.session_state:
-    st.session_state["comparisons"] = []
-if "last_result" not in st.session_state:
-    st.session_state["last_result"] = None
-if "run_history" not in st.session_state:
-    st.session_state["run_history"] = _load_run_history()
-if "analysis_result" not in st.session_state:
-    st.session_state["analysis_result"] = None
 
-with st.sidebar:
+@st.fragment
+def _sidebar_inputs() -> None:
+    # Edits here rerun only this fragment; a full app rerun happens when a result changes.
     st.subheader("Subject Definition")
     if st.button("Quick Start: Turkiye (Rubber Exports)"):
         st.session_state["quick_start"] = {
@@ -182,9 +182,11 @@ with st.sidebar:
             if st.button("Suggest HS codes"):
                 suggested = suggest_hs_codes(products)
                 if suggested:
-                    hs_codes = ", ".join(sorted(set(suggested)))
+                    hs_codes = ", ".join(suggested)
                     st.session_state["suggested_hs_codes"] = hs_codes
-                    st.success(f"Suggested HS codes: {hs_codes}")
+                    st.success(f"Suggested HS codes (best first): {hs_codes}")
+                    hs_index = get_hs_index()
+                    st.caption("\n".join(f"- **{code}**: {hs_index.describe(code) or ''}" for code in suggested))
                 else:
                     st.info("No HS code suggestions found.")
             languages = st.text_input(
@@ -192,6 +194,12 @@ with st.sidebar:
                 help="Used for query generation (multilingual support is limited).",
                 value=quick.get("languages", "en"),
             )
+            fetch_full_text = st.checkbox(
+                "Fetch full article text",
+                value=False,
+                help="Downloads the linked news pages so keyword matching and ranking use the article, "
+                "not just the search snippet. Slower on the first run; pages are cached afterwards.",
+            )
         tender_feeds = st.text_area(
             "Tender RSS/Atom feeds (comma-separated URLs)",
             placeholder="https://example.com/tenders/rss",
@@ -204,11 +212,13 @@ with st.sidebar:
         hs_codes = ""
         languages = "en"
         tender_feeds = ""
+        fetch_full_text = False
     st.subheader("Scoring Weights")
     presets = _load_presets()
     preset_names = ["Default"] + sorted(presets.keys())
     selected_preset = st.selectbox("Preset", preset_names, index=0)
 
+    previous_weights = dict(st.session_state.get("weights") or {})
     if "weights" not in st.session_state:
         st.session_state["weights"] = {
             "market_demand": 0.35,
@@ -267,6 +277,10 @@ with st.sidebar:
         "financial_viability": w_fin,
         "strategic_fit": w_fit,
     }
+    # Weight edits (or a preset) only re-score the displayed result; nothing is collected again.
+    if previous_weights and previous_weights != st.session_state["weights"] and st.session_state.get("analysis_result"):
+        _apply_rescore({"weights": dict(st.session_state["weights"])})
+        st.rerun()
 
     st.caption("Weights are normalized automatically during scoring.")
     preset_name = st.text_input("Save preset as", value="")
@@ -275,47 +289,92 @@ with st.sidebar:
         _save_presets(presets)
         st.success("Preset saved.")
 
-    submit = st.button("Run OSINT Analysis")
-
-if submit:
-    if not target_name.strip():
-        st.error("Target name is required.")
-        st.stop()
-
-    subject_payload = {
-        "target_type": target_type,
-        "target_name": target_name.strip(),
-        "region": region.strip() or None,
-        "products": _parse_csv_list(products),
-        "hs_codes": _parse_csv_list(hs_codes),
-        "signals_of_interest": _parse_csv_list(signals),
-        "risk_focus": _parse_csv_list(risks),
-        "time_horizon_months": time_horizon,
-        "languages": _parse_csv_list(languages) or ["en"],
-        "tender_feeds": _parse_csv_list(tender_feeds),
-    }
 
-    scoring_payload = {
-        "weights": {
-            "market_demand": w_market,
-            "trade_ease": w_trade,
-            "political_risk": w_risk,
-            "financial_viability": w_fin,
-            "strategic_fit": w_fit,
+    if st.button("Run OSINT Analysis"):
+        if not target_name.strip():
+            st.error("Target name is required.")
+            return
+        st.session_state["pending_analysis"] = {
+            "subject": {
+                "target_type": target_type,
+                "target_name": target_name.strip(),
+                "region": region.strip() or None,
+                "products": _parse_csv_list(products),
+                "hs_codes": _parse_csv_list(hs_codes),
+                "signals_of_interest": _parse_csv_list(signals),
+                "risk_focus": _parse_csv_list(risks),
+                "time_horizon_months": time_horizon,
+                "languages": _parse_csv_list(languages) or ["en"],
+                "tender_feeds": _parse_csv_list(tender_feeds),
+            },
+            "scoring": {"weights": dict(st.session_state["weights"])},
+            "fetch_full_text": fetch_full_text,
         }
-    }
+        st.rerun()
+
+
+@st.fragment
+def _evidence_explorer(result: Dict[str, object], digest: Optional[str]) -> None:
+    # Filters and paging rerun only this fragment.
+    if result["evidence"]:
+        evidence_frame = _evidence_frame(str(result.get("run_id") or digest), result["evidence"])
+        relevance_values = evidence_frame["relevance_score"].dropna()
+        if len(relevance_values):
+            st.subheader("Relevance Histogram")
+            st.caption("Higher values indicate stronger keyword match to your subject.")
+            st.bar_chart(relevance_values.reset_index(drop=True))
+            if (relevance_values == 0).all():
+                st.caption("All relevance scores are 0. Refine keywords or add sources for better matches.")
+        else:
+            st.caption("Relevance histogram not available (no numeric relevance scores yet).")
+
+        facets = evidence_facets(evidence_frame)
+        filter_col, quality_col, relevance_col = st.columns(3)
+        with filter_col:
+            signal_groups = st.multiselect("Signal type", facets["signal_group"])
+        with quality_col:
+            qualities = st.multiselect("Quality", facets["quality"])
+        with relevance_col:
+            min_relevance = st.slider("Minimum relevance", 0, 100, 0)
+        search_col, sort_col, size_col = st.columns([2, 1, 1])
+        with search_col:
+            evidence_search = st.text_input("Search titles and summaries")
+        with sort_col:
+            sort_by = st.selectbox("Sort by", SORTABLE_COLUMNS)
+        with size_col:
+            evidence_page_size = st.selectbox("Rows per page", EVIDENCE_PAGE_SIZES, key="evidence_page_size")
+        evidence_page = int(st.session_state.get("evidence_page", 1))
+        page_rows, evidence_total = query_evidence(
+            evidence_frame,
+            signal_groups=signal_groups,
+            qualities=qualities,
+            min_relevance=min_relevance or None,
+            search=evidence_search,
+            sort_by=sort_by,
+            descending=sort_by in ("relevance_score", "keyword_hits"),
+            page=evidence_page,
+            page_size=evidence_page_size,
+        )
+        evidence_pages = page_count(evidence_total, evidence_page_size)
+        if evidence_page > evidence_pages:
+            # Filters shrank the result set: query_evidence already served the last page.
+            evidence_page = evidence_pages
+            st.session_state["evidence_page"] = evidence_pages
+        st.dataframe(
+            page_rows.drop(columns=["signal_group"]),
+            width="stretch",
+            hide_index=True,
+            column_config={"url": st.column_config.LinkColumn("url")},
+        )
+        st.number_input("Evidence page", min_value=1, max_value=evidence_pages, step=1, key="evidence_page")
+        st.caption(f"{evidence_total} of {len(evidence_frame)} evidence items match, page {evidence_page} of {evidence_pages}.")
+    else:
+        st.info("No evidence collected. Check API keys or adjust queries.")
 
-    with st.spinner("Running OSINT pipeline..."):
-        try:
-            st.session_state["analysis_result"] = run_analysis(subject_payload, scoring_payload)
-        except SubjectResolutionError as exc:
-            st.error(str(exc))
-            st.stop()
-        except Exception as exc:
-            st.error(f"Unexpected error: {exc}")
-            st.stop()
 
-if st.session_state["analysis_result"]:
+@st.fragment
+def _results_panel() -> None:
+    # Reruns with the app (new or re-scored result) or for its own buttons; sidebar edits don't touch it.
     result = st.session_state["analysis_result"]
 
     st.subheader("Overall Score")
@@ -343,7 +402,7 @@ if st.session_state["analysis_result"]:
             "population": result.get("macro", {}).get("population"),
         }
         st.session_state["comparisons"].append(comparison_row)
-        st.success("Added to comparison list.")
+        st.rerun()
 
     report_delta = None
     if st.button("Compare with previous run"):
@@ -364,11 +423,17 @@ if st.session_state["analysis_result"]:
         else:
             st.info("No previous run available yet.")
 
-    report_payload = dict(result)
-    if report_delta:
-        report_payload["report_delta"] = report_delta
-
-    narrative = build_score_narrative(result)
+    # One history row per analysis: reruns while the result is displayed are no-ops.
+    # The stored digest doubles as the key for memoized report artifacts; re-scoring
+    # replaces it with the digest of the re-scored result.
+    if st.session_state.get("recorded_run_id") != result.get("run_id"):
+        result_ref = get_result_store().put(result)
+        _run_store().record(build_run_row(result, result_ref=result_ref))
+        st.session_state["recorded_run_id"] = result.get("run_id")
+        st.session_state["result_digest"] = result_ref
+    digest = st.session_state.get("result_digest")
+
+    narrative = get_score_narrative(result, digest=digest)
     st.subheader("Analyst Narrative")
     st.write(narrative["summary"])
     st.markdown("**Why this score**")
@@ -380,26 +445,22 @@ if st.session_state["analysis_result"]:
         st.markdown("**Gaps to validate**")
         st.markdown("\n".join(f"- {item}" for item in narrative["gaps"]))
 
-    report_html = build_html_report(report_payload)
-    st.download_button(
-        label="Download HTML Report",
-        data=report_html,
-        file_name="osint_report.html",
-        mime="text/html",
-    )
-
-    st.session_state["run_history"].append(
-        {
-            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
-            "target": result["subject"].get("target_name"),
-            "type": result["subject"].get("target_type"),
-            "overall_score": result["scores"].get("overall_score"),
-            "confidence": result["scores"].get("confidence"),
-            "official_sources": result["scores"].get("confidence_sources", {}).get("official", 0),
-            "evidence_count": len(result.get("evidence", [])),
-        }
-    )
-    _save_run_history(st.session_state["run_history"])
+    # Reports render only when a download is requested, at most once per result.
+    report_col, pdf_col = st.columns(2)
+    with report_col:
+        st.download_button(
+            label="Download HTML Report",
+            data=lambda: get_html_report(result, digest=digest, report_delta=report_delta),
+            file_name="osint_report.html",
+            mime="text/html",
+        )
+    with pdf_col:
+        st.download_button(
+            label="Download PDF Report",
+            data=lambda: get_pdf_report(result, digest=digest, report_delta=report_delta),
+            file_name="osint_report.pdf",
+            mime="application/pdf",
+        )
 
     st.session_state["last_result"] = result
 
@@ -419,24 +480,7 @@ if st.session_state["analysis_result"]:
 
         st.subheader("Evidence Pack")
         st.caption("Quality labels: official (government/international), media, or unknown.")
-        if result["evidence"]:
-            relevance_values = [
-                item.get("relevance_score")
-                for item in result["evidence"]
-                if isinstance(item.get("relevance_score"), (int, float))
-            ]
-            if relevance_values:
-                st.subheader("Relevance Histogram")
-                st.caption("Higher values indicate stronger keyword match to your subject.")
-                st.bar_chart(pd.Series(relevance_values))
-                if all(value == 0 for value in relevance_values):
-                    st.caption("All relevance scores are 0. Refine keywords or add sources for better matches.")
-            else:
-                st.caption("Relevance histogram not available (no numeric relevance scores yet).")
-            evidence_df = pd.DataFrame(result["evidence"]).astype(str)
-            st.dataframe(evidence_df, width="stretch", hide_index=True)
-        else:
-            st.info("No evidence collected. Check API keys or adjust queries.")
+        _evidence_explorer(result, digest)
 
     with col2:
         st.subheader("Resolved Target")
@@ -444,6 +488,29 @@ if st.session_state["analysis_result"]:
         resolved_rows = [{"key": key, "value": str(value)} for key, value in resolved.items()]
         st.dataframe(pd.DataFrame(resolved_rows).astype(str), width="stretch", hide_index=True)
 
+        company = result.get("company") or {}
+        entity = company.get("entity")
+        if entity:
+            st.subheader("Company")
+            st.caption(
+                f"{entity.get('name')} ({entity.get('entity_id')}), {entity.get('jurisdiction') or entity.get('country_code')}"
+                f"{', ' + entity['city'] if entity.get('city') else ''}; {entity.get('status') or 'status unknown'}. "
+                f"Matched '{entity.get('matched_name')}' with score {entity.get('score', 0):.2f} in {entity.get('source')}."
+            )
+            related = company.get("related") or {}
+            related_rows = [
+                {
+                    "relation": relation,
+                    "kind": str(row.get("kind")),
+                    "name": str(row.get("name") or row.get("entity_id")),
+                    "country": str(row.get("country") or ""),
+                }
+                for relation in ("parents", "subsidiaries")
+                for row in related.get(relation, [])
+            ]
+            if related_rows:
+                st.dataframe(pd.DataFrame(related_rows).astype(str), width="stretch", hide_index=True)
+
         st.subheader("Macro Data")
         macro = result.get("macro", {})
         macro_rows = [{"key": key, "value": str(value)} for key, value in macro.items()]
@@ -458,6 +525,37 @@ if st.session_state["analysis_result"]:
             )
         st.dataframe(pd.DataFrame(trade_rows).astype(str), width="stretch", hide_index=True)
 
+        supply_chain = result.get("supply_chain") or {}
+        if supply_chain:
+            st.subheader("Supply Chain")
+            st.caption(
+                f"World imports of HS {', '.join(supply_chain.get('hs_codes', []))} in {supply_chain.get('year')}: "
+                f"${supply_chain.get('world_imports', 0):,.0f} across {supply_chain.get('countries', 0)} countries. "
+                f"Supply concentration (HHI): {supply_chain.get('supplier_concentration', 0):.2f} direct, "
+                f"{supply_chain.get('effective_supplier_concentration', 0):.2f} including indirect dependencies."
+            )
+            supplier_rows = [
+                {
+                    "supplier": str(row.get("country")),
+                    "export_share": f"{row.get('share', 0):.1%}",
+                    "world_dependency": f"{row.get('systemic_dependency', 0):.1%}",
+                }
+                for row in supply_chain.get("top_suppliers", [])
+            ]
+            st.dataframe(pd.DataFrame(supplier_rows).astype(str), width="stretch", hide_index=True)
+            focus = supply_chain.get("focus")
+            if focus:
+                focus_rows = [
+                    {
+                        "supplier": str(row.get("country")),
+                        "direct_share": f"{row.get('direct_share', 0):.1%}",
+                        "multi_hop_share": f"{row.get('share', 0):.1%}",
+                    }
+                    for row in focus["multi_hop"]["suppliers"]
+                ]
+                st.caption(f"Dependencies of {focus.get('country_name')}, direct and through intermediaries:")
+                st.dataframe(pd.DataFrame(focus_rows).astype(str), width="stretch", hide_index=True)
+
         st.subheader("Policy Signals")
         policy = result.get("policy_signals", {})
         policy_rows = []
@@ -467,6 +565,33 @@ if st.session_state["analysis_result"]:
             )
         st.dataframe(pd.DataFrame(policy_rows).astype(str), width="stretch", hide_index=True)
 
+        st.subheader("Sanctions Screening")
+        sanctions = result.get("sanctions") or {}
+        if not sanctions.get("available"):
+            st.caption("No local sanctions lists installed; political risk is a neutral default.")
+        else:
+            exposure = sanctions.get("country") or {}
+            st.caption(
+                f"Programs targeting the country: {', '.join(exposure.get('programs') or []) or 'none'}. "
+                f"Listed parties located there: {exposure.get('listed_entries', 0)}."
+            )
+            hits = (sanctions.get("entity_hits") or []) + (sanctions.get("evidence_hits") or [])
+            if hits:
+                hit_rows = [
+                    {
+                        "matched": str(hit.get("query")),
+                        "listed_name": str(hit.get("listed_name")),
+                        "list": str(hit.get("source")),
+                        "programs": ", ".join(hit.get("programs") or []),
+                        "similarity": str(hit.get("score")),
+                    }
+                    for hit in hits
+                ]
+                st.dataframe(pd.DataFrame(hit_rows).astype(str), width="stretch", hide_index=True)
+
+        st.subheader("Similar Markets")
+        _similar_markets(result)
+
         st.subheader("Confidence Breakdown")
         conf_breakdown = result["scores"].get("confidence_breakdown", {})
         conf_breakdown_rows = [{"key": key, "value": str(value)} for key, value in conf_breakdown.items()]
@@ -483,6 +608,13 @@ if st.session_state["analysis_result"]:
             width="stretch",
             hide_index=True,
         )
+        usage = result.get("usage")
+        if usage:
+            hits = sum(stats.get("cache_hits", 0) for stats in usage.get("apis", {}).values())
+            st.caption(
+                f"Paid API calls this run: {usage.get('calls', 0)} (est. ${usage.get('cost', 0):.3f}), "
+                f"{hits} served from cache."
+            )
 
         st.subheader("Tender Filters")
         st.dataframe(
@@ -498,54 +630,191 @@ if st.session_state["analysis_result"]:
             hide_index=True,
         )
 
-st.markdown("---")
-st.subheader("Comparison View")
-st.caption("Compare multiple analyses side-by-side. Add items using the button above.")
-if st.session_state["comparisons"]:
-    df = pd.DataFrame(st.session_state["comparisons"])
-    st.dataframe(df.astype(str), width="stretch", hide_index=True)
-    st.download_button(
-        label="Download Comparison CSV",
-        data=df.to_csv(index=False),
-        file_name="osint_comparison.csv",
-        mime="text/csv",
-    )
-    if st.button("Clear comparison list"):
-        st.session_state["comparisons"] = []
-        st.info("Comparison list cleared.")
-else:
-    st.info("No comparisons yet. Run an analysis and click 'Add to comparison list'.")
 
-st.markdown("---")
-st.subheader("Run History")
-st.caption("Note: Cloud deployments may reset local storage on redeploy.")
-st.caption("Tip: Export run history for long-term storage and re-import when needed.")
-uploaded_history = st.file_uploader("Import run history (JSON)", type=["json"])
-if uploaded_history:
+def _similar_markets(result: Dict[str, object]) -> None:
+    country_code = (result.get("resolved") or {}).get("country_code")
+    if not country_code:
+        st.caption("Similar markets are only available for country targets.")
+        return
     try:
-        imported = json.load(uploaded_history)
-        if isinstance(imported, list):
-            st.session_state["run_history"] = imported
-            _save_run_history(imported)
-            st.success("Run history imported.")
+        peers = find_peer_markets(country_code, k=5)
+    except LookupError:
+        st.caption("Build the indicator distributions to see markets with a similar profile.")
+        return
+    peer_rows = [
+        {"country": str(peer["country_name"]), "similarity": f"{peer['similarity']:.2f}"} for peer in peers["peers"]
+    ]
+    st.dataframe(pd.DataFrame(peer_rows).astype(str), width="stretch", hide_index=True)
+    if st.button("Queue analysis of similar markets", key=f"peers-{country_code}"):
+        subject = Subject(**result.get("subject", {}))
+        try:
+            jobs = queue_peer_analyses(subject, peers["peers"], scoring_config=result.get("scoring_config"))
+        except JobQueueFullError as e:
+            st.warning(str(e))
         else:
-            st.error("Invalid history format. Expected a list of records.")
-    except Exception:
-        st.error("Failed to parse uploaded JSON.")
-if st.session_state["run_history"]:
-    history_df = pd.DataFrame(st.session_state["run_history"])
-    st.dataframe(history_df.astype(str), width="stretch", hide_index=True)
-    st.download_button(
-        label="Download Run History JSON",
-        data=json.dumps(st.session_state["run_history"], ensure_ascii=False, indent=2),
-        file_name="osint_run_history.json",
-        mime="application/json",
-    )
-    st.download_button(
-        label="Download Run History CSV",
-        data=history_df.to_csv(index=False),
-        file_name="osint_run_history.csv",
-        mime="text/csv",
+            st.caption(f"Queued {len(jobs)} analyses; they appear in Run History when finished.")
+
+
+@st.fragment
+def _comparison_view() -> None:
+    st.subheader("Comparison View")
+    st.caption("Compare multiple analyses side-by-side. Add items using the button above.")
+    if st.session_state["comparisons"]:
+        df = build_table_frame(st.session_state["comparisons"])
+        comparison_pages = page_count(len(df), HISTORY_PAGE_SIZES[0])
+        comparison_page = 1
+        if comparison_pages > 1:
+            comparison_page = st.number_input("Comparison page", min_value=1, max_value=comparison_pages, value=1, step=1)
+        st.dataframe(paginate_frame(df, int(comparison_page), HISTORY_PAGE_SIZES[0]), width="stretch", hide_index=True)
+        st.download_button(
+            label="Download Comparison CSV",
+            data=df.to_csv(index=False),
+            file_name="osint_comparison.csv",
+            mime="text/csv",
+        )
+        if st.button("Clear comparison list"):
+            st.session_state["comparisons"] = []
+            st.info("Comparison list cleared.")
+    else:
+        st.info("No comparisons yet. Run an analysis and click 'Add to comparison list'.")
+
+
+@st.fragment
+def _history_view() -> None:
+    st.subheader("Run History")
+    st.caption("Note: Cloud deployments may reset local storage on redeploy.")
+    st.caption("Tip: Export run history for long-term storage and re-import when needed.")
+    uploaded_history = st.file_uploader("Import run history (JSON)", type=["json"])
+    if uploaded_history:
+        try:
+            imported = json.load(uploaded_history)
+            if isinstance(imported, list):
+                added = _run_store().record_many(row for row in imported if isinstance(row, dict))
+                st.success(f"Run history imported ({added} new runs).")
+            else:
+                st.error("Invalid history format. Expected a list of records.")
+        except Exception:
+            st.error("Failed to parse uploaded JSON.")
+
+    run_store = _run_store()
+    history_filter_col, history_size_col = st.columns([3, 1])
+    with history_filter_col:
+        history_target = st.selectbox("Filter by target", ["All targets"] + run_store.targets())
+    with history_size_col:
+        history_page_size = st.selectbox("Rows per page", HISTORY_PAGE_SIZES, index=0)
+    target_filter = None if history_target == "All targets" else history_target
+    history_total = run_store.count(target=target_filter)
+    if history_total:
+        history_pages = page_count(history_total, history_page_size)
+        history_page = st.number_input("Page", min_value=1, max_value=history_pages, value=1, step=1)
+        st.caption(f"{history_total} runs, page {history_page} of {history_pages}.")
+        history_rows = run_store.query(
+            target=target_filter,
+            limit=history_page_size,
+            offset=(int(history_page) - 1) * history_page_size,
+        )
+        st.dataframe(build_table_frame(history_rows), width="stretch", hide_index=True)
+        reopenable = {
+            f"{row['timestamp']} | {row['target']} | score {row['overall_score']}": row["result_ref"]
+            for row in history_rows
+            if row.get("result_ref")
+        }
+        if reopenable:
+            reopen_col, reopen_button_col = st.columns([3, 1])
+            with reopen_col:
+                reopen_choice = st.selectbox("Reopen a stored run", list(reopenable))
+            with reopen_button_col:
+                st.write("")
+                if st.button("Open run"):
+                    stored = get_result_store().get(reopenable[reopen_choice])
+                    if stored:
+                        st.session_state["analysis_result"] = stored
+                        st.session_state["recorded_run_id"] = stored.get("run_id")
+                        st.session_state["result_digest"] = reopenable[reopen_choice]
+                        st.rerun()
+                    else:
+                        st.error("Stored result is no longer available.")
+        st.download_button(
+            label="Download Run History JSON",
+            data=lambda: json.dumps(list(run_store.iter_all()), ensure_ascii=False, indent=2),
+            file_name="osint_run_history.json",
+            mime="application/json",
+        )
+        st.download_button(
+            label="Download Run History CSV",
+            data=lambda: pd.DataFrame(list(run_store.iter_all())).to_csv(index=False),
+            file_name="osint_run_history.csv",
+            mime="text/csv",
+        )
+    else:
+        st.info("No runs yet.")
+
+
+st.title("Market Opportunity OSINT")
+st.caption("Evidence-first research for export market screening using open sources.")
+st.markdown(
+    """
+This tool helps analysts quickly screen export markets using public data and OSINT.  
+Fill the **Subject Definition** on the left, run the analysis, and review the evidence-backed score.
+"""
+)
+
+with st.expander("How to interpret the score", expanded=False):
+    st.markdown(
+        """
+- **Overall score**: weighted composite of the dimensions you set in the sidebar.  
+- **Confidence**: data availability + evidence mix (news, trade, policy, tenders).  
+- **Evidence Pack**: raw sources used to justify the score. Always review before decisions.
+"""
     )
-else:
-    st.info("No runs yet.")
+
+if "comparisons" not in st.session_state:
+    st.session_state["comparisons"] = []
+if "last_result" not in st.session_state:
+    st.session_state["last_result"] = None
+if "analysis_result" not in st.session_state:
+    st.session_state["analysis_result"] = None
+
+with st.sidebar:
+    _sidebar_inputs()
+
+pending_analysis = st.session_state.pop("pending_analysis", None)
+if pending_analysis:
+    with st.status("Running OSINT pipeline...", expanded=False) as pipeline_status:
+
+        def _report_stage(stage: str, payload: dict) -> None:
+            if stage == "partial_scores":
+                # Default weights while collecting; the chosen weights are applied once the run completes.
+                pipeline_status.update(
+                    label=f"Running OSINT pipeline... provisional score "
+                    f"{payload['scores']['overall_score']} from {payload['evidence_count']} evidence items"
+                )
+                return
+            pipeline_status.update(label=f"Running OSINT pipeline... ({stage} done)")
+            pipeline_status.write(f"{stage.title()} complete")
+
+        try:
+            collected = run_analysis(
+                pending_analysis["subject"],
+                fetch_full_text=pending_analysis.get("fetch_full_text", False),
+                _on_stage=_report_stage,
+            )
+            st.session_state["analysis_result"] = rescore_result(collected, pending_analysis["scoring"])
+            pipeline_status.update(label="OSINT pipeline complete", state="complete")
+        except SubjectResolutionError as exc:
+            pipeline_status.update(label="OSINT pipeline failed", state="error")
+            st.error(str(exc))
+            st.stop()
+        except Exception as exc:
+            pipeline_status.update(label="OSINT pipeline failed", state="error")
+            st.error(f"Unexpected error: {exc}")
+            st.stop()
+
+if st.session_state["analysis_result"]:
+    _results_panel()
+
+st.markdown("---")
+_comparison_view()
+
+st.markdown("---")
+_history_view()